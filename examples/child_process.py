@@ -42,6 +42,7 @@ def connect_read_pipe(file):
     stream_reader = streams.StreamReader()
     transport = loop._make_read_pipe_transport(file)
     protocol = _StreamReaderProtocol(transport, stream_reader)
+    stream_reader.set_transport(transport)
     return stream_reader
 
 class _StreamReaderProtocol(protocols.Protocol):
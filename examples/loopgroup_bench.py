@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Benchmark an echo server on one loop against a LoopGroup.
+
+Client processes each open one connection and do request/response
+round trips with the server for a fixed time.  The server runs once
+on a single loop and then on a LoopGroup with every way of
+distributing connections.  The loops of a group share the GIL, so
+the gain depends on how much of the work releases it (system calls,
+hashing, compression, ...); --work adds a hashlib call per message.
+"""
+
+import argparse
+import hashlib
+import multiprocessing
+import socket
+import time
+
+from tulip import loopgroup
+from tulip import protocols
+
+
+ARGS = argparse.ArgumentParser(description="LoopGroup echo benchmark.")
+ARGS.add_argument(
+    '--loops', action="store", dest='loops', type=int, default=None,
+    help='number of loops in the group (default: number of CPUs)')
+ARGS.add_argument(
+    '--clients', action="store", dest='clients', type=int, default=8,
+    help='number of client processes')
+ARGS.add_argument(
+    '--duration', action="store", dest='duration', type=float, default=3.0,
+    help='seconds to run each configuration')
+ARGS.add_argument(
+    '--size', action="store", dest='size', type=int, default=64,
+    help='message size in bytes')
+ARGS.add_argument(
+    '--work', action="store", dest='work', type=int, default=0,
+    help='bytes hashed by the server per message')
+
+
+class EchoProtocol(protocols.Protocol):
+
+    work = b''
+
+    def __init__(self, transport):
+        self.transport = transport
+        transport.register_protocol(self)
+
+    def data_received(self, data):
+        if self.work:
+            hashlib.sha256(self.work).digest()
+        self.transport.write(data)
+
+    def eof_received(self):
+        self.transport.close()
+
+
+def client(address, size, duration, results):
+    sock = socket.create_connection(address)
+    message = b'x' * size
+    count = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        sock.sendall(message)
+        received = 0
+        while received < size:
+            data = sock.recv(size - received)
+            if not data:
+                raise ConnectionError('server closed the connection')
+            received += len(data)
+        count += 1
+    sock.close()
+    results.put(count)
+
+
+def run(args, size, distribute):
+    with loopgroup.LoopGroup(size) as group:
+        socks = group.start_serving(
+            EchoProtocol, '127.0.0.1', 0, distribute=distribute)
+        address = socks[0].getsockname()
+        results = multiprocessing.Queue()
+        procs = [multiprocessing.Process(
+                     target=client,
+                     args=(address, args.size, args.duration, results))
+                 for _ in range(args.clients)]
+        for proc in procs:
+            proc.start()
+        total = sum(results.get() for _ in procs)
+        for proc in procs:
+            proc.join()
+    return total / args.duration
+
+
+def main():
+    args = ARGS.parse_args()
+    EchoProtocol.work = b'x' * args.work
+    loops = args.loops or multiprocessing.cpu_count()
+    configs = [(1, loopgroup.ROUND_ROBIN, 'single loop'),
+               (loops, loopgroup.ROUND_ROBIN, 'round robin'),
+               (loops, loopgroup.LEAST_LOADED, 'least loaded')]
+    if hasattr(socket, 'SO_REUSEPORT'):
+        configs.append((loops, loopgroup.REUSE_PORT, 'SO_REUSEPORT'))
+    print('{:>14} {:>6} {:>12}'.format('mode', 'loops', 'requests/s'))
+    for size, distribute, name in configs:
+        rate = run(args, size, distribute)
+        print('{:>14} {:>6} {:>12.0f}'.format(name, size, rate))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Measure echo latency while background tasks keep the loop busy.
+
+A client process sends small messages and times the round trips.
+Meanwhile the server runs a number of background tasks doing CPU
+work in small chunks, first as normal Tasks and then as idle Tasks
+(Task(..., idle=True)), which only get to run when no other callback
+is ready.
+"""
+
+import argparse
+import multiprocessing
+import socket
+import time
+
+import tulip
+from tulip import protocols
+
+
+ARGS = argparse.ArgumentParser(description="Ready queue priority benchmark.")
+ARGS.add_argument(
+    '--tasks', action="store", dest='tasks', type=int, default=10,
+    help='number of background tasks')
+ARGS.add_argument(
+    '--chunk', action="store", dest='chunk', type=float, default=0.001,
+    help='seconds of work per background step')
+ARGS.add_argument(
+    '--requests', action="store", dest='requests', type=int, default=2000,
+    help='number of round trips measured')
+
+
+class EchoProtocol(protocols.Protocol):
+
+    def __init__(self, transport):
+        self.transport = transport
+        transport.register_protocol(self)
+
+    def data_received(self, data):
+        self.transport.write(data)
+
+    def eof_received(self):
+        self.transport.close()
+
+
+@tulip.coroutine
+def background(loop, chunk):
+    while True:
+        deadline = time.monotonic() + chunk
+        while time.monotonic() < deadline:
+            pass
+        yield from tulip.sleep(0, loop=loop)
+
+
+def client(address, requests, results):
+    sock = socket.create_connection(address)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, True)
+    latencies = []
+    for _ in range(requests):
+        t0 = time.monotonic()
+        sock.sendall(b'x')
+        sock.recv(1)
+        latencies.append(time.monotonic() - t0)
+    sock.close()
+    results.put(latencies)
+
+
+def run(args, idle):
+    loop = tulip.new_event_loop()
+    tulip.set_event_loop(loop)
+    sock, = loop.run_until_complete(
+        loop.start_serving(EchoProtocol, '127.0.0.1', 0))
+    workers = [tulip.Task(background(loop, args.chunk), loop=loop, idle=idle)
+               for _ in range(args.tasks)]
+    results = multiprocessing.Queue()
+    proc = multiprocessing.Process(
+        target=client, args=(sock.getsockname(), args.requests, results))
+    proc.start()
+    latencies = loop.run_until_complete(
+        loop.run_in_executor(None, results.get))
+    proc.join()
+    for task in workers:
+        task.cancel()
+    loop.run_until_complete(tulip.wait(workers, loop=loop))
+    loop.stop_serving(sock)
+    loop.close()
+    latencies.sort()
+    return [latencies[int(len(latencies) * q) - 1] * 1000
+            for q in (0.5, 0.99, 1.0)]
+
+
+def main():
+    args = ARGS.parse_args()
+    print('{:>8} {:>9} {:>9} {:>9}'.format('tasks', 'p50 ms', 'p99 ms',
+                                           'max ms'))
+    for idle, name in ((False, 'normal'), (True, 'idle')):
+        p50, p99, pmax = run(args, idle)
+        print('{:>8} {:>9.2f} {:>9.2f} {:>9.2f}'.format(name, p50, p99, pmax))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Benchmark the timer heap against the timer wheel.
+
+Arms N timers, cancels most of them (like keep-alive timeouts that get
+reset), and then runs the loop's timer machinery until the remaining
+ones have fired.  Time is simulated, so no real sleeping is done.
+"""
+
+import argparse
+import heapq
+import random
+import time
+
+from tulip import events
+from tulip import timers
+
+
+ARGS = argparse.ArgumentParser(description="Timer heap vs. wheel benchmark.")
+ARGS.add_argument(
+    '-n', action="append", dest='sizes', type=int,
+    help='number of timers (default 10000, 100000 and 1000000)')
+ARGS.add_argument(
+    '--cancel', action="store", dest='cancel', type=float, default=0.9,
+    help='fraction of timers cancelled before they fire')
+ARGS.add_argument(
+    '--resolution', action="store", dest='resolution', type=float,
+    default=0.1, help='timer wheel resolution')
+
+
+def callback():
+    pass
+
+
+def make_delays(n):
+    rnd = random.Random(n)
+    return [rnd.uniform(1.0, 60.0) for _ in range(n)]
+
+
+def bench_heap(delays, cancel):
+    heap = []
+    now = 0.0
+    t0 = time.perf_counter()
+    handles = []
+    for delay in delays:
+        h = events.TimerHandle(now + delay, callback, ())
+        heapq.heappush(heap, h)
+        handles.append(h)
+    t1 = time.perf_counter()
+    for h in handles[:int(len(handles) * cancel)]:
+        h.cancel()
+    fired = 0
+    while heap:
+        now = heap[0]._when
+        while heap and heap[0]._when <= now:
+            h = heapq.heappop(heap)
+            if not h._cancelled:
+                fired += 1
+    t2 = time.perf_counter()
+    return t1 - t0, t2 - t1, fired
+
+
+def bench_wheel(delays, cancel, resolution):
+    wheel = timers.TimerWheel(resolution)
+    now = 0.0
+    t0 = time.perf_counter()
+    handles = []
+    for delay in delays:
+        h = events.TimerHandle(now + delay, callback, ())
+        wheel.insert(h, now)
+        handles.append(h)
+    t1 = time.perf_counter()
+    for h in handles[:int(len(handles) * cancel)]:
+        h.cancel()
+    fired = 0
+    while wheel:
+        now = wheel.next_expiry()
+        fired += len(wheel.advance(now))
+    t2 = time.perf_counter()
+    return t1 - t0, t2 - t1, fired
+
+
+def main():
+    args = ARGS.parse_args()
+    sizes = args.sizes or [10000, 100000, 1000000]
+    print('{:>9} {:>6} {:>10} {:>10} {:>10}'.format(
+        'timers', 'impl', 'arm (s)', 'run (s)', 'fired'))
+    for n in sizes:
+        delays = make_delays(n)
+        arm, run, fired = bench_heap(delays, args.cancel)
+        print('{:>9} {:>6} {:>10.3f} {:>10.3f} {:>10}'.format(
+            n, 'heap', arm, run, fired))
+        arm, run, fired = bench_wheel(delays, args.cancel, args.resolution)
+        print('{:>9} {:>6} {:>10.3f} {:>10.3f} {:>10}'.format(
+            n, 'wheel', arm, run, fired))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Measure the cost of writing a large stream to a slow reader.
+
+The server writes the whole stream to its transport at once, in
+chunks, so that nearly all of it is buffered in the transport.  A
+client process reads it in small pieces with pauses in between.  The
+CPU time used by the server's process is reported, along with the
+wall time the transfer took.
+"""
+
+import argparse
+import multiprocessing
+import socket
+import time
+
+import tulip
+from tulip import protocols
+
+
+ARGS = argparse.ArgumentParser(description="Slow reader write benchmark.")
+ARGS.add_argument(
+    '--size', action="store", dest='size', type=int, default=100,
+    help='megabytes written')
+ARGS.add_argument(
+    '--chunk', action="store", dest='chunk', type=int, default=64,
+    help='kilobytes per write() call')
+ARGS.add_argument(
+    '--read', action="store", dest='read', type=int, default=64,
+    help='kilobytes read by the client before each pause')
+ARGS.add_argument(
+    '--pause', action="store", dest='pause', type=float, default=0.001,
+    help='seconds the client pauses between reads')
+
+
+class WriterProtocol(protocols.Protocol):
+
+    def __init__(self, transport, args, done):
+        self.transport = transport
+        self.done = done
+        transport.register_protocol(self)
+        chunk = b'x' * (args.chunk * 1024)
+        for _ in range(args.size * 1024 // args.chunk):
+            transport.write(chunk)
+        transport.close()
+
+    def connection_lost(self, exc):
+        self.done.set_result(None)
+
+
+def client(address, args):
+    sock = socket.create_connection(address)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 64 * 1024)
+    # MSG_WAITALL: pace the reader by bytes, however they were sent.
+    while sock.recv(args.read * 1024, socket.MSG_WAITALL):
+        time.sleep(args.pause)
+    sock.close()
+
+
+def main():
+    args = ARGS.parse_args()
+    loop = tulip.new_event_loop()
+    tulip.set_event_loop(loop)
+    done = tulip.Future(loop=loop)
+    sock, = loop.run_until_complete(loop.start_serving(
+        lambda transport: WriterProtocol(transport, args, done),
+        '127.0.0.1', 0))
+    proc = multiprocessing.Process(
+        target=client, args=(sock.getsockname(), args))
+    t0 = time.monotonic()
+    cpu0 = time.process_time()
+    proc.start()
+    loop.run_until_complete(done)
+    cpu = time.process_time() - cpu0
+    wall = time.monotonic() - t0
+    proc.join()
+    loop.stop_serving(sock)
+    loop.close()
+    print('{} MB: {:.2f} s CPU, {:.2f} s wall'.format(args.size, cpu, wall))
+
+
+if __name__ == '__main__':
+    main()
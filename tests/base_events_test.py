@@ -1,7 +1,11 @@
 """Tests for base_events.py"""
 
-import logging
+import concurrent.futures
+import itertools
+import os
+import pickle
 import socket
+import threading
 import time
 import unittest
 import unittest.mock
@@ -10,8 +14,10 @@ from tulip import base_events
 from tulip import events
 from tulip import futures
 from tulip import protocols
+from tulip import resolver
 from tulip import tasks
 from tulip import test_utils
+from tulip import timers
 
 
 class BaseEventLoopTests(unittest.TestCase):
@@ -51,7 +57,8 @@ class BaseEventLoopTests(unittest.TestCase):
 
         self.loop._add_callback(h)
         self.assertFalse(self.loop._scheduled)
-        self.assertIn(h, self.loop._ready)
+        self.assertIn(h, self.loop._ready_io)
+        self.assertNotIn(h, self.loop._ready)
 
     def test__add_callback_timer(self):
         h = events.TimerHandle(time.monotonic()+10, lambda: False, ())
@@ -59,13 +66,21 @@ class BaseEventLoopTests(unittest.TestCase):
         self.loop._add_callback(h)
         self.assertIn(h, self.loop._scheduled)
 
+    def test__add_callback_timer_cancel(self):
+        h = events.TimerHandle(time.monotonic()+10, lambda: False, ())
+
+        self.loop._add_callback(h)
+        h.cancel()
+        self.assertIs(self.loop, h._loop)
+        self.assertEqual((0, 1), self.loop.timer_counts())
+
     def test__add_callback_cancelled_handle(self):
         h = events.Handle(lambda: False, ())
         h.cancel()
 
         self.loop._add_callback(h)
         self.assertFalse(self.loop._scheduled)
-        self.assertFalse(self.loop._ready)
+        self.assertFalse(self.loop._ready_io)
 
     def test_set_default_executor(self):
         executor = unittest.mock.Mock()
@@ -74,11 +89,25 @@ class BaseEventLoopTests(unittest.TestCase):
 
     def test_getnameinfo(self):
         sockaddr = unittest.mock.Mock()
-        self.loop.run_in_executor = unittest.mock.Mock()
+        self.loop._resolver = unittest.mock.Mock()
         self.loop.getnameinfo(sockaddr)
-        self.assertEqual(
-            (None, socket.getnameinfo, sockaddr, 0),
-            self.loop.run_in_executor.call_args[0])
+        self.loop._resolver.getnameinfo.assert_called_with(sockaddr, 0)
+
+    def test_getaddrinfo(self):
+        self.loop._resolver = unittest.mock.Mock()
+        self.loop.getaddrinfo('example.com', 80, type=socket.SOCK_STREAM)
+        self.loop._resolver.getaddrinfo.assert_called_with(
+            'example.com', 80, family=0, type=socket.SOCK_STREAM,
+            proto=0, flags=0)
+
+    def test_default_resolver(self):
+        r = self.loop._get_resolver()
+        self.assertIsInstance(r, resolver.Resolver)
+        self.assertIs(r, self.loop._get_resolver())
+        r.close = unittest.mock.Mock()
+        self.loop.set_resolver(None)
+        r.close.assert_called_with()
+        self.assertIsNot(r, self.loop._get_resolver())
 
     def test_call_soon(self):
         def cb():
@@ -89,6 +118,147 @@ class BaseEventLoopTests(unittest.TestCase):
         self.assertIsInstance(h, events.Handle)
         self.assertIn(h, self.loop._ready)
 
+    def test_call_idle(self):
+        h = self.loop.call_idle(lambda: None)
+        self.assertIsInstance(h, events.Handle)
+        self.assertIn(h, self.loop._idle)
+        self.assertNotIn(h, self.loop._ready)
+
+    def test__run_once_lanes(self):
+        calls = []
+        self.loop._process_events = unittest.mock.Mock()
+        self.loop.call_idle(calls.append, 'idle1')
+        self.loop.call_idle(calls.append, 'idle2')
+        self.loop.call_soon(calls.append, 'normal')
+        self.loop._add_callback(events.Handle(calls.append, ('io',)))
+
+        self.loop._run_once()
+        self.assertEqual(['io', 'normal'], calls)
+        self.assertEqual((0,), self.loop._selector.select.call_args[0])
+
+        # Idle callbacks run one per iteration, once nothing else is ready.
+        self.loop._run_once()
+        self.assertEqual(['io', 'normal', 'idle1'], calls)
+        self.loop.call_soon(calls.append, 'normal2')
+        self.loop._run_once()
+        self.assertEqual(['io', 'normal', 'idle1', 'normal2'], calls)
+        self.loop._run_once()
+        self.assertEqual(['io', 'normal', 'idle1', 'normal2', 'idle2'], calls)
+
+    def test__run_once_idle_cancelled(self):
+        calls = []
+        self.loop._process_events = unittest.mock.Mock()
+        self.loop.call_idle(calls.append, 'a').cancel()
+        self.loop.call_idle(calls.append, 'b')
+        self.loop._run_once()
+        self.assertEqual(['b'], calls)
+        self.assertFalse(self.loop._idle)
+
+    def test_set_iteration_budget(self):
+        self.assertRaises(ValueError, self.loop.set_iteration_budget, 0)
+        self.assertRaises(ValueError, self.loop.set_iteration_budget,
+                          None, 0)
+        self.assertEqual((0, 0), self.loop.budget_hits())
+
+    def test__run_once_callback_budget(self):
+        calls = []
+        self.loop._process_events = unittest.mock.Mock()
+        self.loop.set_iteration_budget(max_callbacks=3)
+        for i in range(5):
+            self.loop.call_soon(calls.append, i)
+
+        self.loop._run_once()
+        self.assertEqual([0, 1, 2], calls)
+        self.assertEqual((1, 0), self.loop.budget_hits())
+
+        # I/O callbacks go before the rest of the backlog.
+        self.loop._add_callback(events.Handle(calls.append, ('io',)))
+        self.loop._run_once()
+        self.assertEqual((0,), self.loop._selector.select.call_args[0])
+        self.assertEqual([0, 1, 2, 'io', 3, 4], calls)
+        self.assertEqual((1, 0), self.loop.budget_hits())
+
+    @unittest.mock.patch('tulip.base_events.time')
+    def test__run_once_time_budget(self, m_time):
+        m_time.monotonic.side_effect = itertools.count(0.0, 0.1)
+        calls = []
+        self.loop._process_events = unittest.mock.Mock()
+        self.loop.set_iteration_budget(max_time=0.25)
+        for i in range(5):
+            self.loop.call_soon(calls.append, i)
+
+        self.loop._run_once()
+        self.assertEqual([0, 1, 2], calls)
+        self.assertEqual((0, 1), self.loop.budget_hits())
+        self.assertEqual(2, len(self.loop._ready))
+
+    def test__run_once_budget_always_runs_one(self):
+        calls = []
+        self.loop._process_events = unittest.mock.Mock()
+        self.loop.set_iteration_budget(max_time=1e-9)
+        self.loop.call_soon(calls.append, 1)
+        self.loop._run_once()
+        self.assertEqual([1], calls)
+        self.assertEqual((0, 0), self.loop.budget_hits())
+
+    def test_top_tasks(self):
+        self.loop.set_task_accounting(True)
+        f = unittest.mock.Mock(__qualname__='f', __name__='f')
+        g = unittest.mock.Mock(__qualname__='g', __name__='g')
+        self.loop._task_accounting.record(f, 1.0, 0.5)
+        self.loop._task_accounting.record(f, 1.0, 0.5)
+        self.loop._task_accounting.record(g, 0.5, 2.0)
+        self.assertEqual([tasks.TaskStats('g', 1, 0.5, 2.0),
+                          tasks.TaskStats('f', 2, 2.0, 1.0)],
+                         self.loop.top_tasks())
+        self.assertEqual(['g'], [s.name for s in self.loop.top_tasks(1)])
+
+    @unittest.mock.patch('tulip.base_events.tulip_log')
+    def test_log_task_report(self, m_log):
+        self.loop.set_task_accounting(True)
+        self.loop._task_accounting.record(
+            unittest.mock.Mock(__qualname__='handler', __name__='handler'),
+            1.5, 0.25)
+        self.loop.log_task_report()
+        report = m_log.info.call_args[0][1]
+        self.assertIn('0.250000   1.500000        1  handler', report)
+
+    def test_set_task_accounting_dump_signal(self):
+        self.loop.add_signal_handler = unittest.mock.Mock()
+        self.loop.remove_signal_handler = unittest.mock.Mock()
+        self.loop.set_task_accounting(True, dump_signal=10)
+        self.loop.add_signal_handler.assert_called_with(
+            10, self.loop.log_task_report)
+        self.loop.set_task_accounting(False)
+        self.loop.remove_signal_handler.assert_called_with(10)
+        self.assertIsNone(self.loop._task_accounting)
+
+    def test_call_soon_threadsafe_coalesces_wakeups(self):
+        self.loop._write_to_self = unittest.mock.Mock()
+        h1 = self.loop.call_soon_threadsafe(lambda: None)
+        h2 = self.loop.call_soon_threadsafe(lambda: None)
+        self.assertEqual([h1, h2], list(self.loop._ready))
+        self.assertEqual(1, self.loop._write_to_self.call_count)
+
+        # Draining the self-pipe clears the flag.
+        self.loop._wakeup_pending = False
+        self.loop.call_soon_threadsafe(lambda: None)
+        self.assertEqual(2, self.loop._write_to_self.call_count)
+
+    def test_call_soon_threadsafe_many(self):
+        def cb(*args):
+            pass
+
+        self.loop._write_to_self = unittest.mock.Mock()
+        handles = self.loop.call_soon_threadsafe_many(
+            [(cb, ()), (cb, (1, 2))])
+        self.assertEqual(handles, list(self.loop._ready))
+        self.assertEqual((1, 2), handles[1]._args)
+        self.assertEqual(1, self.loop._write_to_self.call_count)
+
+        self.assertEqual([], self.loop.call_soon_threadsafe_many([]))
+        self.assertEqual(1, self.loop._write_to_self.call_count)
+
     def test_call_later(self):
         def cb():
             pass
@@ -202,31 +372,87 @@ class BaseEventLoopTests(unittest.TestCase):
 
     @unittest.mock.patch('tulip.base_events.time')
     @unittest.mock.patch('tulip.base_events.tulip_log')
-    def test__run_once_logging(self, m_logging, m_time):
-        # Log to INFO level if timeout > 1.0 sec.
+    def test__run_once_no_hooks(self, m_logging, m_time):
+        # Without hooks, only the clock read for timers and no logging.
+        m_time.monotonic.return_value = 10.0
+        self.loop._process_events = unittest.mock.Mock()
+        self.loop._run_once()
+        self.assertEqual(1, m_time.monotonic.call_count)
+        self.assertFalse(m_logging.log.called)
+
+    @unittest.mock.patch('tulip.base_events.time')
+    def test__run_once_iteration_hook(self, m_time):
         idx = -1
-        data = [10.0, 10.0, 12.0, 13.0]
+        data = [10.0, 12.0, 13.0]
 
         def monotonic():
-            nonlocal data, idx
+            nonlocal idx
             idx += 1
             return data[idx]
 
         m_time.monotonic = monotonic
-        m_logging.INFO = logging.INFO
-        m_logging.DEBUG = logging.DEBUG
-
+        self.loop._selector.select.return_value = ['ev1', 'ev2']
+        self.loop._process_events = unittest.mock.Mock()
         self.loop._scheduled.append(
             events.TimerHandle(11.0, lambda: True, ()))
-        self.loop._process_events = unittest.mock.Mock()
-        self.loop._run_once()
-        self.assertEqual(logging.INFO, m_logging.log.call_args[0][0])
+        self.loop._scheduled.append(
+            events.TimerHandle(20.0, lambda: True, ()))
+        self.loop.call_soon(lambda: self.loop.call_soon(lambda: None))
 
-        idx = -1
-        data = [10.0, 10.0, 10.3, 13.0]
-        self.loop._scheduled = [events.TimerHandle(11.0, lambda:True, ())]
+        stats = []
+        self.loop.add_iteration_hook(stats.append)
         self.loop._run_once()
-        self.assertEqual(logging.DEBUG, m_logging.log.call_args[0][0])
+
+        self.assertEqual(
+            [base_events.IterationStats(poll_timeout=0, poll_time=2.0,
+                                        events=2, ran=2, ready=1, timers=1,
+                                        fds=1)],
+            stats)
+
+    @unittest.mock.patch('tulip.base_events.tulip_log')
+    def test_iteration_hook_exception(self, m_log):
+        self.loop._process_events = unittest.mock.Mock()
+        self.loop._selector.select.return_value = []
+        calls = []
+
+        def bad_hook(stats):
+            raise ValueError
+
+        self.loop.add_iteration_hook(bad_hook)
+        self.loop.add_iteration_hook(calls.append)
+        self.loop._run_once(0)
+        self.assertTrue(m_log.exception.called)
+        self.assertEqual(1, len(calls))
+
+    def test_iteration_hook_added_by_callback(self):
+        self.loop._process_events = unittest.mock.Mock()
+        self.loop._selector.select.return_value = []
+        stats = []
+        self.loop.call_soon(self.loop.add_iteration_hook, stats.append)
+        self.loop._run_once(0)
+        self.assertEqual([], stats)
+        self.loop._run_once(0)
+        self.assertEqual(1, len(stats))
+
+    def test_iteration_hook_skips_cancelled_timers(self):
+        self.loop._process_events = unittest.mock.Mock()
+        self.loop._selector.select.return_value = []
+        self.loop.call_later(10.0, lambda: True)
+        self.loop.call_later(20.0, lambda: True).cancel()
+        stats = []
+        self.loop.add_iteration_hook(stats.append)
+        self.loop._run_once(0)
+        self.assertEqual(1, stats[0].timers)
+
+    def test_remove_iteration_hook(self):
+        hook = unittest.mock.Mock()
+        self.loop.add_iteration_hook(hook)
+        self.assertTrue(self.loop.remove_iteration_hook(hook))
+        self.assertFalse(self.loop.remove_iteration_hook(hook))
+
+        self.loop._process_events = unittest.mock.Mock()
+        self.loop._run_once(0)
+        self.assertFalse(hook.called)
 
     def test__run_once_schedule_handle(self):
         handle = None
@@ -246,6 +472,176 @@ class BaseEventLoopTests(unittest.TestCase):
         self.assertTrue(processed)
         self.assertEqual([handle], list(self.loop._ready))
 
+    def test_timer_counts(self):
+        h1 = self.loop.call_later(10.0, lambda: True)
+        self.loop.call_later(20.0, lambda: True)
+        self.assertEqual((2, 0), self.loop.timer_counts())
+
+        h1.cancel()
+        h1.cancel()
+        self.assertEqual((1, 1), self.loop.timer_counts())
+
+    def test__run_once_pops_cancelled_head(self):
+        self.loop._process_events = unittest.mock.Mock()
+        h1 = self.loop.call_later(10.0, lambda: True)
+        h2 = self.loop.call_later(20.0, lambda: True)
+        h1.cancel()
+        self.loop._run_once()
+
+        self.assertEqual([h2], self.loop._scheduled)
+        self.assertFalse(h1._scheduled)
+        self.assertEqual((1, 0), self.loop.timer_counts())
+
+    def test__run_once_drops_cancelled_due_timers(self):
+        self.loop._process_events = unittest.mock.Mock()
+        now = self.loop.time()
+        h1 = self.loop.call_at(now - 2.0, lambda: True)
+        h2 = self.loop.call_at(now - 1.0, lambda: True)
+        h2.cancel()
+        self.loop._run_once()
+
+        self.assertFalse(self.loop._scheduled)
+        self.assertFalse(h2._scheduled)
+        self.assertEqual((0, 0), self.loop.timer_counts())
+
+    def test__run_once_compacts_cancelled_timers(self):
+        self.loop._process_events = unittest.mock.Mock()
+        n = base_events._MIN_SCHEDULED_TIMER_HANDLES * 2
+        handles = [self.loop.call_later(10.0 + i, lambda: True)
+                   for i in range(n)]
+        # Cancel the far end of the heap, so the head stays live.
+        for h in handles[n // 4:]:
+            h.cancel()
+        self.assertEqual((n // 4, n - n // 4), self.loop.timer_counts())
+
+        self.loop._run_once()
+        self.assertEqual(handles[:n // 4], sorted(self.loop._scheduled))
+        self.assertEqual((n // 4, 0), self.loop.timer_counts())
+        self.assertFalse(any(h._scheduled for h in handles[n // 4:]))
+
+    def test__run_once_no_compaction_below_threshold(self):
+        self.loop._process_events = unittest.mock.Mock()
+        handles = [self.loop.call_later(10.0 + i, lambda: True)
+                   for i in range(10)]
+        for h in handles[1:]:
+            h.cancel()
+
+        self.loop._run_once()
+        self.assertEqual(10, len(self.loop._scheduled))
+        self.assertEqual((1, 9), self.loop.timer_counts())
+
+    def test_call_later_timer_wheel(self):
+        wheel = timers.TimerWheel(0.1, min_delay=1.0)
+        self.loop.set_timer_wheel(wheel)
+
+        h1 = self.loop.call_later(0.5, lambda: True)
+        h2 = self.loop.call_later(10.0, lambda: True)
+        self.assertEqual([h1], self.loop._scheduled)
+        self.assertEqual(1, len(wheel))
+        self.assertNotIn(h2, self.loop._scheduled)
+
+    def test_set_timer_wheel_moves_timers(self):
+        wheel = timers.TimerWheel(0.1)
+        self.loop.set_timer_wheel(wheel)
+        h1 = self.loop.call_later(10.0, lambda: True)
+        h2 = self.loop.call_later(20.0, lambda: True)
+        h2.cancel()
+
+        self.loop.set_timer_wheel(None)
+        self.assertEqual([h1], self.loop._scheduled)
+        self.assertEqual(0, len(wheel))
+
+    def test__run_once_timer_wheel(self):
+        wheel = timers.TimerWheel(1.0, min_delay=1.0)
+        self.loop.set_timer_wheel(wheel)
+        self.loop._process_events = unittest.mock.Mock()
+
+        now = self.loop.time()
+        h = events.TimerHandle(now - 5.0, lambda: True, ())
+        wheel.insert(h, now - 10.0)
+        self.loop.call_later(10.0, lambda: True)
+        self.loop._run_once()
+
+        self.assertEqual((0,), self.loop._selector.select.call_args[0])
+        self.assertEqual(1, len(wheel))
+
+        self.loop._run_once()
+        t = self.loop._selector.select.call_args[0][0]
+        self.assertTrue(8.9 < t <= 11.0, t)
+
+    def test_timer_wheel_insert_after_advance(self):
+        loop = test_utils.TestLoop()
+        self.addCleanup(loop.close)
+        loop.set_timer_wheel(timers.TimerWheel(0.1, min_delay=1.0))
+        fired = []
+
+        loop.call_later(1.5, lambda: fired.append(loop.time()))
+        loop.call_later(0.3, loop.call_later, 5.0, lambda: None)
+        loop.call_later(6.0, loop.stop)
+        loop.run_forever()
+
+        self.assertEqual(1, len(fired))
+        self.assertTrue(1.5 <= fired[0] <= 1.6, fired[0])
+
+    @unittest.mock.patch('tulip.base_events.time')
+    @unittest.mock.patch('tulip.base_events.tulip_log')
+    def test_slow_callback(self, m_log, m_time):
+        m_time.monotonic.side_effect = [1.0, 10.0, 10.01, 20.0, 20.5]
+        self.loop._process_events = unittest.mock.Mock()
+        self.loop.set_slow_callback_duration(0.1)
+
+        def fast():
+            pass
+
+        def slow():
+            pass
+
+        self.loop.call_soon(fast)
+        self.loop.call_soon(slow)
+        self.loop._run_once()
+
+        infos = self.loop.slow_callbacks()
+        self.assertEqual(1, len(infos))
+        self.assertEqual(0.5, infos[0].duration)
+        self.assertIsNone(infos[0].coroutine)
+        self.assertEqual('slow', infos[0].frame[2])
+        self.assertIn('slow', infos[0].callback)
+        self.assertTrue(m_log.warning.called)
+
+    def test_slow_callback_task(self):
+        self.loop._process_events = unittest.mock.Mock()
+        self.loop.set_slow_callback_duration(0)
+        fut = futures.Future()
+
+        @tasks.coroutine
+        def sleeper():
+            yield from fut
+
+        task = tasks.Task(sleeper())
+        self.loop._run_once()
+
+        info, = self.loop.slow_callbacks()
+        self.assertTrue(info.coroutine.endswith('sleeper'))
+        self.assertEqual('sleeper', info.frame[2])
+        self.assertIn('Task', info.callback)
+
+        task.cancel()
+        fut.cancel()
+
+    def test_slow_callbacks_ring_buffer(self):
+        self.loop._process_events = unittest.mock.Mock()
+        self.assertEqual([], self.loop.slow_callbacks())
+        self.loop.set_slow_callback_duration(0, history=3)
+        for i in range(5):
+            self.loop.call_soon(lambda: None)
+        self.loop._run_once()
+        infos = self.loop.slow_callbacks()
+        self.assertEqual(3, len(infos))
+        self.assertEqual(sorted(infos, reverse=True), infos)
+
+        self.loop.set_slow_callback_duration(None)
+        self.assertEqual([], self.loop.slow_callbacks())
+
     def test_run_until_complete_type_error(self):
         self.assertRaises(
             TypeError, self.loop.run_until_complete, 'blah')
@@ -316,6 +712,117 @@ class BaseEventLoopWithSelectorTests(unittest.TestCase):
     def tearDown(self):
         self.loop.close()
 
+    def _read_all(self, results):
+        batches = []
+
+        @tasks.coroutine
+        def read_all():
+            while True:
+                batch = yield from results.read()
+                if batch is None:
+                    return batches
+                batches.append(batch)
+
+        return self.loop.run_until_complete(read_all(), timeout=10)
+
+    def test_map_in_executor(self):
+        results = self.loop.map_in_executor(
+            None, lambda x: x * x, range(10), chunksize=3, max_pending=2)
+        batches = self._read_all(results)
+        self.assertEqual([[0, 1, 4], [9, 16, 25], [36, 49, 64], [81]],
+                         batches)
+        self.assertIsNone(self.loop.run_until_complete(results.read()))
+
+    def test_map_in_executor_unordered(self):
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            results = self.loop.map_in_executor(
+                executor, str, range(100), chunksize=7, ordered=False)
+            batches = self._read_all(results)
+        self.assertEqual(15, len(batches))
+        self.assertEqual(sorted(str(i) for i in range(100)),
+                         sorted(itertools.chain(*batches)))
+
+    def test_map_in_executor_exception(self):
+        def fn(x):
+            if x == 5:
+                raise ValueError(x)
+            return x
+
+        results = self.loop.map_in_executor(None, fn, range(10), chunksize=4)
+        self.assertEqual([0, 1, 2, 3],
+                         self.loop.run_until_complete(results.read()))
+        self.assertRaises(
+            ValueError, self.loop.run_until_complete, results.read())
+        self.assertEqual([8, 9],
+                         self.loop.run_until_complete(results.read()))
+
+    def test_map_in_executor_backpressure(self):
+        executor = unittest.mock.Mock()
+        executor.submit.side_effect = lambda *args: concurrent.futures.Future()
+        items = iter(range(100))
+        results = self.loop.map_in_executor(
+            executor, str, items, chunksize=10, max_pending=3)
+        self.assertEqual(3, executor.submit.call_count)
+        self.assertEqual(30, next(items))
+
+        results.cancel()
+        self.assertTrue(all(job.cancelled() for job in results._jobs))
+
+    def test_map_in_executor_cancel(self):
+        executor = unittest.mock.Mock()
+        executor.submit.side_effect = lambda *args: concurrent.futures.Future()
+        results = self.loop.map_in_executor(
+            executor, str, range(100), chunksize=10, max_pending=3)
+        results.cancel()
+        self.assertRaises(
+            futures.CancelledError, self.loop.run_until_complete,
+            results.read(), timeout=10)
+
+    def test_map_in_executor_errors(self):
+        self.assertRaises(ValueError, self.loop.map_in_executor,
+                          None, str, [], chunksize=0)
+        self.assertRaises(ValueError, self.loop.map_in_executor,
+                          None, str, [], max_pending=0)
+
+    def test_run_in_process(self):
+        f = self.loop.run_in_process(pow, 2, 10)
+        self.assertEqual(1024, self.loop.run_until_complete(f, timeout=30))
+        self.assertIsNotNone(self.loop._process_pool)
+
+    def test_run_in_process_exception(self):
+        f = self.loop.run_in_process(int, 'x')
+        self.assertRaises(
+            ValueError, self.loop.run_until_complete, f, timeout=30)
+
+    def test_run_in_process_unpicklable_args(self):
+        f = self.loop.run_in_process(lambda: None)
+        self.assertTrue(f.done())
+        self.assertIsInstance(f.exception(), pickle.PicklingError)
+        self.assertIsNone(self.loop._process_pool)
+
+    def test_run_in_process_unpicklable_result(self):
+        f = self.loop.run_in_process(threading.Lock)
+        self.assertRaises(
+            pickle.PicklingError, self.loop.run_until_complete, f, timeout=30)
+        # The pool survives.
+        f = self.loop.run_in_process(abs, -1)
+        self.assertEqual(1, self.loop.run_until_complete(f, timeout=30))
+
+    def test_start_process_pool(self):
+        pids = self.loop.run_until_complete(
+            self.loop.start_process_pool(2), timeout=30)
+        self.assertTrue(pids)
+        self.assertNotIn(os.getpid(), pids)
+        self.assertEqual(2, self.loop._process_pool_size)
+
+    def test_close_shuts_down_process_pool(self):
+        pool = self.loop._get_process_pool(1)
+        with unittest.mock.patch.object(pool, 'shutdown') as m_shutdown:
+            self.loop.close()
+        m_shutdown.assert_called_with(wait=False)
+        self.assertIsNone(self.loop._process_pool)
+        pool.shutdown()
+
     @unittest.mock.patch('tulip.base_events.socket')
     def test_create_connection_mutiple_errors(self, m_socket):
 
@@ -348,6 +855,110 @@ class BaseEventLoopWithSelectorTests(unittest.TestCase):
         exc = task.exception()
         self.assertEqual("Multiple exceptions: err1, err2", str(exc))
 
+    def _mock_connect(self, m_socket, infos, results):
+        # results maps addresses to what sock_connect() does for them:
+        # None never connects, an exception fails, True connects.
+        m_socket.error = socket.error
+        m_socket.timeout = socket.timeout
+        m_socket.socket.side_effect = lambda **kw: unittest.mock.Mock()
+
+        @tasks.task
+        def getaddrinfo(*args, **kw):
+            return infos
+        self.loop.getaddrinfo = getaddrinfo
+
+        def sock_connect(sock, address):
+            sock.address = address
+            fut = futures.Future(loop=self.loop)
+            result = results[address]
+            if isinstance(result, Exception):
+                fut.set_exception(result)
+            elif result:
+                fut.set_result(None)
+            return fut
+        self.loop.sock_connect = unittest.mock.Mock(side_effect=sock_connect)
+
+        def make_transport(sock, waiter):
+            waiter.set_result(None)
+            return sock
+        self.loop._make_socket_transport = make_transport
+
+    @unittest.mock.patch('tulip.base_events.socket')
+    def test_create_connection_happy_eyeballs(self, m_socket):
+        infos = [(socket.AF_INET6, 1, 6, '', ('::1', 80, 0, 0)),
+                 (socket.AF_INET6, 1, 6, '', ('::2', 80, 0, 0)),
+                 (socket.AF_INET, 1, 6, '', ('127.0.0.1', 80))]
+        self._mock_connect(m_socket, infos, {
+            ('::1', 80, 0, 0): None,
+            ('::2', 80, 0, 0): None,
+            ('127.0.0.1', 80): True})
+
+        coro = self.loop.create_connection(
+            'example.com', 80, happy_eyeballs_delay=0.01)
+        sock = self.loop.run_until_complete(coro, timeout=10)
+        self.assertEqual(('127.0.0.1', 80), sock.address)
+        self.assertFalse(sock.close.called)
+        # The IPv6 attempt was cancelled and the second one never started.
+        self.assertEqual(2, self.loop.sock_connect.call_count)
+        self.loop.run_until_complete(tasks.sleep(0))
+        loser = self.loop.sock_connect.call_args_list[0][0][0]
+        self.assertTrue(loser.close.called)
+
+    @unittest.mock.patch('tulip.base_events.socket')
+    def test_create_connection_happy_eyeballs_fail_fast(self, m_socket):
+        infos = [(socket.AF_INET6, 1, 6, '', ('::1', 80, 0, 0)),
+                 (socket.AF_INET, 1, 6, '', ('127.0.0.1', 80))]
+        self._mock_connect(m_socket, infos, {
+            ('::1', 80, 0, 0): socket.error('unreachable'),
+            ('127.0.0.1', 80): True})
+
+        # A failed attempt starts the next one without waiting.
+        coro = self.loop.create_connection(
+            'example.com', 80, happy_eyeballs_delay=60)
+        sock = self.loop.run_until_complete(coro, timeout=10)
+        self.assertEqual(('127.0.0.1', 80), sock.address)
+
+    @unittest.mock.patch('tulip.base_events.socket')
+    def test_create_connection_happy_eyeballs_all_fail(self, m_socket):
+        infos = [(socket.AF_INET6, 1, 6, '', ('::1', 80, 0, 0)),
+                 (socket.AF_INET, 1, 6, '', ('127.0.0.1', 80))]
+        self._mock_connect(m_socket, infos, {
+            ('::1', 80, 0, 0): socket.error('err1'),
+            ('127.0.0.1', 80): None})
+
+        coro = self.loop.create_connection(
+            'example.com', 80, happy_eyeballs_delay=0.01,
+            connect_timeout=0.01)
+        with self.assertRaises(socket.error) as cm:
+            self.loop.run_until_complete(coro, timeout=10)
+        self.assertEqual(
+            "Multiple exceptions: err1, "
+            "timed out connecting to ('127.0.0.1', 80)", str(cm.exception))
+
+    @unittest.mock.patch('tulip.base_events.socket')
+    def test_create_connection_connect_timeout(self, m_socket):
+        infos = [(socket.AF_INET, 1, 6, '', ('127.0.0.1', 80))]
+        self._mock_connect(m_socket, infos, {('127.0.0.1', 80): None})
+
+        coro = self.loop.create_connection(
+            'example.com', 80, connect_timeout=0.01)
+        self.assertRaises(
+            socket.timeout, self.loop.run_until_complete, coro, timeout=10)
+        sock = self.loop.sock_connect.call_args[0][0]
+        self.assertTrue(sock.close.called)
+
+    def test_interleave_addrinfos(self):
+        v4a = (socket.AF_INET, 1, 6, '', ('10.0.0.1', 80))
+        v4b = (socket.AF_INET, 1, 6, '', ('10.0.0.2', 80))
+        v6a = (socket.AF_INET6, 1, 6, '', ('::1', 80, 0, 0))
+        v6b = (socket.AF_INET6, 1, 6, '', ('::2', 80, 0, 0))
+        self.assertEqual(
+            [v6a, v4a, v6b, v4b],
+            base_events._interleave_addrinfos([v6a, v6b, v4a, v4b]))
+        self.assertEqual(
+            [v4a, v6a, v4b],
+            base_events._interleave_addrinfos([v4a, v4b, v6a]))
+
     def test_create_connection_host_port_sock(self):
         coro = self.loop.create_connection('example.com', 80, sock=object())
         self.assertRaises(ValueError, self.loop.run_until_complete, coro)
@@ -484,10 +1095,11 @@ class BaseEventLoopWithSelectorTests(unittest.TestCase):
         self.assertRaises(OSError, self.loop.run_until_complete, fut)
         self.assertTrue(m_sock.close.called)
 
+    @unittest.mock.patch('tulip.resolver.socket.getaddrinfo')
     @unittest.mock.patch('tulip.base_events.socket')
-    def test_create_datagram_endpoint_no_addrinfo(self, m_socket):
+    def test_create_datagram_endpoint_no_addrinfo(self, m_socket, m_gai):
         m_socket.error = socket.error
-        m_socket.getaddrinfo.return_value = []
+        m_gai.return_value = []
 
         coro = self.loop.create_datagram_endpoint(
             local_addr=('localhost', 0))
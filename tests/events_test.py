@@ -545,6 +545,40 @@ class EventLoopTestsMixin:
         # close start_serving socks
         self.loop.stop_serving(sock)
 
+    def test_start_serving_max_connections(self):
+        protos = []
+
+        def connection_handler(transport):
+            protos.append(MyProto(transport))
+
+        f = self.loop.start_serving(
+            connection_handler, '127.0.0.1', 0, max_connections=1)
+        sock = self.loop.run_until_complete(f)[0]
+        port = sock.getsockname()[1]
+        clients = [socket.socket(), socket.socket()]
+        for client in clients:
+            client.connect(('127.0.0.1', port))
+        for _ in range(3):
+            test_utils.run_briefly(self.loop)
+        self.assertEqual(1, len(protos))
+
+        # Closing the connection lets the next one in.
+        protos[0].transport.close()
+        for _ in range(3):
+            test_utils.run_briefly(self.loop)
+        self.assertEqual(2, len(protos))
+
+        protos[1].transport.close()
+        test_utils.run_briefly(self.loop)
+        for client in clients:
+            client.close()
+        self.loop.stop_serving(sock)
+
+    def test_start_serving_max_connections_error(self):
+        f = self.loop.start_serving(
+            lambda transport: None, '127.0.0.1', 0, max_connections=0)
+        self.assertRaises(ValueError, self.loop.run_until_complete, f)
+
     @unittest.skipIf(ssl is None, 'No ssl module')
     def test_start_serving_ssl(self):
         proto = None
@@ -883,6 +917,10 @@ if sys.platform == 'win32':
         def test_create_datagram_endpoint(self):
             raise unittest.SkipTest(
                 "IocpEventLoop does not have create_datagram_endpoint()")
+
+        def test_start_serving_max_connections(self):
+            raise unittest.SkipTest(
+                "IocpEventLoop does not support max_connections")
 else:
     from tulip import selectors
     from tulip import unix_events
@@ -900,6 +938,12 @@ else:
             def create_event_loop(self):
                 return unix_events.SelectorEventLoop(selectors.EpollSelector())
 
+        class EdgeEPollEventLoopTests(EventLoopTestsMixin, unittest.TestCase):
+
+            def create_event_loop(self):
+                return unix_events.SelectorEventLoop(
+                    selectors.EpollSelector(), edge_triggered=True)
+
     if hasattr(selectors, 'PollSelector'):
         class PollEventLoopTests(EventLoopTestsMixin, unittest.TestCase):
 
@@ -987,6 +1031,18 @@ class TimerTests(unittest.TestCase):
         self.assertRaises(AssertionError,
                           events.TimerHandle, None, callback, args)
 
+    def test_timer_cancel_notifies_loop(self):
+        loop = unittest.mock.Mock()
+        h = events.TimerHandle(time.monotonic(), lambda: False, (), loop)
+        h.cancel()
+        self.assertFalse(loop._timer_handle_cancelled.called)
+
+        h = events.TimerHandle(time.monotonic(), lambda: False, (), loop)
+        h._scheduled = True
+        h.cancel()
+        h.cancel()
+        loop._timer_handle_cancelled.assert_called_once_with(h)
+
     def test_timer_comparison(self):
         def callback(*args):
             return args
@@ -29,6 +29,10 @@ class HttpMessageTests(unittest.TestCase):
         self.assertTrue(msg.closing)
         self.assertEqual(msg.status_line, 'HTTP/1.1 200 OK\r\n')
 
+    def test_drain(self):
+        msg = protocol.Response(self.transport, 200)
+        self.assertIs(msg.drain(), self.transport.drain.return_value)
+
     def test_force_close(self):
         msg = protocol.Response(self.transport, 200)
         self.assertFalse(msg.closing)
@@ -36,6 +36,19 @@ class HttpServerProtocolTests(unittest.TestCase):
         content = b''.join([c[1][0] for c in list(transport.write.mock_calls)])
         self.assertTrue(content.startswith(b'HTTP/1.1 404 Not Found\r\n'))
 
+    def test_get_buffer(self):
+        srv = server.ServerHttpProtocol(unittest.mock.Mock())
+        srv.stream = unittest.mock.Mock()
+        self.assertIs(srv.get_buffer(10), srv.stream.get_buffer.return_value)
+        srv.stream.get_buffer.assert_called_with(10)
+        srv.buffer_updated(5)
+        srv.stream.buffer_updated.assert_called_with(5)
+
+    def test_stream_transport(self):
+        transport = unittest.mock.Mock()
+        srv = server.ServerHttpProtocol(transport)
+        self.assertIs(srv.stream._transport, transport)
+
     def test_constructs_with_connection(self):
         srv = server.ServerHttpProtocol(unittest.mock.Mock())
         self.assertIsNotNone(srv._request_handler)
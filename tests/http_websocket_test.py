@@ -315,6 +315,10 @@ class WebsocketWriterTests(unittest.TestCase):
         self.transport = unittest.mock.Mock()
         self.writer = websocket.WebSocketWriter(self.transport)
 
+    def test_drain(self):
+        self.assertIs(
+            self.writer.drain(), self.transport.drain.return_value)
+
     def test_pong(self):
         self.writer.pong()
         self.transport.write.assert_called_with(b'\x8a\x00')
@@ -0,0 +1,181 @@
+"""Tests for loopgroup.py."""
+
+import queue
+import socket
+import unittest
+import unittest.mock
+
+from tulip import events
+from tulip import futures
+from tulip import loopgroup
+from tulip import protocols
+from tulip import tasks
+
+
+class EchoProto(protocols.Protocol):
+
+    def __init__(self, transport, connections):
+        self.transport = transport
+        transport.register_protocol(self)
+        connections.put(events.get_event_loop())
+
+    def data_received(self, data):
+        self.transport.write(data)
+
+    def eof_received(self):
+        self.transport.close()
+
+
+class LoopGroupTests(unittest.TestCase):
+
+    def setUp(self):
+        self.group = loopgroup.LoopGroup(2)
+        self.connections = queue.Queue()
+        self.clients = []
+
+    def tearDown(self):
+        for client in self.clients:
+            client.close()
+        if self.group.loops:
+            self.group.stop()
+
+    def handler(self, transport):
+        EchoProto(transport, self.connections)
+
+    def connect(self, sock):
+        client = socket.create_connection(sock.getsockname()[:2], timeout=10)
+        self.clients.append(client)
+        client.sendall(b'ping')
+        self.assertEqual(b'ping', client.recv(4))
+        return self.connections.get(timeout=10)
+
+    def test_ctor(self):
+        self.assertRaises(ValueError, loopgroup.LoopGroup, 0)
+        with unittest.mock.patch('tulip.loopgroup.multiprocessing') as m:
+            m.cpu_count.return_value = 3
+            self.assertEqual(3, len(loopgroup.LoopGroup()))
+            m.cpu_count.side_effect = NotImplementedError
+            self.assertEqual(1, loopgroup.default_size())
+        self.assertEqual('LoopGroup<size=2, running=False>', repr(self.group))
+
+    def test_start_stop(self):
+        self.group.start()
+        self.assertRaises(RuntimeError, self.group.start)
+        loops = self.group.loops
+        self.assertEqual(2, len(loops))
+        self.assertTrue(all(loop.is_running() for loop in loops))
+        self.assertEqual('LoopGroup<size=2, running=True>', repr(self.group))
+
+        self.group.stop()
+        self.assertEqual([], self.group.loops)
+        self.assertFalse(any(loop.is_running() for loop in loops))
+
+    def test_context_manager(self):
+        with self.group as group:
+            self.assertIs(self.group, group)
+            self.assertEqual(2, len(group.loops))
+        self.assertEqual([], self.group.loops)
+
+    def test_submit(self):
+        self.group.start()
+        loop = self.group.loops[1]
+        f = self.group.submit(1, events.get_event_loop)
+        self.assertIs(loop, f.result(10))
+
+        f = self.group.submit(loop, int, 'x')
+        self.assertRaises(ValueError, f.result, 10)
+
+    def test_submit_coroutine(self):
+        self.group.start()
+        loop = self.group.loops[0]
+
+        @tasks.coroutine
+        def coro():
+            yield from tasks.sleep(0.01, loop=loop)
+            return events.get_event_loop()
+
+        f = self.group.submit(loop, coro)
+        self.assertIs(loop, f.result(10))
+
+    def test_submit_between_loops(self):
+        self.group.start()
+        first, second = self.group.loops
+
+        @tasks.coroutine
+        def ask_second():
+            f = self.group.submit(second, events.get_event_loop)
+            result = yield from futures.wrap_future(f, loop=first)
+            return result
+
+        f = self.group.submit(first, ask_second)
+        self.assertIs(second, f.result(10))
+
+    def test_start_serving_not_running(self):
+        self.assertRaises(
+            RuntimeError, self.group.start_serving, self.handler,
+            '127.0.0.1', 0)
+
+    def test_start_serving_invalid_distribute(self):
+        self.group.start()
+        self.assertRaises(
+            ValueError, self.group.start_serving, self.handler,
+            '127.0.0.1', 0, distribute='random')
+
+    def test_round_robin(self):
+        self.group.start()
+        sock, = self.group.start_serving(self.handler, '127.0.0.1', 0)
+        seen = [self.connect(sock) for _ in range(4)]
+        loops = self.group.loops
+        self.assertEqual(loops + loops, seen)
+
+    def test_least_loaded(self):
+        self.group.start()
+        sock, = self.group.start_serving(
+            self.handler, '127.0.0.1', 0, distribute=loopgroup.LEAST_LOADED)
+        first, second = self.group.loops
+        self.assertEqual(first, self.connect(sock))
+        self.assertEqual(second, self.connect(sock))
+        self.assertEqual([1, 1], self.group.loads())
+
+        # Close the connection of the first loop; it gets the next one.
+        self.clients.pop(0).close()
+        for _ in range(100):
+            if self.group.loads() == [0, 1]:
+                break
+            self.group.submit(first, tasks.sleep, 0.01).result(10)
+        self.assertEqual([0, 1], self.group.loads())
+        self.assertEqual(first, self.connect(sock))
+
+    @unittest.skipUnless(hasattr(socket, 'SO_REUSEPORT'), 'no SO_REUSEPORT')
+    def test_reuse_port(self):
+        self.group.start()
+        socks = self.group.start_serving(
+            self.handler, '127.0.0.1', 0, distribute=loopgroup.REUSE_PORT)
+        self.assertEqual(2, len(socks))
+        self.assertEqual(socks[0].getsockname(), socks[1].getsockname())
+        self.assertIn(self.connect(socks[0]), self.group.loops)
+
+    @unittest.mock.patch('tulip.loopgroup.socket.getaddrinfo')
+    def test_bind_sockets_one_port(self, m_getaddrinfo):
+        m_getaddrinfo.return_value = [
+            (socket.AF_INET, socket.SOCK_STREAM, 6, '', (host, 0))
+            for host in ('127.0.0.1', '127.0.0.2')]
+        socks = loopgroup.bind_sockets('localhost', 0)
+        try:
+            self.assertEqual(2, len(socks))
+            port = socks[0].getsockname()[1]
+            self.assertNotEqual(0, port)
+            self.assertEqual(('127.0.0.2', port), socks[1].getsockname())
+        finally:
+            for sock in socks:
+                sock.close()
+
+    def test_stop_closes_listeners(self):
+        self.group.start()
+        sock, = self.group.start_serving(self.handler, '127.0.0.1', 0)
+        self.group.stop()
+        self.assertEqual(-1, sock.fileno())
+
+
+if __name__ == '__main__':
+    unittest.main()
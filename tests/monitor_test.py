@@ -0,0 +1,122 @@
+"""Tests for monitor.py."""
+
+import unittest
+import unittest.mock
+
+from tulip import events
+from tulip import monitor
+from tulip import tasks
+from tulip import test_utils
+from tulip import timers
+
+
+class HistogramTests(unittest.TestCase):
+
+    def test_ctor(self):
+        self.assertRaises(ValueError, monitor.Histogram, [2, 1])
+
+    def test_empty(self):
+        h = monitor.Histogram([1, 2])
+        self.assertEqual(0, h.count)
+        self.assertEqual(0.0, h.percentile(50))
+
+    def test_percentile(self):
+        h = monitor.Histogram([1, 2, 4, 8])
+        for value in [0.5] * 90 + [3] * 9 + [5]:
+            h.add(value)
+        self.assertEqual(100, h.count)
+        self.assertEqual(5, h.max)
+        self.assertEqual(1, h.percentile(50))
+        self.assertEqual(4, h.percentile(99))
+        # Capped by the largest value.
+        self.assertEqual(5, h.percentile(100))
+
+    def test_overflow(self):
+        h = monitor.Histogram([1])
+        h.add(10)
+        self.assertEqual(10, h.percentile(50))
+
+    def test_reset(self):
+        h = monitor.Histogram([1])
+        h.add(0.5)
+        h.reset()
+        self.assertEqual((0, 0.0), (h.count, h.max))
+
+
+class LagMonitorTests(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = test_utils.TestLoop()
+        events.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+        events.set_event_loop(None)
+
+    def block(self, seconds):
+        # A callback that keeps the loop busy for a while.
+        self.loop.call_soon(self.loop.advance_time, seconds)
+
+    def test_ctor(self):
+        self.assertRaises(ValueError, monitor.LagMonitor, self.loop, 0)
+        self.assertRaises(ValueError, monitor.LagMonitor, self.loop,
+                          threshold=1)
+
+    def test_no_lag(self):
+        self.assertIsNone(self.loop.lag_stats())
+        self.loop.start_lag_monitor(0.1)
+        self.loop.run_until_complete(tasks.sleep(1.05, loop=self.loop))
+        self.assertEqual((10, 0.0, 0.0, 0.0), self.loop.lag_stats())
+
+    def test_lag(self):
+        lags = []
+        self.loop.start_lag_monitor(1.0, threshold=0.2, on_lag=lags.append)
+        self.loop.call_later(0.5, self.block, 0.75)
+        self.loop.call_later(2.5, self.block, 0.1)
+        self.loop.run_until_complete(tasks.sleep(4.5, loop=self.loop))
+
+        stats = self.loop.lag_stats()
+        self.assertEqual(4, stats.count)
+        self.assertEqual(0.25, stats.max)
+        self.assertLessEqual(stats.p50, 0.0002)
+        self.assertEqual(0.25, stats.p99)
+        self.assertEqual([0.25], lags)
+
+    def test_stop(self):
+        self.loop.start_lag_monitor(0.1)
+        self.loop.run_until_complete(tasks.sleep(0.25, loop=self.loop))
+        self.loop.stop_lag_monitor()
+        self.loop.stop_lag_monitor()
+        self.loop.run_until_complete(tasks.sleep(1, loop=self.loop))
+        self.assertEqual(2, self.loop.lag_stats().count)
+        self.assertEqual((0, 0), self.loop.timer_counts())
+
+    def test_restart(self):
+        first = self.loop.start_lag_monitor(0.1)
+        second = self.loop.start_lag_monitor(0.1)
+        self.assertIsNot(first, second)
+        self.loop.run_until_complete(tasks.sleep(0.15, loop=self.loop))
+        self.assertEqual(0, first.stats().count)
+        self.assertEqual(1, second.stats().count)
+
+    @unittest.mock.patch('tulip.monitor.tulip_log')
+    def test_on_lag_error(self, m_log):
+        on_lag = unittest.mock.Mock(side_effect=ValueError)
+        self.loop.start_lag_monitor(1.0, threshold=0.1, on_lag=on_lag)
+        self.block(1.5)
+        self.loop.run_until_complete(tasks.sleep(2.5, loop=self.loop))
+        self.assertTrue(m_log.exception.called)
+        self.assertEqual(3, self.loop.lag_stats().count)
+
+    def test_timer_wheel_bypassed(self):
+        self.loop.set_timer_wheel(
+            timers.TimerWheel(resolution=1.0, min_delay=0))
+        self.loop.start_lag_monitor(0.1)
+        # This sleep is on the wheel; it lasts up to a second.
+        self.loop.run_until_complete(tasks.sleep(0.15, loop=self.loop))
+        self.assertGreater(self.loop.lag_stats().count, 1)
+        self.assertEqual(0.0, self.loop.lag_stats().max)
+
+
+if __name__ == '__main__':
+    unittest.main()
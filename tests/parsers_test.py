@@ -5,6 +5,7 @@ import unittest.mock
 
 from tulip import events
 from tulip import parsers
+from tulip import protocols
 from tulip import tasks
 
 
@@ -313,6 +314,110 @@ class StreamBufferTests(unittest.TestCase):
         stream.unset_parser()
         self.assertTrue(s._eof)
 
+    def test_buffer_updated(self):
+        stream = parsers.StreamBuffer()
+        buf = stream.get_buffer(16)
+        self.assertEqual(16, len(buf))
+        buf[:5] = b'line1'
+        del buf
+        stream.buffer_updated(5)
+        self.assertEqual(b'line1', bytes(stream._buffer))
+
+        s = stream.set_parser(parsers.lines_parser())
+        buf = stream.get_buffer(16)
+        buf[:6] = b'\nline2'
+        del buf
+        stream.buffer_updated(6)
+        self.assertEqual([bytearray(b'line1\n')], list(s._buffer))
+
+        buf = stream.get_buffer(16)
+        buf[:1] = b'\n'
+        del buf
+        stream.buffer_updated(1)
+        self.assertEqual([bytearray(b'line1\n'), bytearray(b'line2\n')],
+                         list(s._buffer))
+
+    def test_buffer_updated_parser_exc(self):
+        def p():
+            out, buf = yield
+            yield from buf.read(1)
+            raise ValueError()
+
+        stream = parsers.StreamBuffer()
+        s = stream.set_parser(p())
+        stream.get_buffer(1)[0] = 1
+        stream.buffer_updated(1)
+        self.assertIsInstance(s.exception(), ValueError)
+        self.assertIsNone(stream._parser)
+
+    def test_get_buffer_max_size(self):
+        stream = parsers.StreamBuffer()
+        self.assertEqual(parsers._MAX_BUFFER_SIZE,
+                         len(stream.get_buffer(1024*1024)))
+
+    def test_get_buffer_shared(self):
+        parsers._slabs.slab = None
+        stream1 = parsers.StreamBuffer()
+        stream2 = parsers.StreamBuffer()
+        buf = stream1.get_buffer(10)
+        self.assertIs(buf.obj, stream2.get_buffer(5).obj)
+        self.assertIsNot(buf.obj, stream2.get_buffer(1024).obj)
+
+    def test_pause_no_parser(self):
+        tr = unittest.mock.Mock()
+        stream = parsers.StreamBuffer(limit=4)
+        stream.set_transport(tr)
+
+        stream.feed_data(b'1234')
+        stream.feed_data(b'5678')
+        self.assertFalse(tr.pause.called)
+        stream.feed_data(b'9')
+        tr.pause.assert_called_with()
+
+        s = stream.set_parser(parsers.chunks_parser(2))
+        self.assertEqual(8, s._size)
+        self.assertFalse(tr.resume.called)
+        self.loop.run_until_complete(s.read())
+        self.loop.run_until_complete(s.read())
+        tr.resume.assert_called_with()
+
+    def test_pause_parser_output(self):
+        tr = unittest.mock.Mock()
+        stream = parsers.StreamBuffer(limit=4)
+        stream.set_transport(tr)
+        s = stream.set_parser(parsers.chunks_parser(3))
+
+        stream.feed_data(b'12345678')
+        self.assertFalse(tr.pause.called)
+        stream.feed_data(b'9')
+        tr.pause.assert_called_with()
+
+        self.loop.run_until_complete(s.read())
+        self.assertFalse(tr.resume.called)
+        self.loop.run_until_complete(s.read())
+        tr.resume.assert_called_with()
+
+    def test_pause_not_implemented(self):
+        tr = unittest.mock.Mock()
+        tr.pause.side_effect = NotImplementedError
+        stream = parsers.StreamBuffer(limit=1)
+        stream.set_transport(tr)
+
+        stream.feed_data(b'123')
+        stream.feed_data(b'456')
+        self.assertEqual(1, tr.pause.call_count)
+        self.assertIsNone(stream._transport)
+
+    def test_pause_feed_eof(self):
+        tr = unittest.mock.Mock()
+        stream = parsers.StreamBuffer(limit=1)
+        stream.set_transport(tr)
+        stream.feed_data(b'123')
+        stream.feed_eof()
+
+        stream.set_parser(parsers.chunks_parser(1))
+        self.assertFalse(tr.resume.called)
+
 
 class DataBufferTests(unittest.TestCase):
 
@@ -400,9 +505,28 @@ class DataBufferTests(unittest.TestCase):
 
         self.assertRaises(ValueError, t1.result)
 
+    def test_size(self):
+        buffer = parsers.DataBuffer()
+        buffer.feed_data(b'data')
+        buffer.feed_data(object())
+        buffer.feed_data(bytearray(b'more'))
+        self.assertEqual(8, buffer._size)
+
+        self.loop.run_until_complete(buffer.read())
+        self.loop.run_until_complete(buffer.read())
+        self.assertEqual(4, buffer._size)
+
 
 class StreamProtocolTests(unittest.TestCase):
 
+    def test_ctor(self):
+        tr = unittest.mock.Mock()
+        proto = parsers.StreamProtocol(tr, limit=10)
+        tr.register_protocol.assert_called_with(proto)
+        self.assertIsInstance(proto, protocols.BufferedProtocol)
+        self.assertIs(proto._transport, tr)
+        self.assertEqual(10, proto._limit)
+
     def test_connection_lost(self):
         tr = unittest.mock.Mock()
         proto = parsers.StreamProtocol(tr)
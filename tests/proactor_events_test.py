@@ -323,8 +323,10 @@ class BaseProactorEventLoopTests(unittest.TestCase):
 
     def test_loop_self_reading_fut(self):
         fut = unittest.mock.Mock()
+        self.loop._wakeup_pending = True
         self.loop._loop_self_reading(fut)
         self.assertTrue(fut.result.called)
+        self.assertFalse(self.loop._wakeup_pending)
         self.proactor.recv.assert_called_with(self.ssock, 4096)
         self.proactor.recv.return_value.add_done_callback.assert_called_with(
             self.loop._loop_self_reading)
@@ -0,0 +1,121 @@
+"""Tests for profiler.py."""
+
+import io
+import os
+import signal
+import tempfile
+import threading
+import time
+import unittest
+import unittest.mock
+
+from tulip import events
+from tulip import profiler
+from tulip import tasks
+
+
+def spin(duration):
+    t0 = time.monotonic()
+    while time.monotonic() - t0 < duration:
+        pass
+
+
+class ProfilerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = events.new_event_loop()
+        events.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_ctor(self):
+        self.assertRaises(ValueError, profiler.Profiler, interval=0)
+
+    @unittest.skipUnless(hasattr(signal, 'setitimer'), 'no setitimer')
+    def test_sigprof(self):
+        @tasks.coroutine
+        def busy():
+            for _ in range(5):
+                spin(0.01)
+                yield from tasks.sleep(0, loop=self.loop)
+
+        old_handler = signal.getsignal(signal.SIGPROF)
+        with profiler.Profiler(interval=0.001) as prof:
+            self.assertRaises(RuntimeError, prof.start)
+            self.loop.run_until_complete(busy())
+        self.assertIs(old_handler, signal.getsignal(signal.SIGPROF))
+
+        stacks = [stack for stack in prof.samples()
+                  if stack[0] == profiler.TASK]
+        self.assertTrue(stacks)
+        self.assertTrue(any(stack[1].startswith('busy ') and
+                            stack[-1].startswith('spin ')
+                            for stack in stacks), stacks)
+
+        prof.clear()
+        self.assertEqual('', prof.collapsed())
+
+    def test_thread(self):
+        self.loop.call_soon(time.sleep, 0.1)
+        self.loop.call_soon(self.loop.stop)
+        with profiler.Profiler(interval=0.005, use_signal=False) as prof:
+            self.loop.run_forever()
+        self.assertIn(profiler.CALLBACK, [stack[0]
+                                          for stack in prof.samples()])
+
+    def test_signal_not_main_thread(self):
+        prof = profiler.Profiler(use_signal=True)
+        errors = []
+
+        def start():
+            try:
+                prof.start()
+            except RuntimeError as exc:
+                errors.append(exc)
+
+        thread = threading.Thread(target=start)
+        thread.start()
+        thread.join()
+        self.assertEqual(1, len(errors))
+
+    def test_stack(self):
+        prof = profiler.Profiler()
+
+        def frame(code, back=None):
+            return unittest.mock.Mock(f_code=code, f_back=back)
+
+        def code(name):
+            return unittest.mock.Mock(co_name=name, co_filename='/x/mod.py',
+                                      co_firstlineno=1)
+
+        outer, inner = code('outer'), code('inner')
+        root = frame(profiler._TASK_CODE, frame(profiler._LOOP_CODE))
+        stack = prof._stack(frame(inner, frame(outer, root)))
+        self.assertEqual((profiler.TASK, outer, inner), stack)
+        self.assertIsNone(prof._stack(frame(inner)))
+
+        prof._samples[stack] += 2
+        self.assertEqual('[task];outer (mod.py:1);inner (mod.py:1) 2\n',
+                         prof.collapsed())
+
+    def test_write_collapsed(self):
+        prof = profiler.Profiler()
+        prof._samples[(profiler.LOOP,)] = 3
+        f = io.StringIO()
+        prof.write_collapsed(f)
+        self.assertEqual('[loop] 3\n', f.getvalue())
+
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        prof.write_collapsed(path)
+        with open(path) as f:
+            self.assertEqual('[loop] 3\n', f.read())
+
+    def test_stop_not_started(self):
+        profiler.Profiler().stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
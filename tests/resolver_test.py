@@ -0,0 +1,154 @@
+"""Tests for resolver.py."""
+
+import socket
+import threading
+import unittest
+import unittest.mock
+
+from tulip import events
+from tulip import futures
+from tulip import resolver
+
+
+ADDRINFO = [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('10.0.0.1', 80))]
+
+
+class ResolverTests(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = events.new_event_loop()
+        events.set_event_loop(self.loop)
+        self.loop.time = unittest.mock.Mock(return_value=1000.0)
+        patcher = unittest.mock.patch('tulip.resolver.socket.getaddrinfo')
+        self.m_getaddrinfo = patcher.start()
+        self.m_getaddrinfo.return_value = ADDRINFO
+        self.addCleanup(patcher.stop)
+        self.resolver = resolver.Resolver(loop=self.loop)
+
+    def tearDown(self):
+        self.resolver.close()
+        self.loop.close()
+
+    def lookup(self, host='example.com', port=80, **kwargs):
+        return self.loop.run_until_complete(
+            self.resolver.getaddrinfo(host, port, **kwargs))
+
+    def test_repr(self):
+        self.assertEqual('Resolver<cached=0, hits=0, misses=0>',
+                         repr(self.resolver))
+
+    def test_default_loop(self):
+        r = resolver.Resolver()
+        self.assertIs(self.loop, r._loop)
+
+    def test_cache(self):
+        self.assertEqual(ADDRINFO, self.lookup())
+        self.assertEqual(ADDRINFO, self.lookup())
+        self.m_getaddrinfo.assert_called_once_with(
+            'example.com', 80, 0, 0, 0, 0)
+        self.assertEqual((1, 1), (self.resolver.hits, self.resolver.misses))
+
+        # Different arguments are different entries.
+        self.lookup(type=socket.SOCK_STREAM)
+        self.assertEqual(2, self.m_getaddrinfo.call_count)
+
+    def test_cache_expiry(self):
+        self.lookup()
+        self.loop.time.return_value += self.resolver.ttl + 1
+        self.lookup()
+        self.assertEqual(2, self.m_getaddrinfo.call_count)
+        self.assertEqual(2, self.resolver.misses)
+
+    def test_result_is_copied(self):
+        self.lookup().clear()
+        self.assertEqual(ADDRINFO, self.lookup())
+
+    def test_negative_cache(self):
+        self.m_getaddrinfo.side_effect = socket.gaierror(
+            socket.EAI_NONAME, 'Name or service not known')
+        with self.assertRaises(socket.gaierror) as cm1:
+            self.lookup()
+        with self.assertRaises(socket.gaierror) as cm2:
+            self.lookup()
+        self.assertEqual(1, self.m_getaddrinfo.call_count)
+        # Every caller gets an exception of its own.
+        self.assertIsNot(cm1.exception, cm2.exception)
+        self.assertEqual(cm1.exception.args, cm2.exception.args)
+
+        self.loop.time.return_value += self.resolver.negative_ttl + 1
+        self.assertRaises(socket.gaierror, self.lookup)
+        self.assertEqual(2, self.m_getaddrinfo.call_count)
+
+    def test_other_errors_not_cached(self):
+        self.m_getaddrinfo.side_effect = OSError
+        self.assertRaises(OSError, self.lookup)
+        self.assertRaises(OSError, self.lookup)
+        self.assertEqual(2, self.m_getaddrinfo.call_count)
+
+    def test_dedupe(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def getaddrinfo(*args):
+            started.set()
+            release.wait(10)
+            return ADDRINFO
+
+        self.m_getaddrinfo.side_effect = getaddrinfo
+        f1 = self.resolver.getaddrinfo('example.com', 80)
+        f2 = self.resolver.getaddrinfo('example.com', 80)
+        self.assertIsNot(f1, f2)
+        self.assertTrue(started.wait(10))
+
+        # Cancelling one caller does not affect the others.
+        f1.cancel()
+        release.set()
+        self.assertEqual(ADDRINFO, self.loop.run_until_complete(f2))
+        self.assertEqual(1, self.m_getaddrinfo.call_count)
+        self.assertEqual((1, 1), (self.resolver.hits, self.resolver.misses))
+        self.assertEqual({}, self.resolver._pending)
+
+    def test_max_size(self):
+        self.resolver._max_size = 2
+        for port in (1, 2, 3):
+            self.lookup(port=port)
+        self.assertEqual([('example.com', 2, 0, 0, 0, 0),
+                          ('example.com', 3, 0, 0, 0, 0)],
+                         list(self.resolver._cache))
+
+    def test_max_size_lru(self):
+        self.resolver._max_size = 2
+        self.lookup(port=1)
+        self.lookup(port=2)
+        self.lookup(port=1)
+        self.lookup(port=3)
+        self.assertEqual([('example.com', 1, 0, 0, 0, 0),
+                          ('example.com', 3, 0, 0, 0, 0)],
+                         list(self.resolver._cache))
+
+    def test_clear(self):
+        self.lookup()
+        self.resolver.clear()
+        self.lookup()
+        self.assertEqual(2, self.m_getaddrinfo.call_count)
+
+    @unittest.mock.patch('tulip.resolver.socket.getnameinfo')
+    def test_getnameinfo(self, m_getnameinfo):
+        m_getnameinfo.return_value = ('example.com', 'http')
+        f = self.resolver.getnameinfo(('10.0.0.1', 80))
+        self.assertIsInstance(f, futures.Future)
+        self.assertEqual(('example.com', 'http'),
+                         self.loop.run_until_complete(f))
+        m_getnameinfo.assert_called_with(('10.0.0.1', 80), 0)
+
+    def test_own_executor(self):
+        self.lookup()
+        executor = self.resolver._executor
+        self.assertIsNotNone(executor)
+        self.assertIsNot(executor, self.loop._default_executor)
+        self.resolver.close()
+        self.assertIsNone(self.resolver._executor)
+
+
+if __name__ == '__main__':
+    unittest.main()
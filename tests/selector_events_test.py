@@ -12,11 +12,12 @@ except ImportError:
 from tulip import futures
 from tulip import selectors
 from tulip.events import AbstractEventLoop
-from tulip.protocols import DatagramProtocol, Protocol
+from tulip.protocols import BufferedProtocol, DatagramProtocol, Protocol
 from tulip.selector_events import BaseSelectorEventLoop
 from tulip.selector_events import _SelectorTransport
 from tulip.selector_events import _SelectorSslTransport
 from tulip.selector_events import _SelectorSocketTransport
+from tulip.selector_events import _SelectorEdgeSocketTransport
 from tulip.selector_events import _SelectorDatagramTransport
 
 
@@ -89,6 +90,39 @@ class BaseSelectorEventLoopTests(unittest.TestCase):
         self.loop._ssock.recv.side_effect = BlockingIOError
         self.assertIsNone(self.loop._read_from_self())
 
+    def test_read_from_self_drains(self):
+        self.loop._wakeup_pending = True
+        self.loop._ssock.recv.side_effect = [
+            b'xxx', InterruptedError, b'x', BlockingIOError]
+        self.loop._read_from_self()
+        self.assertEqual(4, self.loop._ssock.recv.call_count)
+        self.assertFalse(self.loop._wakeup_pending)
+
+    def test_read_from_self_wakeup_during_drain(self):
+        # A wakeup that arrives while the self-pipe is being drained
+        # must leave the flag clear, or later wakeups are skipped.
+        self.loop._wakeup_pending = True
+
+        def recv(n):
+            if recv.calls == 0:
+                recv.calls += 1
+                self.loop._wakeup()
+                return b'x'
+            raise BlockingIOError
+        recv.calls = 0
+        self.loop._ssock.recv.side_effect = recv
+        self.loop._read_from_self()
+        self.assertFalse(self.loop._wakeup_pending)
+
+        self.loop._wakeup()
+        self.assertTrue(self.loop._wakeup_pending)
+        self.assertTrue(self.loop._csock.send.called)
+
+    def test_read_from_self_closed(self):
+        self.loop._ssock.recv.return_value = b''
+        self.loop._read_from_self()
+        self.assertEqual(1, self.loop._ssock.recv.call_count)
+
     def test_read_from_self_exception(self):
         self.loop._ssock.recv.side_effect = OSError
         self.assertRaises(OSError, self.loop._read_from_self)
@@ -317,6 +351,95 @@ class BaseSelectorEventLoopTests(unittest.TestCase):
              True, sock, ('127.0.0.1', 8080)),
             self.loop.add_writer.call_args[0])
 
+    def test__sock_connect_cancel_pending(self):
+        f = futures.Future(loop=self.loop)
+        sock = unittest.mock.Mock()
+        sock.fileno.return_value = 10
+        sock.connect.side_effect = BlockingIOError
+
+        self.loop.add_writer = unittest.mock.Mock()
+        self.loop.remove_writer = unittest.mock.Mock()
+        self.loop._sock_connect(f, False, sock, ('127.0.0.1', 8080))
+        self.assertTrue(self.loop.add_writer.called)
+
+        f.cancel()
+        for handle in list(self.loop._ready):
+            handle._run()
+        self.loop.remove_writer.assert_called_with(10)
+
+    def test__accept_connection_batch(self):
+        sock = unittest.mock.Mock()
+        sock.accept.side_effect = [
+            (unittest.mock.Mock(), ('127.0.0.1', 1000 + i))
+            for i in range(3)] + [BlockingIOError]
+        self.loop._make_socket_transport = unittest.mock.Mock()
+        handler = unittest.mock.Mock()
+
+        self.loop._accept_connection(handler, sock, backlog=10)
+        self.assertEqual(3, handler.call_count)
+        self.assertEqual(4, sock.accept.call_count)
+
+    def test__accept_connection_batch_limit(self):
+        sock = unittest.mock.Mock()
+        sock.accept.return_value = (unittest.mock.Mock(), ('127.0.0.1', 1))
+        self.loop._make_socket_transport = unittest.mock.Mock()
+        handler = unittest.mock.Mock()
+
+        self.loop._accept_connection(handler, sock, backlog=5)
+        self.assertEqual(5, handler.call_count)
+
+    def test__accept_connection_error(self):
+        sock = unittest.mock.Mock()
+        sock.fileno.return_value = 10
+        sock.accept.side_effect = OSError
+        self.loop.remove_reader = unittest.mock.Mock()
+
+        with unittest.mock.patch('tulip.selector_events.tulip_log') as m_log:
+            self.loop._accept_connection(unittest.mock.Mock(), sock)
+        self.loop.remove_reader.assert_called_with(10)
+        self.assertTrue(sock.close.called)
+        self.assertTrue(m_log.exception.called)
+
+    def test__accept_connection_max_connections(self):
+        sock = unittest.mock.Mock()
+        sock.fileno.return_value = 10
+        sock.accept.return_value = (unittest.mock.Mock(), ('127.0.0.1', 1))
+        transports = []
+        self.loop._make_socket_transport = unittest.mock.Mock(
+            side_effect=lambda *args, **kw: transports.append(
+                unittest.mock.Mock()) or transports[-1])
+        self.loop.add_reader = unittest.mock.Mock()
+        self.loop.remove_reader = unittest.mock.Mock()
+        handler = unittest.mock.Mock()
+
+        limit = self.loop._make_connection_limit(2)
+        self.loop._start_serving(handler, sock, None, 100, limit)
+        self.loop.add_reader.assert_called_with(
+            10, self.loop._accept_connection, handler, sock, None, 100, limit)
+
+        self.loop._accept_connection(handler, sock, None, 100, limit)
+        self.assertEqual(2, handler.call_count)
+        self.assertTrue(limit.paused)
+        self.loop.remove_reader.assert_called_with(10)
+
+        self.loop.add_reader.reset_mock()
+        detach, = transports[0].add_close_callback.call_args[0]
+        detach()
+        self.assertFalse(limit.paused)
+        self.assertEqual(1, limit.connections)
+        self.loop.add_reader.assert_called_with(
+            10, self.loop._accept_connection, handler, sock, None, 100, limit)
+
+    def test_connection_limit_closed_listener(self):
+        sock = unittest.mock.Mock()
+        sock.fileno.return_value = -1
+        self.loop.add_reader = unittest.mock.Mock()
+        limit = self.loop._make_connection_limit(1)
+        limit.add_listener(sock, ())
+        limit.attach(unittest.mock.Mock())
+        limit.detach()
+        self.assertFalse(self.loop.add_reader.called)
+
     def test__sock_connect_exception(self):
         f = futures.Future()
         sock = unittest.mock.Mock()
@@ -410,6 +533,8 @@ class BaseSelectorEventLoopTests(unittest.TestCase):
             selectors.EVENT_WRITE, (reader, writer))
         cb = lambda: True
         self.loop.add_reader(1, cb)
+        self.assertFalse(self.loop._selector.modify.called)
+        self.loop._apply_fd_changes()
 
         self.assertTrue(reader.cancel.called)
         self.assertFalse(self.loop._selector.register.called)
@@ -426,6 +551,7 @@ class BaseSelectorEventLoopTests(unittest.TestCase):
             selectors.EVENT_WRITE, (None, writer))
         cb = lambda: True
         self.loop.add_reader(1, cb)
+        self.loop._apply_fd_changes()
 
         self.assertFalse(self.loop._selector.register.called)
         self.assertTrue(self.loop._selector.modify.called)
@@ -449,6 +575,7 @@ class BaseSelectorEventLoopTests(unittest.TestCase):
             selectors.EVENT_READ | selectors.EVENT_WRITE, (reader, writer))
         self.assertTrue(
             self.loop.remove_reader(1))
+        self.loop._apply_fd_changes()
 
         self.assertFalse(self.loop._selector.unregister.called)
         self.assertEqual(
@@ -479,6 +606,7 @@ class BaseSelectorEventLoopTests(unittest.TestCase):
             selectors.EVENT_READ, (reader, writer))
         cb = lambda: True
         self.loop.add_writer(1, cb)
+        self.loop._apply_fd_changes()
 
         self.assertTrue(writer.cancel.called)
         self.assertFalse(self.loop._selector.register.called)
@@ -503,6 +631,7 @@ class BaseSelectorEventLoopTests(unittest.TestCase):
             selectors.EVENT_READ | selectors.EVENT_WRITE, (reader, writer))
         self.assertTrue(
             self.loop.remove_writer(1))
+        self.loop._apply_fd_changes()
 
         self.assertFalse(self.loop._selector.unregister.called)
         self.assertEqual(
@@ -514,6 +643,88 @@ class BaseSelectorEventLoopTests(unittest.TestCase):
         self.assertFalse(
             self.loop.remove_writer(1))
 
+    def test_ctor_edge_triggered(self):
+        selector = unittest.mock.Mock(supported_flags=0)
+        self.assertRaises(ValueError, TestBaseSelectorEventLoop, selector,
+                          edge_triggered=True)
+        selector.supported_flags = selectors.EVENT_EDGE
+        loop = TestBaseSelectorEventLoop(selector, edge_triggered=True)
+        transport = loop._make_socket_transport(unittest.mock.Mock())
+        self.assertIsInstance(transport, _SelectorEdgeSocketTransport)
+
+    def test_add_edge_triggered(self):
+        cb = lambda: True
+        self.loop._add_edge_triggered(1, None, cb)
+        fd, mask, (r, w) = self.loop._selector.register.call_args[0]
+        self.assertEqual(1, fd)
+        self.assertEqual(selectors.EVENT_WRITE | selectors.EVENT_EDGE, mask)
+        self.assertIsNone(r)
+        self.assertEqual(cb, w._callback)
+
+    def test_remove_edge_triggered(self):
+        reader = unittest.mock.Mock()
+        writer = unittest.mock.Mock()
+        self.loop._selector.get_info.return_value = (
+            selectors.EVENT_READ | selectors.EVENT_WRITE |
+            selectors.EVENT_EDGE, (reader, writer))
+        self.assertTrue(self.loop.remove_writer(1))
+        self.assertEqual(
+            {1: (selectors.EVENT_READ | selectors.EVENT_EDGE,
+                 (reader, None))},
+            self.loop._fd_changes)
+        self.assertTrue(self.loop.remove_reader(1))
+        self.loop._selector.unregister.assert_called_with(1)
+        self.assertEqual({}, self.loop._fd_changes)
+
+    def test_fd_changes_coalesced(self):
+        reader = unittest.mock.Mock()
+        self.loop._selector.get_info.return_value = (
+            selectors.EVENT_READ, (reader, None))
+        cb = lambda: True
+        self.loop.add_writer(1, cb)
+        self.loop.add_writer(1, cb)
+        self.loop.remove_writer(1)
+        self.loop._apply_fd_changes()
+
+        # One modify() with the net result, reusing the known info.
+        self.assertEqual(1, self.loop._selector.get_info.call_count)
+        self.loop._selector.modify.assert_called_once_with(
+            1, selectors.EVENT_READ, (reader, None))
+        self.assertEqual({}, self.loop._fd_changes)
+
+    def test_fd_changes_unregister(self):
+        reader = unittest.mock.Mock()
+        self.loop._selector.get_info.return_value = (
+            selectors.EVENT_READ, (reader, None))
+        self.loop.add_writer(1, lambda: True)
+        self.loop.remove_reader(1)
+        self.loop.remove_writer(1)
+
+        self.loop._selector.unregister.assert_called_once_with(1)
+        self.assertEqual({}, self.loop._fd_changes)
+        self.loop._apply_fd_changes()
+        self.assertFalse(self.loop._selector.modify.called)
+
+    @unittest.mock.patch('tulip.selector_events.tulip_log')
+    def test_fd_changes_error(self, m_log):
+        self.loop._selector.get_info.return_value = (
+            selectors.EVENT_READ, (None, None))
+        self.loop._selector.modify.side_effect = OSError
+        self.loop.add_writer(1, lambda: True)
+        self.loop._apply_fd_changes()
+        self.assertTrue(m_log.exception.called)
+        self.assertEqual({}, self.loop._fd_changes)
+
+    def test_fd_changes_before_select(self):
+        self.loop._selector.get_info.return_value = (
+            selectors.EVENT_READ, (None, None))
+        self.loop._selector.select.return_value = []
+        self.loop.add_writer(1, lambda: True)
+        self.assertTrue(self.loop._fd_changes)
+        self.loop._run_once()
+        self.assertTrue(self.loop._selector.modify.called)
+        self.assertEqual({}, self.loop._fd_changes)
+
     def test_process_events_read(self):
         reader = unittest.mock.Mock()
         reader._cancelled = False
@@ -630,6 +841,27 @@ class SelectorTransportTests(unittest.TestCase):
         self.protocol.connection_lost.assert_called_with(exc)
         self.sock.close.assert_called_with()
 
+    @unittest.mock.patch('tulip.selector_events.tulip_log')
+    def test_connection_lost_close_callbacks(self, m_log):
+        tr = _SelectorTransport(self.loop, self.sock, None)
+        tr.register_protocol(self.protocol)
+        bad = unittest.mock.Mock(side_effect=ValueError)
+        cb = unittest.mock.Mock()
+        tr.add_close_callback(bad)
+        tr.add_close_callback(cb)
+        tr._call_connection_lost(None)
+        bad.assert_called_with()
+        cb.assert_called_with()
+        self.assertTrue(m_log.exception.called)
+
+        tr._call_close_callbacks()
+        self.assertEqual(1, cb.call_count)
+
+        # Too late: called soon.
+        late = unittest.mock.Mock()
+        tr.add_close_callback(late)
+        self.loop.call_soon.assert_called_with(late)
+
 
 class SelectorSocketTransportTests(unittest.TestCase):
 
@@ -666,6 +898,127 @@ class SelectorSocketTransportTests(unittest.TestCase):
 
         self.protocol.data_received.assert_called_with(b'data')
 
+    def test_read_ready_buffered(self):
+        protocol = unittest.mock.Mock(BufferedProtocol)
+        buf = protocol.get_buffer.return_value = bytearray(10)
+        transport = _SelectorSocketTransport(self.loop, self.sock)
+        transport.register_protocol(protocol)
+
+        self.sock.recv_into.return_value = 4
+        transport._read_ready()
+        protocol.get_buffer.assert_called_with(16*1024)
+        self.sock.recv_into.assert_called_with(buf)
+        protocol.buffer_updated.assert_called_with(4)
+        self.assertFalse(self.sock.recv.called)
+
+        self.sock.recv_into.return_value = 0
+        transport._read_ready()
+        protocol.eof_received.assert_called_with()
+
+    def test_read_ready_more(self):
+        transport = _SelectorSocketTransport(self.loop, self.sock)
+        transport.register_protocol(self.protocol)
+
+        self.sock.recv.side_effect = [b'x' * 16384, b'x' * 32768, b'x']
+        transport._read_ready()
+        self.assertEqual([unittest.mock.call(16384),
+                          unittest.mock.call(32768),
+                          unittest.mock.call(65536)],
+                         self.sock.recv.call_args_list)
+        self.assertEqual(3, self.protocol.data_received.call_count)
+        self.assertEqual(32768, transport._read_size)
+
+    def test_read_ready_max_reads(self):
+        transport = _SelectorSocketTransport(self.loop, self.sock)
+        transport.register_protocol(self.protocol)
+        transport.max_reads = 2
+
+        self.sock.recv.side_effect = lambda n: b'x' * n
+        transport._read_ready()
+        self.assertEqual(2, self.sock.recv.call_count)
+        self.assertEqual(65536, transport._read_size)
+        transport._read_ready()
+        self.assertEqual(4, self.sock.recv.call_count)
+        self.assertEqual(transport.max_read_size, transport._read_size)
+
+    def test_read_ready_more_paused(self):
+        transport = _SelectorSocketTransport(self.loop, self.sock)
+        transport.register_protocol(self.protocol)
+        self.protocol.data_received.side_effect = (
+            lambda data: transport.pause())
+
+        self.sock.recv.side_effect = lambda n: b'x' * n
+        transport._read_ready()
+        self.assertEqual(1, self.sock.recv.call_count)
+
+    def test_read_size(self):
+        transport = _SelectorSocketTransport(self.loop, self.sock)
+        transport.register_protocol(self.protocol)
+        transport._read_size = transport.max_read_size
+
+        self.sock.recv.return_value = b'x' * transport.max_read_size
+        transport._recv()
+        self.assertEqual(transport.max_read_size, transport._read_size)
+
+        self.sock.recv.return_value = b'x' * (transport.max_read_size // 2)
+        transport._recv()
+        self.assertEqual(transport.max_read_size, transport._read_size)
+
+        self.sock.recv.return_value = b'x'
+        for _ in range(10):
+            transport._recv()
+        self.assertEqual(transport.min_read_size, transport._read_size)
+
+    def test_read_size_buffered(self):
+        protocol = unittest.mock.Mock(BufferedProtocol)
+        protocol.get_buffer.return_value = bytearray(1024)
+        transport = _SelectorSocketTransport(self.loop, self.sock)
+        transport.register_protocol(protocol)
+
+        # The read is full if it fills the buffer the protocol gave.
+        self.sock.recv_into.return_value = 1024
+        self.assertEqual((1024, True), transport._recv())
+        protocol.get_buffer.assert_called_with(16384)
+        self.assertEqual(32768, transport._read_size)
+
+    def test_read_ready_buffered_err(self):
+        protocol = unittest.mock.Mock(BufferedProtocol)
+        err = protocol.get_buffer.side_effect = ValueError()
+        transport = _SelectorSocketTransport(self.loop, self.sock)
+        transport.register_protocol(protocol)
+        transport._fatal_error = unittest.mock.Mock()
+
+        transport._read_ready()
+        transport._fatal_error.assert_called_with(err)
+        self.assertFalse(protocol.buffer_updated.called)
+
+    def test_pause_resume(self):
+        transport = _SelectorSocketTransport(self.loop, self.sock)
+        transport.register_protocol(self.protocol)
+
+        transport.pause()
+        self.loop.remove_reader.assert_called_with(7)
+        transport.pause()
+        self.assertEqual(1, self.loop.remove_reader.call_count)
+
+        self.loop.reset_mock()
+        transport.resume()
+        self.loop.add_reader.assert_called_with(7, transport._read_ready)
+        transport.resume()
+        self.assertEqual(1, self.loop.add_reader.call_count)
+
+    def test_pause_resume_closing(self):
+        transport = _SelectorSocketTransport(self.loop, self.sock)
+        transport.register_protocol(self.protocol)
+        transport.pause()
+        transport.close()
+
+        self.loop.reset_mock()
+        transport.resume()
+        self.assertFalse(self.loop.add_reader.called)
+        transport.pause()
+        self.assertFalse(self.loop.remove_reader.called)
+
     def test_read_ready_eof(self):
         transport = _SelectorSocketTransport(self.loop, self.sock)
         transport.register_protocol(self.protocol)
@@ -730,21 +1083,21 @@ class SelectorSocketTransportTests(unittest.TestCase):
         transport._buffer.append(b'data')
         transport.write(b'')
         self.assertFalse(self.sock.send.called)
-        self.assertEqual([b'data'], transport._buffer)
+        self.assertEqual([b'data'], list(transport._buffer))
 
     def test_write_buffer(self):
         transport = _SelectorSocketTransport(self.loop, self.sock)
         transport._buffer.append(b'data1')
         transport.write(b'data2')
         self.assertFalse(self.sock.send.called)
-        self.assertEqual([b'data1', b'data2'], transport._buffer)
+        self.assertEqual([b'data1', b'data2'], list(transport._buffer))
 
     def test_write_paused(self):
         transport = _SelectorSocketTransport(self.loop, self.sock)
         transport._writing = False
         transport.write(b'data')
         self.assertFalse(self.sock.send.called)
-        self.assertEqual(transport._buffer, [b'data'])
+        self.assertEqual([b'data'], list(transport._buffer))
 
     def test_write_partial(self):
         data = b'data'
@@ -757,7 +1110,7 @@ class SelectorSocketTransportTests(unittest.TestCase):
         self.assertEqual(
             transport._write_ready, self.loop.add_writer.call_args[0][1])
 
-        self.assertEqual([b'ta'], transport._buffer)
+        self.assertEqual([b'ta'], list(transport._buffer))
 
     def test_write_partial_none(self):
         data = b'data'
@@ -769,7 +1122,7 @@ class SelectorSocketTransportTests(unittest.TestCase):
 
         self.loop.add_writer.assert_called_with(
             7, transport._write_ready)
-        self.assertEqual([b'data'], transport._buffer)
+        self.assertEqual([b'data'], list(transport._buffer))
 
     def test_write_tryagain(self):
         self.sock.send.side_effect = BlockingIOError
@@ -782,7 +1135,7 @@ class SelectorSocketTransportTests(unittest.TestCase):
         self.assertEqual(
             transport._write_ready, self.loop.add_writer.call_args[0][1])
 
-        self.assertEqual([b'data'], transport._buffer)
+        self.assertEqual([b'data'], list(transport._buffer))
 
     @unittest.mock.patch('tulip.selector_events.tulip_log')
     def test_write_exception(self, m_log):
@@ -833,7 +1186,7 @@ class SelectorSocketTransportTests(unittest.TestCase):
         transport._buffer.append(b'data')
         transport._write_ready()
         self.assertFalse(self.sock.send.called)
-        self.assertEqual(transport._buffer, [b'data'])
+        self.assertEqual([b'data'], list(transport._buffer))
 
     def test_write_ready_closing(self):
         data = b'data'
@@ -861,7 +1214,7 @@ class SelectorSocketTransportTests(unittest.TestCase):
         transport._buffer.append(data)
         transport._write_ready()
         self.assertFalse(self.loop.remove_writer.called)
-        self.assertEqual([b'ta'], transport._buffer)
+        self.assertEqual([b'ta'], list(transport._buffer))
 
     def test_write_ready_partial_none(self):
         data = b'data'
@@ -871,17 +1224,114 @@ class SelectorSocketTransportTests(unittest.TestCase):
         transport._buffer.append(data)
         transport._write_ready()
         self.assertFalse(self.loop.remove_writer.called)
-        self.assertEqual([b'data'], transport._buffer)
+        self.assertEqual([b'data'], list(transport._buffer))
 
     def test_write_ready_tryagain(self):
-        self.sock.send.side_effect = BlockingIOError
+        self.sock.sendmsg.side_effect = BlockingIOError
 
         transport = _SelectorSocketTransport(self.loop, self.sock)
-        transport._buffer = [b'data1', b'data2']
+        transport._buffer_data(b'data1')
+        transport._buffer_data(b'data2')
         transport._write_ready()
 
         self.assertFalse(self.loop.remove_writer.called)
-        self.assertEqual([b'data1data2'], transport._buffer)
+        self.assertEqual([b'data1', b'data2'], list(transport._buffer))
+        self.assertEqual(10, transport._buffer_size)
+
+    def sendmsg(self, n):
+        # Mock sendmsg() recording what it is passed.
+        sent = []
+
+        def sendmsg(buffers):
+            sent.append([bytes(data) for data in buffers])
+            return n
+
+        self.sock.sendmsg.side_effect = sendmsg
+        return sent
+
+    def test_write_ready_sendmsg(self):
+        sent = self.sendmsg(7)
+
+        transport = _SelectorSocketTransport(self.loop, self.sock)
+        for data in (b'data1', b'data2', b'data3'):
+            transport._buffer_data(data)
+        transport._write_ready()
+        self.assertEqual([[b'data1', b'data2', b'data3']], sent)
+        self.assertEqual([b'ta2', b'data3'], list(transport._buffer))
+        self.assertEqual(8, transport._buffer_size)
+
+        transport._write_ready()
+        self.assertEqual([b'ta2', b'data3'], sent[-1])
+        self.assertEqual([b'3'], list(transport._buffer))
+        self.assertEqual(1, transport._buffer_size)
+        self.assertFalse(self.sock.send.called)
+
+        # A single buffer is just sent.
+        self.sock.send.return_value = 1
+        transport._write_ready()
+        self.assertEqual(b'3', bytes(self.sock.send.call_args[0][0]))
+        self.assertFalse(transport._buffer)
+        self.assertEqual(0, transport._buffer_size)
+        self.loop.remove_writer.assert_called_with(7)
+
+    @unittest.mock.patch('tulip.selector_events._IOV_MAX', 2)
+    def test_write_ready_iov_max(self):
+        sent = self.sendmsg(10)
+
+        transport = _SelectorSocketTransport(self.loop, self.sock)
+        for data in (b'data1', b'data2', b'data3'):
+            transport._buffer_data(data)
+        transport._write_ready()
+        self.assertEqual([[b'data1', b'data2']], sent)
+        self.assertEqual([b'data3'], list(transport._buffer))
+
+    def test_write_ready_no_sendmsg(self):
+        self.sock.send.return_value = 5
+        del self.sock.sendmsg
+
+        transport = _SelectorSocketTransport(self.loop, self.sock)
+        transport._buffer_data(b'data1')
+        transport._buffer_data(b'data2')
+        transport._write_ready()
+        self.assertEqual([b'data2'], list(transport._buffer))
+
+    def test_writelines(self):
+        sent = self.sendmsg(6)
+
+        transport = _SelectorSocketTransport(self.loop, self.sock)
+        transport.writelines([b'data1', b'', b'data2'])
+        self.assertEqual([[b'data1', b'data2']], sent)
+        self.assertEqual([b'ata2'], list(transport._buffer))
+        self.loop.add_writer.assert_called_with(7, transport._write_ready)
+
+        # With data pending, nothing is sent right away.
+        transport.writelines([b'data3'])
+        self.assertEqual(1, self.sock.sendmsg.call_count)
+        self.assertEqual([b'ata2', b'data3'], list(transport._buffer))
+        self.assertEqual(9, transport._buffer_size)
+
+    def test_writelines_all_sent(self):
+        self.sock.sendmsg.return_value = 10
+
+        transport = _SelectorSocketTransport(self.loop, self.sock)
+        transport.writelines([b'data1', b'data2'])
+        self.assertFalse(transport._buffer)
+        self.assertFalse(self.loop.add_writer.called)
+
+    def test_writelines_empty(self):
+        transport = _SelectorSocketTransport(self.loop, self.sock)
+        transport.writelines([b''])
+        self.assertFalse(self.sock.send.called)
+        self.assertFalse(self.sock.sendmsg.called)
+
+    @unittest.mock.patch('tulip.selector_events.tulip_log')
+    def test_writelines_exception(self, m_log):
+        err = self.sock.sendmsg.side_effect = OSError()
+
+        transport = _SelectorSocketTransport(self.loop, self.sock)
+        transport._fatal_error = unittest.mock.Mock()
+        transport.writelines([b'data1', b'data2'])
+        transport._fatal_error.assert_called_with(err)
 
     def test_write_ready_exception(self):
         err = self.sock.send.side_effect = OSError()
@@ -935,11 +1385,206 @@ class SelectorSocketTransportTests(unittest.TestCase):
 
         transport._buffer.append(b'data')
         transport.discard_output()
-        self.assertEqual(transport._buffer, [])
+        self.assertEqual([], list(transport._buffer))
         self.loop.remove_writer.assert_called_with(self.sock_fd)
 
+    def test_write_flow_control(self):
+        self.sock.send.side_effect = BlockingIOError
+        transport = _SelectorSocketTransport(self.loop, self.sock)
+        transport.register_protocol(self.protocol)
+        transport.set_write_buffer_limits(high=4, low=2)
+
+        transport.write(b'data')
+        self.assertFalse(self.protocol.pause_writing.called)
+        transport.write(b'x')
+        self.assertEqual(5, transport.get_write_buffer_size())
+        self.protocol.pause_writing.assert_called_with()
+
+        self.sock.sendmsg.return_value = 2
+        transport._write_ready()
+        self.assertFalse(self.protocol.resume_writing.called)
+        self.sock.sendmsg.return_value = 1
+        transport._write_ready()
+        self.assertEqual(2, transport.get_write_buffer_size())
+        self.protocol.resume_writing.assert_called_with()
+
+    def test_writelines_flow_control(self):
+        self.sock.sendmsg.return_value = 1
+        transport = _SelectorSocketTransport(self.loop, self.sock)
+        transport.register_protocol(self.protocol)
+        transport.set_write_buffer_limits(high=4)
+        transport.writelines([b'data', b'data'])
+        self.assertEqual(7, transport.get_write_buffer_size())
+        self.assertTrue(self.protocol.pause_writing.called)
+
+        transport.discard_output()
+        self.assertEqual(0, transport.get_write_buffer_size())
+        self.assertTrue(self.protocol.resume_writing.called)
+
+    def test_force_close_flow_control(self):
+        self.sock.send.side_effect = BlockingIOError
+        transport = _SelectorSocketTransport(self.loop, self.sock)
+        transport.register_protocol(self.protocol)
+        transport.write(b'data')
+        transport._flow_control_lost = unittest.mock.Mock()
+        transport._force_close(None)
+        self.assertEqual(0, transport.get_write_buffer_size())
+        transport._call_connection_lost(None)
+        self.assertTrue(transport._flow_control_lost.called)
+
 
 @unittest.skipIf(ssl is None, 'No ssl module')
+class SelectorEdgeSocketTransportTests(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = unittest.mock.Mock(spec_set=BaseSelectorEventLoop)
+        self.sock = unittest.mock.Mock(socket.socket)
+        self.sock_fd = self.sock.fileno.return_value = 7
+        self.protocol = unittest.mock.Mock(Protocol)
+        self.transport = _SelectorEdgeSocketTransport(self.loop, self.sock)
+        self.transport.register_protocol(self.protocol)
+
+    def test_register_protocol(self):
+        tr = self.transport
+        self.loop._add_edge_triggered.assert_called_with(
+            7, tr._read_ready, tr._write_ready)
+        self.assertFalse(self.loop.add_reader.called)
+
+    def test_read_ready(self):
+        self.sock.recv.side_effect = [b'data1', InterruptedError, b'data2',
+                                      BlockingIOError]
+        self.transport._read_ready()
+        self.assertEqual([unittest.mock.call(b'data1'),
+                          unittest.mock.call(b'data2')],
+                         self.protocol.data_received.call_args_list)
+        self.assertEqual(4, self.sock.recv.call_count)
+
+    def test_read_ready_eof(self):
+        self.sock.recv.side_effect = [b'data', b'']
+        self.transport._read_ready()
+        self.assertTrue(self.protocol.eof_received.called)
+        self.assertTrue(self.transport._closing)
+        self.assertEqual(2, self.sock.recv.call_count)
+
+    def test_read_ready_buffered(self):
+        protocol = unittest.mock.Mock(BufferedProtocol)
+        protocol.get_buffer.return_value = bytearray(10)
+        self.transport.register_protocol(protocol)
+        self.sock.recv_into.side_effect = [3, 5, BlockingIOError]
+        self.transport._read_ready()
+        self.assertEqual([unittest.mock.call(3), unittest.mock.call(5)],
+                         protocol.buffer_updated.call_args_list)
+        self.assertEqual(3, protocol.get_buffer.call_count)
+
+    def test_read_ready_max_reads(self):
+        self.transport.max_reads = 2
+        self.sock.recv.return_value = b'data'
+        self.transport._read_ready()
+        self.assertEqual(2, self.sock.recv.call_count)
+        self.loop.call_soon.assert_called_with(self.transport._read_ready)
+
+    def test_pause_resume(self):
+        self.sock.recv.return_value = b'data'
+        self.protocol.data_received.side_effect = (
+            lambda data: self.transport.pause())
+        self.transport._read_ready()
+        self.assertEqual(1, self.sock.recv.call_count)
+        self.transport._read_ready()
+        self.assertEqual(1, self.sock.recv.call_count)
+        self.assertFalse(self.loop.remove_reader.called)
+
+        self.transport.resume()
+        self.loop.call_soon.assert_called_with(self.transport._read_ready)
+
+    def test_read_ready_close(self):
+        self.sock.recv.return_value = b'data'
+        self.protocol.data_received.side_effect = (
+            lambda data: self.transport.close())
+        self.transport._read_ready()
+        self.assertEqual(1, self.sock.recv.call_count)
+
+    def test_read_ready_err(self):
+        self.sock.recv.side_effect = ConnectionResetError
+        self.transport._force_close = unittest.mock.Mock()
+        self.transport._force_close.side_effect = (
+            lambda exc: setattr(self.transport, '_closing', True))
+        self.transport._read_ready()
+        self.assertEqual(1, self.sock.recv.call_count)
+
+    def test_write(self):
+        self.sock.send.side_effect = [2, 2, BlockingIOError]
+        self.transport.write(b'data12')
+        self.assertEqual([b'12'], list(self.transport._buffer))
+        self.transport.write(b'34')
+        self.assertEqual([b'12', b'34'], list(self.transport._buffer))
+        self.assertEqual(3, self.sock.send.call_count)
+        self.assertFalse(self.loop.add_writer.called)
+
+    def test_writelines(self):
+        self.sock.sendmsg.return_value = 6
+        self.sock.send.side_effect = BlockingIOError
+        self.transport.writelines([b'data1', b'data2'])
+        self.assertEqual([b'ata2'], list(self.transport._buffer))
+        self.assertEqual(1, self.sock.send.call_count)
+        self.assertFalse(self.loop.add_writer.called)
+
+    def test_write_paused(self):
+        self.transport.pause_writing()
+        self.transport.write(b'data')
+        self.assertFalse(self.sock.send.called)
+        self.assertFalse(self.loop.remove_writer.called)
+
+        self.transport.resume_writing()
+        self.loop.call_soon.assert_called_with(self.transport._write_ready)
+        self.sock.send.return_value = 4
+        self.transport._write_ready()
+        self.assertEqual([], list(self.transport._buffer))
+        self.assertFalse(self.loop.remove_writer.called)
+
+    def test_write_ready_nothing(self):
+        self.transport._write_ready()
+        self.assertFalse(self.sock.send.called)
+
+    def test_write_ready_closing(self):
+        self.transport._buffer_data(b'data')
+        self.transport.close()
+        self.assertFalse(self.loop.remove_writer.called)
+        self.sock.send.return_value = 4
+        self.transport._write_ready()
+        self.loop.remove_writer.assert_called_with(7)
+        self.assertTrue(self.protocol.connection_lost.called)
+
+    def test_write_ready_err(self):
+        self.transport._buffer_data(b'data')
+        self.transport._fatal_error = unittest.mock.Mock()
+        err = self.sock.send.side_effect = OSError()
+        self.transport._write_ready()
+        self.transport._fatal_error.assert_called_with(err)
+
+    def test_close(self):
+        self.transport.close()
+        self.loop.remove_writer.assert_called_with(7)
+        self.loop.remove_reader.assert_called_with(7)
+
+    def test_discard_output(self):
+        self.transport._buffer_data(b'data')
+        self.transport.discard_output()
+        self.assertEqual([], list(self.transport._buffer))
+        self.assertFalse(self.loop.remove_writer.called)
+
+    def test_write_flow_control(self):
+        self.transport.set_write_buffer_limits(high=4, low=2)
+        self.sock.send.side_effect = [1, BlockingIOError]
+        self.transport.write(b'123456')
+        self.assertEqual(5, self.transport.get_write_buffer_size())
+        self.assertTrue(self.protocol.pause_writing.called)
+
+        self.sock.send.side_effect = [4, BlockingIOError]
+        self.transport._write_ready()
+        self.assertEqual(1, self.transport.get_write_buffer_size())
+        self.assertTrue(self.protocol.resume_writing.called)
+
+
 class SelectorSslTransportTests(unittest.TestCase):
 
     def setUp(self):
@@ -1002,6 +1647,14 @@ class SelectorSslTransportTests(unittest.TestCase):
         self.assertTrue(transport._waiter.done())
         self.assertIs(exc, transport._waiter.exception())
 
+    def test_on_handshake_exc_close_callbacks(self):
+        transport = self._make_one()
+        cb = unittest.mock.Mock()
+        transport.add_close_callback(cb)
+        self.sslsock.do_handshake.side_effect = ValueError
+        transport._on_handshake()
+        cb.assert_called_with()
+
     def test_on_handshake_base_exc(self):
         transport = self._make_one()
         transport._waiter = futures.Future()
@@ -1048,6 +1701,54 @@ class SelectorSslTransportTests(unittest.TestCase):
         self.assertTrue(self.sslsock.recv.called)
         self.assertEqual((b'data',), self.protocol.data_received.call_args[0])
 
+    def test_pause_resume(self):
+        transport = self._make_one()
+        transport.pause()
+        self.loop.remove_reader.assert_called_with(1)
+
+        self.sslsock.recv.return_value = b'data'
+        transport._on_ready()
+        self.assertFalse(self.sslsock.recv.called)
+
+        transport.resume()
+        self.loop.add_reader.assert_called_with(1, transport._on_ready)
+        transport._on_ready()
+        self.protocol.data_received.assert_called_with(b'data')
+
+    def test_pause_during_handshake(self):
+        self.sslsock.do_handshake.side_effect = ssl.SSLWantReadError
+        transport = self._make_one()
+        transport.pause()
+        self.assertFalse(self.loop.remove_reader.called)
+
+        self.sslsock.do_handshake.side_effect = None
+        transport._on_handshake()
+        self.assertFalse(self.loop.add_reader.called)
+        transport.resume()
+        self.loop.add_reader.assert_called_with(1, transport._on_ready)
+
+    def test_on_ready_recv_buffered(self):
+        protocol = unittest.mock.Mock(BufferedProtocol)
+        protocol.get_buffer.return_value = bytearray(8192)
+        transport = self._make_one()
+        transport.register_protocol(protocol)
+
+        self.sslsock.recv_into.return_value = 4
+        transport._on_ready()
+        protocol.get_buffer.assert_called_with(8192)
+        protocol.buffer_updated.assert_called_with(4)
+
+    def test_on_ready_recv_more(self):
+        self.sslsock.recv.side_effect = [
+            b'x' * 8192, b'x' * 16384, b'x' * 100]
+        transport = self._make_one()
+        transport._on_ready()
+        self.assertEqual([unittest.mock.call(8192),
+                          unittest.mock.call(16384),
+                          unittest.mock.call(16384)],
+                         self.sslsock.recv.call_args_list)
+        self.assertEqual(3, self.protocol.data_received.call_count)
+
     def test_on_ready_recv_eof(self):
         self.sslsock.recv.return_value = b''
         transport = self._make_one()
@@ -1098,6 +1799,21 @@ class SelectorSslTransportTests(unittest.TestCase):
         self.assertEqual([], transport._buffer)
         self.assertTrue(self.sslsock.send.called)
 
+    def test_write_flow_control(self):
+        transport = self._make_one()
+        transport.set_write_buffer_limits(high=4, low=2)
+        transport.write(b'data')
+        self.assertFalse(self.protocol.pause_writing.called)
+        transport.write(b'x')
+        self.assertEqual(5, transport.get_write_buffer_size())
+        self.assertTrue(self.protocol.pause_writing.called)
+
+        self.sslsock.recv.side_effect = ssl.SSLWantReadError
+        self.sslsock.send.return_value = 3
+        transport._on_ready()
+        self.assertEqual(2, transport.get_write_buffer_size())
+        self.assertTrue(self.protocol.resume_writing.called)
+
     def test_on_ready_send_none(self):
         self.sslsock.recv.side_effect = ssl.SSLWantReadError
         self.sslsock.send.return_value = 0
@@ -1344,6 +2060,25 @@ class SelectorDatagramTransportTests(unittest.TestCase):
             self.sock.sendto.call_args[0], (data, ('0.0.0.0', 12345)))
         self.assertTrue(self.loop.remove_writer.called)
 
+    def test_sendto_flow_control(self):
+        self.sock.sendto.side_effect = BlockingIOError
+        transport = _SelectorDatagramTransport(self.loop, self.sock)
+        transport.register_protocol(self.protocol)
+        transport.set_write_buffer_limits(high=4, low=0)
+        transport.sendto(b'data', ())
+        transport.sendto(b'x', ())
+        self.assertEqual(5, transport.get_write_buffer_size())
+        self.assertTrue(self.protocol.pause_writing.called)
+
+        self.sock.sendto.side_effect = [4, BlockingIOError]
+        transport._sendto_ready()
+        self.assertEqual(1, transport.get_write_buffer_size())
+        self.assertFalse(self.protocol.resume_writing.called)
+        self.sock.sendto.side_effect = None
+        transport._sendto_ready()
+        self.assertEqual(0, transport.get_write_buffer_size())
+        self.assertTrue(self.protocol.resume_writing.called)
+
     def test_sendto_ready_closing(self):
         data = b'data'
         self.sock.send.return_value = len(data)
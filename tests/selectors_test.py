@@ -4,6 +4,7 @@ import unittest
 import unittest.mock
 
 from tulip import selectors
+from tulip import test_utils
 
 
 class BaseSelectorTests(unittest.TestCase):
@@ -36,6 +37,9 @@ class BaseSelectorTests(unittest.TestCase):
     def test_register_unknown_event(self):
         s = selectors._BaseSelector()
         self.assertRaises(ValueError, s.register, unittest.mock.Mock(), 999999)
+        # Only some selectors support edge-triggered mode.
+        self.assertRaises(ValueError, s.register, unittest.mock.Mock(),
+                          selectors.EVENT_READ | selectors.EVENT_EDGE)
 
     def test_register_already_registered(self):
         fobj = unittest.mock.Mock()
@@ -83,8 +87,9 @@ class BaseSelectorTests(unittest.TestCase):
         s = selectors._BaseSelector()
         key = s.register(fobj, selectors.EVENT_READ, d1)
         key2 = s.modify(fobj, selectors.EVENT_READ, d2)
-        self.assertEqual(key.events, key2.events)
-        self.assertNotEqual(key.data, key2.data)
+        # The key is updated in place.
+        self.assertIs(key, key2)
+        self.assertIs(d2, key.data)
         self.assertEqual((selectors.EVENT_READ, d2), s.get_info(fobj))
 
     def test_modify_same(self):
@@ -141,3 +146,107 @@ class BaseSelectorTests(unittest.TestCase):
     if hasattr(selectors.DefaultSelector, 'fileno'):
         def test_fileno(self):
             self.assertIsInstance(selectors.DefaultSelector().fileno(), int)
+
+
+class SelectorModifyTestsMixin:
+
+    SELECTOR = None
+
+    def setUp(self):
+        self.selector = self.SELECTOR()
+        self.rsock, self.wsock = test_utils.socketpair()
+
+    def tearDown(self):
+        self.selector.close()
+        self.rsock.close()
+        self.wsock.close()
+
+    def test_modify_events(self):
+        s = self.selector
+        key = s.register(self.wsock, selectors.EVENT_READ, 'r')
+        self.assertEqual([], s.select(0))
+
+        self.assertIs(key, s.modify(self.wsock, selectors.EVENT_WRITE, 'w'))
+        self.assertEqual([(self.wsock, selectors.EVENT_WRITE, 'w')],
+                         s.select(0))
+
+        s.modify(self.wsock, selectors.EVENT_READ | selectors.EVENT_WRITE)
+        self.rsock.send(b'x')
+        self.assertEqual([(self.wsock,
+                           selectors.EVENT_READ | selectors.EVENT_WRITE,
+                           None)],
+                         s.select(1))
+
+        s.modify(self.wsock, selectors.EVENT_READ, 'r')
+        self.assertEqual([(self.wsock, selectors.EVENT_READ, 'r')],
+                         s.select(0))
+        self.assertRaises(ValueError, s.modify, self.wsock, 0)
+        self.assertRaises(ValueError, s.modify, self.rsock,
+                          selectors.EVENT_READ)
+
+
+class SelectSelectorModifyTests(SelectorModifyTestsMixin, unittest.TestCase):
+
+    SELECTOR = selectors.SelectSelector
+
+
+if hasattr(selectors, 'PollSelector'):
+    class PollSelectorModifyTests(SelectorModifyTestsMixin,
+                                  unittest.TestCase):
+
+        SELECTOR = selectors.PollSelector
+
+
+if hasattr(selectors, 'EpollSelector'):
+    class EpollSelectorModifyTests(SelectorModifyTestsMixin,
+                                   unittest.TestCase):
+
+        SELECTOR = selectors.EpollSelector
+
+        def test_modify_uses_ctl_mod(self):
+            s = self.selector
+            s.register(self.wsock, selectors.EVENT_READ)
+            s._epoll = unittest.mock.Mock()
+            s.modify(self.wsock, selectors.EVENT_WRITE)
+            s._epoll.modify.assert_called_with(self.wsock.fileno(),
+                                               selectors.EPOLLOUT)
+            s.modify(self.wsock, selectors.EVENT_WRITE, 'data')
+            self.assertEqual(1, s._epoll.modify.call_count)
+            self.assertFalse(s._epoll.unregister.called)
+            self.assertFalse(s._epoll.register.called)
+
+        def test_edge_triggered(self):
+            s = self.selector
+            edge = selectors.EVENT_EDGE
+            s.register(self.wsock, selectors.EVENT_READ | edge, 'd')
+            # Writable from the start, but only reading was asked for.
+            self.assertEqual([], s.select(0))
+
+            self.rsock.send(b'x')
+            self.assertEqual([(self.wsock, selectors.EVENT_READ, 'd')],
+                             s.select(1))
+            # Nothing was read, but the edge is reported only once.
+            self.assertEqual([], s.select(0))
+
+            self.rsock.send(b'y')
+            s._epoll = unittest.mock.Mock(wraps=s._epoll)
+            s.modify(self.wsock, selectors.EVENT_READ | selectors.EVENT_WRITE |
+                     edge, 'd')
+            self.assertFalse(s._epoll.modify.called)
+            # The new edge reports the whole state of the socket.
+            self.assertEqual([(self.wsock,
+                               selectors.EVENT_READ | selectors.EVENT_WRITE,
+                               'd')],
+                             s.select(1))
+
+            s.modify(self.wsock, selectors.EVENT_READ)
+            s._epoll.modify.assert_called_with(self.wsock.fileno(),
+                                               selectors.EPOLLIN)
+            self.assertRaises(ValueError, s.modify, self.wsock, edge)
+
+
+if hasattr(selectors, 'KqueueSelector'):
+    class KqueueSelectorModifyTests(SelectorModifyTestsMixin,
+                                    unittest.TestCase):
+
+        SELECTOR = selectors.KqueueSelector
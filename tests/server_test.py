@@ -0,0 +1,164 @@
+"""Tests for server.py."""
+
+import os
+import signal
+import socket
+import sys
+import unittest
+import unittest.mock
+
+from tulip import events
+from tulip import tasks
+
+if sys.platform != 'win32':
+    from tulip import server
+
+
+class PidProtocol:
+    """Writes the pid of the worker and closes the connection."""
+
+    def __init__(self, transport):
+        self.transport = transport
+        transport.register_protocol(self)
+        transport.write(str(os.getpid()).encode('ascii'))
+        transport.close()
+
+    def data_received(self, data):
+        pass
+
+    def eof_received(self):
+        pass
+
+    def connection_lost(self, exc):
+        pass
+
+
+def echo_messages(worker):
+    worker.on_message = lambda data: worker.send([worker.pid, data])
+
+
+@unittest.skipIf(sys.platform == 'win32', 'UNIX only')
+class SupervisorTests(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = events.new_event_loop()
+        events.set_event_loop(self.loop)
+        self.supervisor = None
+
+    def tearDown(self):
+        if self.supervisor is not None:
+            self.loop.run_until_complete(self.supervisor.stop(), timeout=30)
+        self.loop.close()
+
+    def start(self, **kwargs):
+        kwargs.setdefault('workers', 2)
+        self.supervisor = server.Supervisor(
+            PidProtocol, '127.0.0.1', 0, loop=self.loop, **kwargs)
+        self.loop.run_until_complete(self.supervisor.start(), timeout=30)
+        return self.supervisor
+
+    def ask_pid(self, sup):
+        address = ('127.0.0.1', sup.port or sup.sockets[0].getsockname()[1])
+        with socket.create_connection(address, timeout=10) as client:
+            data = b''
+            while True:
+                chunk = client.recv(100)
+                if not chunk:
+                    break
+                data += chunk
+        return int(data)
+
+    def run_until(self, predicate, timeout=10):
+        deadline = self.loop.time() + timeout
+        while not predicate():
+            if self.loop.time() > deadline:
+                self.fail('timed out')
+            self.loop.run_until_complete(tasks.sleep(0.05, loop=self.loop))
+
+    def test_ctor(self):
+        self.assertRaises(ValueError, server.Supervisor, PidProtocol,
+                          workers=0, loop=self.loop)
+        with unittest.mock.patch('tulip.loopgroup.multiprocessing') as m:
+            m.cpu_count.return_value = 3
+            sup = server.Supervisor(PidProtocol, loop=self.loop)
+        self.assertEqual(3, sup._size)
+        self.assertEqual('Supervisor<workers=[]>', repr(sup))
+
+    def test_worker_connections(self):
+        supervisor = unittest.mock.Mock()
+        worker = server.Worker(supervisor, -1, -1)
+        transport = unittest.mock.Mock()
+        worker._handle_connection(transport)
+        self.assertEqual(1, worker.connections)
+        supervisor.connection_handler.assert_called_with(transport)
+
+        closed, = transport.add_close_callback.call_args[0]
+        closed()
+        self.assertEqual(0, worker.connections)
+
+    def test_serve(self):
+        sup = self.start()
+        self.assertEqual(2, len(sup.workers))
+        self.assertNotIn(os.getpid(), sup.workers)
+        self.assertIn(self.ask_pid(sup), sup.workers)
+
+    @unittest.skipUnless(hasattr(socket, 'SO_REUSEPORT'), 'no SO_REUSEPORT')
+    def test_serve_reuse_port(self):
+        sup = self.start(reuse_port=True)
+        self.assertNotEqual(0, sup.port)
+        self.assertIn(self.ask_pid(sup), sup.workers)
+
+    def test_respawn(self):
+        sup = self.start(respawn_delay=0)
+        old = sup.workers
+        os.kill(old[0], signal.SIGKILL)
+        self.run_until(lambda: len(sup.workers) == 2 and
+                       sup.workers != old)
+        self.assertIn(old[1], sup.workers)
+        self.assertNotIn(old[0], sup.workers)
+
+    def test_hung_worker(self):
+        sup = self.start(workers=1, heartbeat_interval=0.05,
+                         heartbeat_timeout=0.3, respawn_delay=0)
+        old, = sup.workers
+        os.kill(old, signal.SIGSTOP)
+        self.run_until(lambda: sup.workers and sup.workers != [old])
+        self.assertRaises(ProcessLookupError, os.kill, old, 0)
+
+    def test_reload(self):
+        sup = self.start()
+        old = set(sup.workers)
+        self.loop.run_until_complete(sup.reload(), timeout=30)
+        self.assertEqual(2, len(sup.workers))
+        self.assertFalse(old & set(sup.workers))
+        self.assertIn(self.ask_pid(sup), sup.workers)
+
+    def test_messages(self):
+        received = []
+        sup = self.start(on_start=echo_messages,
+                         on_message=lambda pid, data: received.append(
+                             (pid, data)))
+        sup.send('hello')
+        self.run_until(lambda: len(received) == 2)
+        self.assertEqual(sorted((pid, [pid, 'hello']) for pid in sup.workers),
+                         sorted(received))
+
+        received.clear()
+        pid = sup.workers[0]
+        sup.send({'a': 1}, pid=pid)
+        self.run_until(lambda: received)
+        self.assertEqual([(pid, [pid, {'a': 1}])], received)
+
+    def test_stop(self):
+        sup = self.start()
+        pids = sup.workers
+        self.loop.run_until_complete(sup.stop(), timeout=30)
+        self.supervisor = None
+        self.assertEqual([], sup.workers)
+        self.assertEqual([], sup.sockets)
+        for pid in pids:
+            self.assertRaises(ProcessLookupError, os.kill, pid, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 """Tests for streams.py."""
 
 import unittest
+import unittest.mock
 
 from tulip import events
 from tulip import streams
@@ -266,6 +267,63 @@ class StreamReaderTests(unittest.TestCase):
         stream.set_exception(exc)
         self.assertIs(stream.exception(), exc)
 
+    def test_pause_resume(self):
+        tr = unittest.mock.Mock()
+        stream = streams.StreamReader(limit=4)
+        stream.set_transport(tr)
+
+        stream.feed_data(b'1234')
+        stream.feed_data(b'5678')
+        self.assertFalse(tr.pause.called)
+        stream.feed_data(b'9\n')
+        tr.pause.assert_called_with()
+
+        data = self.loop.run_until_complete(stream.read(5))
+        self.assertEqual(b'12345', data)
+        self.assertFalse(tr.resume.called)
+        data = self.loop.run_until_complete(stream.read(1))
+        self.assertEqual(b'6', data)
+        tr.resume.assert_called_with()
+
+    def test_pause_wait_for_data(self):
+        tr = unittest.mock.Mock()
+        stream = streams.StreamReader(limit=2)
+        stream.set_transport(tr)
+        stream.feed_data(b'12345')
+        tr.pause.assert_called_with()
+
+        read_task = tasks.Task(stream.readexactly(6))
+
+        def cb():
+            tr.resume.assert_called_with()
+            stream.feed_data(b'6')
+        self.loop.call_soon(cb)
+
+        data = self.loop.run_until_complete(read_task)
+        self.assertEqual(b'123456', data)
+
+    def test_pause_not_implemented(self):
+        tr = unittest.mock.Mock()
+        tr.pause.side_effect = NotImplementedError
+        stream = streams.StreamReader(limit=1)
+        stream.set_transport(tr)
+
+        stream.feed_data(b'123')
+        stream.feed_data(b'456')
+        self.assertEqual(1, tr.pause.call_count)
+        self.assertIsNone(stream._transport)
+
+    def test_pause_feed_eof(self):
+        tr = unittest.mock.Mock()
+        stream = streams.StreamReader(limit=1)
+        stream.set_transport(tr)
+        stream.feed_data(b'123')
+        stream.feed_eof()
+
+        data = self.loop.run_until_complete(stream.read())
+        self.assertEqual(b'123', data)
+        self.assertFalse(tr.resume.called)
+
     def test_exception_waiter(self):
         stream = streams.StreamReader()
 
@@ -43,6 +43,54 @@ class TaskTests(unittest.TestCase):
         self.assertIs(t._loop, loop)
         loop.close()
 
+    def test_task_idle(self):
+        calls = []
+
+        @tasks.coroutine
+        def background():
+            calls.append('idle')
+            yield from tasks.sleep(0, loop=self.loop)
+            calls.append('idle')
+
+        @tasks.coroutine
+        def busy():
+            for _ in range(3):
+                calls.append('busy')
+                yield from tasks.sleep(0, loop=self.loop)
+
+        t = tasks.Task(background(), loop=self.loop, idle=True)
+        self.loop.run_until_complete(tasks.wait(
+            [t, tasks.Task(busy(), loop=self.loop)], loop=self.loop))
+        self.assertEqual(['busy'] * 3 + ['idle'] * 2, calls)
+
+    def test_task_accounting(self):
+        @tasks.coroutine
+        def busy():
+            for _ in range(3):
+                t0 = time.monotonic()
+                while time.monotonic() - t0 < 0.01:
+                    pass
+                yield from tasks.sleep(0, loop=self.loop)
+
+        @tasks.coroutine
+        def lazy():
+            yield from tasks.sleep(0, loop=self.loop)
+
+        self.assertEqual([], self.loop.top_tasks())
+        self.loop.set_task_accounting(True)
+        self.loop.run_until_complete(tasks.wait(
+            [tasks.Task(busy()), tasks.Task(lazy())], loop=self.loop))
+
+        top = self.loop.top_tasks()
+        self.assertTrue(top[0].name.endswith('busy'))
+        self.assertEqual(4, top[0].steps)
+        self.assertGreaterEqual(top[0].wall_time, 0.03)
+        self.assertGreater(top[0].cpu_time, 0)
+        lazy_stats, = [s for s in top if s.name.endswith('lazy')]
+        self.assertEqual(2, lazy_stats.steps)
+        self.loop.set_task_accounting(False)
+        self.assertEqual([], self.loop.top_tasks())
+
     def test_task_decorator(self):
         @tasks.task
         def notmuch():
@@ -594,6 +642,17 @@ class TaskTests(unittest.TestCase):
         test_utils.run_briefly(self.loop)
         self.assertTrue(handle._cancelled)
 
+    @unittest.mock.patch('tulip.events.tulip_log')
+    def test_sleep_cancel_timer_ready(self, m_log):
+        t = tasks.Task(tasks.sleep(0, 'yeah'))
+        test_utils.run_briefly(self.loop)
+
+        # The timer is due before the Task gets to handle the cancel.
+        t.cancel()
+        self.assertRaises(
+            futures.CancelledError, self.loop.run_until_complete, t)
+        self.assertFalse(m_log.exception.called)
+
     def test_task_cancel_sleeping_task(self):
         sleepfut = None
 
@@ -746,6 +805,31 @@ class TaskTests(unittest.TestCase):
             yield
         self.assertTrue(tasks.iscoroutinefunction(fn2))
 
+    def test_coro_frames(self):
+        fut = futures.Future()
+
+        @tasks.coroutine
+        def inner():
+            yield from fut
+
+        @tasks.coroutine
+        def outer():
+            yield from inner()
+
+        coro = outer()
+        self.assertEqual([], tasks._coro_frames(None))
+        self.assertEqual([coro.gi_frame], tasks._coro_frames(coro))
+
+        task = tasks.Task(coro)
+        test_utils.run_briefly(self.loop)
+        names = [f.f_code.co_name for f in tasks._coro_frames(coro)]
+        self.assertEqual(['outer', 'inner'], names[:2])
+
+        task.cancel()
+        self.assertRaises(
+            futures.CancelledError, self.loop.run_until_complete, task)
+        self.assertEqual([], tasks._coro_frames(coro))
+
     def test_yield_vs_yield_from(self):
         fut = futures.Future()
 
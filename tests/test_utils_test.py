@@ -0,0 +1,107 @@
+"""Tests for test_utils.py."""
+
+import threading
+import time
+import unittest
+
+from tulip import events
+from tulip import futures
+from tulip import tasks
+from tulip import test_utils
+
+
+class VirtualClockTests(unittest.TestCase):
+
+    def test_advance(self):
+        clock = test_utils.VirtualClock(10.0)
+        self.assertEqual(10.0, clock.time())
+        clock.advance(2.5)
+        self.assertEqual(12.5, clock.time())
+        self.assertRaises(ValueError, clock.advance, -1)
+
+
+class TestLoopTests(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = test_utils.TestLoop()
+        events.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+        events.set_event_loop(None)
+
+    def test_sleep(self):
+        t0 = time.monotonic()
+        self.loop.run_until_complete(tasks.sleep(3600, loop=self.loop))
+        self.assertEqual(3600, self.loop.time())
+        self.assertLess(time.monotonic() - t0, 1)
+
+    def test_timers_order(self):
+        calls = []
+        self.loop.call_later(2, calls.append, 2)
+        self.loop.call_later(1, calls.append, 1)
+        self.loop.call_later(3, self.loop.stop)
+        self.loop.run_forever()
+        self.assertEqual([1, 2], calls)
+        self.assertEqual(3, self.loop.time())
+
+    def test_run_until_complete_timeout(self):
+        f = futures.Future(loop=self.loop)
+        self.assertRaises(futures.TimeoutError,
+                          self.loop.run_until_complete, f, timeout=60)
+        self.assertEqual(60, self.loop.time())
+
+    def test_wait_timeout(self):
+        a = tasks.Task(tasks.sleep(10, loop=self.loop), loop=self.loop)
+        b = tasks.Task(tasks.sleep(20, loop=self.loop), loop=self.loop)
+        done, pending = self.loop.run_until_complete(
+            tasks.wait([a, b], timeout=15, loop=self.loop))
+        self.assertEqual({a}, done)
+        self.assertEqual({b}, pending)
+        self.assertEqual(15, self.loop.time())
+        b.cancel()
+        test_utils.run_briefly(self.loop)
+
+    def test_long_simulation(self):
+        ticks = []
+
+        @tasks.coroutine
+        def heartbeat():
+            for _ in range(24 * 60):
+                yield from tasks.sleep(60, loop=self.loop)
+                ticks.append(self.loop.time())
+
+        self.loop.run_until_complete(heartbeat())
+        self.assertEqual(24 * 60, len(ticks))
+        self.assertEqual(24 * 3600, self.loop.time())
+
+    def test_advance_time(self):
+        calls = []
+        self.loop.call_later(5, calls.append, 'x')
+        self.loop.advance_time(10)
+        test_utils.run_briefly(self.loop)
+        self.assertEqual(['x'], calls)
+        self.assertEqual(10, self.loop.time())
+
+    def test_shared_clock(self):
+        other = test_utils.TestLoop(self.loop.clock)
+        self.addCleanup(other.close)
+        self.loop.advance_time(7)
+        self.assertEqual(7, other.time())
+
+    def test_call_soon_threadsafe(self):
+        f = futures.Future(loop=self.loop)
+
+        def wake():
+            time.sleep(0.01)
+            self.loop.call_soon_threadsafe(f.set_result, 'done')
+
+        thread = threading.Thread(target=wake)
+        thread.start()
+        self.assertEqual('done', self.loop.run_until_complete(f))
+        thread.join()
+        self.assertEqual(0, self.loop.time())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+"""Tests for timers.py."""
+
+import unittest
+import unittest.mock
+
+from tulip import events
+from tulip import timers
+
+
+def _timer(when):
+    return events.TimerHandle(when, lambda: None, ())
+
+
+class TimerWheelTests(unittest.TestCase):
+
+    def test_ctor_errors(self):
+        self.assertRaises(ValueError, timers.TimerWheel, 0)
+        self.assertRaises(ValueError, timers.TimerWheel, 0.1, levels=0)
+        self.assertRaises(ValueError, timers.TimerWheel, 0.1, levels=1)
+        self.assertRaises(ValueError, timers.TimerWheel, 0.1, bits=0)
+
+    def test_repr(self):
+        wheel = timers.TimerWheel(0.5)
+        self.assertEqual('TimerWheel<resolution=0.5, timers=0>', repr(wheel))
+
+    def test_empty(self):
+        wheel = timers.TimerWheel(1.0)
+        self.assertEqual(0, len(wheel))
+        self.assertIsNone(wheel.next_expiry())
+        self.assertEqual([], wheel.advance(100.0))
+
+    def test_insert_advance(self):
+        wheel = timers.TimerWheel(1.0)
+        h1 = _timer(105.0)
+        h2 = _timer(103.5)
+        wheel.insert(h1, 100.0)
+        wheel.insert(h2, 100.0)
+        self.assertEqual(2, len(wheel))
+        self.assertEqual(104.0, wheel.next_expiry())
+
+        self.assertEqual([], wheel.advance(103.9))
+        self.assertEqual([h2], wheel.advance(104.0))
+        self.assertEqual(105.0, wheel.next_expiry())
+        self.assertEqual([h1], wheel.advance(110.0))
+        self.assertEqual(0, len(wheel))
+
+    def test_never_early(self):
+        wheel = timers.TimerWheel(1.0)
+        h = _timer(100.2)
+        wheel.insert(h, 100.0)
+        self.assertEqual([], wheel.advance(100.9))
+        self.assertEqual([h], wheel.advance(101.0))
+
+    def test_overdue(self):
+        wheel = timers.TimerWheel(1.0)
+        h = _timer(50.0)
+        wheel.insert(h, 100.0)
+        self.assertEqual([h], wheel.advance(101.0))
+
+    def test_cancelled_dropped(self):
+        wheel = timers.TimerWheel(1.0)
+        h1 = _timer(105.0)
+        h2 = _timer(105.0)
+        wheel.insert(h1, 100.0)
+        wheel.insert(h2, 100.0)
+        h1.cancel()
+        self.assertEqual([h2], wheel.advance(106.0))
+        self.assertEqual(0, len(wheel))
+
+    def test_cascade(self):
+        wheel = timers.TimerWheel(1.0, levels=3, bits=2)
+        handles = [_timer(100.0 + d) for d in (3, 7, 13, 40, 63)]
+        for h in handles:
+            wheel.insert(h, 100.0)
+        self.assertEqual(5, len(wheel))
+
+        fired = []
+        now = 100.0
+        while now < 200.0:
+            now += 1.0
+            for h in wheel.advance(now):
+                self.assertLessEqual(h._when, now)
+                fired.append((h, now))
+        self.assertEqual(handles, [h for h, _ in fired])
+        self.assertEqual([h._when for h in handles], [t for _, t in fired])
+
+    def test_overflow(self):
+        wheel = timers.TimerWheel(1.0, levels=2, bits=2)
+        h = _timer(150.0)
+        wheel.insert(h, 100.0)
+
+        fired = []
+        now = 100.0
+        while now < 200.0 and not fired:
+            now += 1.0
+            fired.extend(wheel.advance(now))
+        self.assertEqual([h], fired)
+        self.assertEqual(150.0, now)
+
+    def test_advance_skips_idle_turns(self):
+        wheel = timers.TimerWheel(1.0, levels=2, bits=2)
+        h = _timer(114.0)
+        wheel.insert(h, 100.0)
+        self.assertEqual(104.0, wheel.next_expiry())
+        self.assertEqual([h], wheel.advance(1000.0))
+
+    def test_next_expiry_earlier_insert(self):
+        wheel = timers.TimerWheel(1.0)
+        wheel.insert(_timer(110.0), 100.0)
+        self.assertEqual(110.0, wheel.next_expiry())
+        wheel.insert(_timer(102.0), 100.0)
+        self.assertEqual(102.0, wheel.next_expiry())
+
+    def test_next_expiry_insert_after_advance(self):
+        wheel = timers.TimerWheel(1.0)
+        wheel.insert(_timer(103.0), 100.0)
+        self.assertEqual([], wheel.advance(101.0))
+        wheel.insert(_timer(108.0), 101.0)
+        self.assertEqual(103.0, wheel.next_expiry())
+
+    def test_clear(self):
+        wheel = timers.TimerWheel(1.0)
+        h1 = _timer(105.0)
+        h2 = _timer(500.0)
+        h3 = _timer(500.0)
+        for h in (h1, h2, h3):
+            wheel.insert(h, 100.0)
+        h3.cancel()
+        self.assertEqual({h1, h2}, set(wheel.clear()))
+        self.assertEqual(0, len(wheel))
+        self.assertIsNone(wheel.next_expiry())
+
+
+if __name__ == '__main__':
+    unittest.main()
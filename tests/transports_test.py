@@ -3,6 +3,9 @@
 import unittest
 import unittest.mock
 
+from tulip import events
+from tulip import tasks
+from tulip import test_utils
 from tulip import transports
 
 
@@ -40,9 +43,156 @@ class TransportTests(unittest.TestCase):
         self.assertRaises(NotImplementedError, transport.pause_writing)
         self.assertRaises(NotImplementedError, transport.resume_writing)
         self.assertRaises(NotImplementedError, transport.discard_output)
+        self.assertRaises(NotImplementedError,
+                          transport.set_write_buffer_limits)
+        self.assertRaises(NotImplementedError,
+                          transport.get_write_buffer_size)
+        self.assertRaises(NotImplementedError, transport.drain)
 
     def test_dgram_not_implemented(self):
         transport = transports.DatagramTransport()
 
         self.assertRaises(NotImplementedError, transport.sendto, 'data')
         self.assertRaises(NotImplementedError, transport.abort)
+
+
+class FlowControlTransport(transports._FlowControlMixin,
+                           transports.WriteTransport):
+
+    def __init__(self, protocol):
+        super().__init__()
+        self._protocol = protocol
+        self._conn_lost = 0
+        self.size = 0
+
+    def get_write_buffer_size(self):
+        return self.size
+
+
+class FlowControlMixinTests(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = test_utils.TestLoop()
+        events.set_event_loop(self.loop)
+        self.protocol = unittest.mock.Mock()
+        self.transport = FlowControlTransport(self.protocol)
+
+    def tearDown(self):
+        self.loop.close()
+        events.set_event_loop(None)
+
+    def test_set_write_buffer_limits(self):
+        tr = self.transport
+        tr.set_write_buffer_limits(low=10)
+        self.assertEqual((40, 10), (tr._high_water, tr._low_water))
+        tr.set_write_buffer_limits(high=100)
+        self.assertEqual((100, 25), (tr._high_water, tr._low_water))
+        tr.set_write_buffer_limits()
+        self.assertEqual((64 * 1024, 16 * 1024),
+                         (tr._high_water, tr._low_water))
+        self.assertRaises(ValueError, tr.set_write_buffer_limits, 1, 2)
+        self.assertRaises(ValueError, tr.set_write_buffer_limits, 1, -1)
+
+    def test_pause_resume(self):
+        tr = self.transport
+        tr.set_write_buffer_limits(high=100, low=10)
+        tr.size = 100
+        tr._maybe_pause_protocol()
+        self.assertFalse(self.protocol.pause_writing.called)
+        self.assertTrue(tr.drain().done())
+
+        tr.size = 101
+        tr._maybe_pause_protocol()
+        tr._maybe_pause_protocol()
+        self.assertEqual(1, self.protocol.pause_writing.call_count)
+        waiter = tr.drain()
+        waiter2 = tr.drain()
+        self.assertIsNot(waiter, waiter2)
+        self.assertFalse(waiter.done())
+
+        tr.size = 11
+        tr._maybe_resume_protocol()
+        self.assertFalse(self.protocol.resume_writing.called)
+        tr.size = 10
+        tr._maybe_resume_protocol()
+        tr._maybe_resume_protocol()
+        self.assertEqual(1, self.protocol.resume_writing.call_count)
+        self.assertIsNone(waiter.result())
+        self.assertIsNone(waiter2.result())
+
+    def test_set_limits_pauses(self):
+        self.transport.size = 50
+        self.transport.set_write_buffer_limits(high=40)
+        self.assertTrue(self.protocol.pause_writing.called)
+        self.transport.set_write_buffer_limits(high=200, low=50)
+        self.assertTrue(self.protocol.resume_writing.called)
+
+    def test_connection_lost(self):
+        tr = self.transport
+        tr.size = 100 * 1024
+        tr._maybe_pause_protocol()
+        waiter = tr.drain()
+        tr._conn_lost = 1
+        tr._flow_control_lost()
+        self.assertRaises(ConnectionResetError, waiter.result)
+        self.assertRaises(ConnectionResetError, tr.drain().result)
+
+    def test_drain_cancelled(self):
+        tr = self.transport
+        tr.size = 100 * 1024
+        tr._maybe_pause_protocol()
+        tr.drain().cancel()
+        tr.size = 0
+        tr._maybe_resume_protocol()
+        self.assertTrue(self.protocol.resume_writing.called)
+
+    def test_drain_cancel_one_of_two(self):
+        tr = self.transport
+        tr.size = 100 * 1024
+        tr._maybe_pause_protocol()
+
+        @tasks.coroutine
+        def producer():
+            yield from tr.drain()
+
+        t1 = tasks.Task(producer())
+        t2 = tasks.Task(producer())
+        test_utils.run_briefly(self.loop)
+        t1.cancel()
+        test_utils.run_briefly(self.loop)
+        self.assertTrue(t1.cancelled())
+        self.assertFalse(t2.done())
+
+        tr.size = 0
+        tr._maybe_resume_protocol()
+        self.loop.run_until_complete(t2)
+        self.assertIsNone(t2.result())
+
+    @unittest.mock.patch('tulip.transports.tulip_log')
+    def test_protocol_errors(self, m_log):
+        self.protocol.pause_writing.side_effect = ValueError
+        self.protocol.resume_writing.side_effect = ValueError
+        tr = self.transport
+        tr.size = 100 * 1024
+        tr._maybe_pause_protocol()
+        tr.size = 0
+        tr._maybe_resume_protocol()
+        self.assertEqual(2, m_log.exception.call_count)
+        self.assertFalse(tr._protocol_paused)
+
+    @unittest.mock.patch('tulip.transports.tulip_log')
+    def test_protocol_without_flow_control(self, m_log):
+        tr = FlowControlTransport(object())
+        tr.size = 100 * 1024
+        tr._maybe_pause_protocol()
+        self.assertTrue(tr._protocol_paused)
+        tr.size = 0
+        tr._maybe_resume_protocol()
+        self.assertFalse(tr._protocol_paused)
+        self.assertFalse(m_log.exception.called)
+
+    def test_no_protocol(self):
+        tr = FlowControlTransport(None)
+        tr.size = 100 * 1024
+        tr._maybe_pause_protocol()
+        self.assertTrue(tr._protocol_paused)
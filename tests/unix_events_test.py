@@ -225,6 +225,24 @@ class UnixReadPipeTransportTests(unittest.TestCase):
         m_read.assert_called_with(5, tr.max_size)
         self.protocol.data_received.assert_called_with(b'data')
 
+    @unittest.mock.patch('os.readv')
+    @unittest.mock.patch('fcntl.fcntl')
+    def test__read_ready_buffered(self, m_fcntl, m_readv):
+        protocol = unittest.mock.Mock(spec_set=protocols.BufferedProtocol)
+        buf = protocol.get_buffer.return_value = bytearray(10)
+        tr = unix_events._UnixReadPipeTransport(self.loop, self.pipe)
+        tr.register_protocol(protocol)
+
+        m_readv.return_value = 4
+        tr._read_ready()
+        protocol.get_buffer.assert_called_with(tr.max_size)
+        m_readv.assert_called_with(5, [buf])
+        protocol.buffer_updated.assert_called_with(4)
+
+        m_readv.return_value = 0
+        tr._read_ready()
+        protocol.eof_received.assert_called_with()
+
     @unittest.mock.patch('os.read')
     @unittest.mock.patch('fcntl.fcntl')
     def test__read_ready_eof(self, m_fcntl, m_read):
@@ -409,6 +427,26 @@ class UnixWritePipeTransportTests(unittest.TestCase):
         self.loop.add_writer.assert_called_with(5, tr._write_ready)
         self.assertEqual([b'data'], tr._buffer)
 
+    @unittest.mock.patch('os.write')
+    @unittest.mock.patch('fcntl.fcntl')
+    def test_write_flow_control(self, m_fcntl, m_write):
+        tr = unix_events._UnixWritePipeTransport(self.loop, self.pipe)
+        tr.register_protocol(self.protocol)
+        tr.set_write_buffer_limits(high=4, low=2)
+
+        m_write.side_effect = BlockingIOError()
+        tr.write(b'data')
+        self.assertFalse(self.protocol.pause_writing.called)
+        tr.write(b'x')
+        self.assertEqual(5, tr.get_write_buffer_size())
+        self.protocol.pause_writing.assert_called_with()
+
+        m_write.side_effect = None
+        m_write.return_value = 3
+        tr._write_ready()
+        self.assertEqual(2, tr.get_write_buffer_size())
+        self.protocol.resume_writing.assert_called_with()
+
     @unittest.mock.patch('tulip.unix_events.tulip_log')
     @unittest.mock.patch('os.write')
     @unittest.mock.patch('fcntl.fcntl')
@@ -583,3 +621,133 @@ class UnixWritePipeTransportTests(unittest.TestCase):
         tr.write_eof()
         self.assertTrue(tr._closing)
         self.assertFalse(self.protocol.connection_lost.called)
+
+
+class UnixEdgeReadPipeTransportTests(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = unittest.mock.Mock(
+            spec_set=unix_events.SelectorEventLoop)
+        self.pipe = unittest.mock.Mock(spec_set=io.RawIOBase)
+        self.pipe.fileno.return_value = 5
+        self.protocol = unittest.mock.Mock(spec_set=protocols.Protocol)
+        patcher = unittest.mock.patch('fcntl.fcntl')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.transport = unix_events._UnixEdgeReadPipeTransport(
+            self.loop, self.pipe)
+        self.transport.register_protocol(self.protocol)
+
+    def test_register_protocol(self):
+        self.loop._add_edge_triggered.assert_called_with(
+            5, self.transport._read_ready, None)
+
+    @unittest.mock.patch('os.read')
+    def test__read_ready(self, m_read):
+        m_read.side_effect = [b'data1', b'data2', BlockingIOError]
+        self.transport._read_ready()
+        self.assertEqual([unittest.mock.call(b'data1'),
+                          unittest.mock.call(b'data2')],
+                         self.protocol.data_received.call_args_list)
+
+    @unittest.mock.patch('os.read')
+    def test__read_ready_eof(self, m_read):
+        m_read.return_value = b''
+        self.transport._read_ready()
+        self.loop.remove_reader.assert_called_with(5)
+        self.protocol.eof_received.assert_called_with()
+        self.assertEqual(1, m_read.call_count)
+
+    @unittest.mock.patch('os.read')
+    def test_pause_resume(self, m_read):
+        m_read.return_value = b'data'
+        self.protocol.data_received.side_effect = (
+            lambda data: self.transport.pause())
+        self.transport._read_ready()
+        self.assertEqual(1, m_read.call_count)
+        self.transport._read_ready()
+        self.assertEqual(1, m_read.call_count)
+        self.assertFalse(self.loop.remove_reader.called)
+
+        self.transport.resume()
+        self.loop.call_soon.assert_called_with(self.transport._read_ready)
+
+
+class UnixEdgeWritePipeTransportTests(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = unittest.mock.Mock(
+            spec_set=unix_events.SelectorEventLoop)
+        self.pipe = unittest.mock.Mock(spec_set=io.RawIOBase)
+        self.pipe.fileno.return_value = 5
+        self.protocol = unittest.mock.Mock(spec_set=protocols.Protocol)
+        patcher = unittest.mock.patch('fcntl.fcntl')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.transport = unix_events._UnixEdgeWritePipeTransport(
+            self.loop, self.pipe)
+        self.transport.register_protocol(self.protocol)
+
+    def test_register_protocol(self):
+        self.loop._add_edge_triggered.assert_called_with(
+            5, None, self.transport._write_ready)
+
+    @unittest.mock.patch('os.write')
+    def test_write(self, m_write):
+        m_write.side_effect = [2, BlockingIOError]
+        self.transport.write(b'data')
+        self.assertEqual([b'ta'], self.transport._buffer)
+        self.transport.write(b'more')
+        self.assertEqual([b'ta', b'more'], self.transport._buffer)
+        self.assertEqual(2, m_write.call_count)
+        self.assertFalse(self.loop.add_writer.called)
+
+    @unittest.mock.patch('os.write')
+    def test__write_ready(self, m_write):
+        self.transport._write_ready()
+        self.assertFalse(m_write.called)
+
+        self.transport._buffer = [b'da', b'ta']
+        m_write.return_value = 4
+        self.transport._write_ready()
+        m_write.assert_called_with(5, b'data')
+        self.assertEqual([], self.transport._buffer)
+        self.assertFalse(self.loop.remove_writer.called)
+
+    @unittest.mock.patch('os.write')
+    def test__write_ready_err(self, m_write):
+        self.transport._buffer = [b'data']
+        m_write.side_effect = err = OSError()
+        self.transport._fatal_error = unittest.mock.Mock()
+        self.transport._write_ready()
+        self.transport._fatal_error.assert_called_with(err)
+
+    @unittest.mock.patch('os.write')
+    def test_write_eof(self, m_write):
+        self.transport._buffer = [b'data']
+        self.transport.write_eof()
+        self.assertFalse(self.loop.remove_writer.called)
+
+        m_write.return_value = 4
+        self.transport._write_ready()
+        self.loop.remove_writer.assert_called_with(5)
+        self.protocol.connection_lost.assert_called_with(None)
+
+    def test_write_eof_empty(self):
+        self.transport.write_eof()
+        self.loop.remove_writer.assert_called_with(5)
+        self.loop.call_soon.assert_called_with(
+            self.transport._call_connection_lost, None)
+
+    @unittest.mock.patch('os.write')
+    def test_write_flow_control(self, m_write):
+        self.transport.set_write_buffer_limits(high=4, low=2)
+        m_write.side_effect = [1, BlockingIOError]
+        self.transport.write(b'123456')
+        self.assertEqual(5, self.transport.get_write_buffer_size())
+        self.assertTrue(self.protocol.pause_writing.called)
+
+        m_write.side_effect = [4, BlockingIOError]
+        self.transport._write_ready()
+        self.assertEqual(1, self.transport.get_write_buffer_size())
+        self.assertTrue(self.protocol.resume_writing.called)
@@ -16,8 +16,11 @@ to modify the meaning of the API call itself.
 
 import collections
 import concurrent.futures
+import concurrent.futures.process
 import heapq
-import logging
+import itertools
+import multiprocessing
+import pickle
 import socket
 import time
 import os
@@ -25,6 +28,8 @@ import sys
 
 from . import events
 from . import futures
+from . import monitor
+from . import resolver
 from . import tasks
 from .log import tulip_log
 
@@ -35,6 +40,196 @@ __all__ = ['BaseEventLoop']
 # Argument for default thread pool executor creation.
 _MAX_WORKERS = 5
 
+# Rebuild the heap of scheduled timers when it holds more than this
+# many timers and more than this fraction of them is cancelled.
+_MIN_SCHEDULED_TIMER_HANDLES = 100
+_MIN_CANCELLED_TIMER_HANDLES_FRACTION = 0.5
+
+
+# Statistics about one iteration of the event loop, passed to the
+# callbacks registered with add_iteration_hook():
+# - poll_timeout: timeout passed to the selector (None means forever)
+# - poll_time: seconds spent waiting in the selector
+# - events: number of I/O events returned by the selector
+# - ran: number of ready callbacks run during the iteration
+# - ready: number of callbacks left in the ready queue afterwards,
+#   idle callbacks included
+# - timers: number of pending timers, as in timer_counts()
+# - fds: number of file descriptors registered with the selector
+IterationStats = collections.namedtuple(
+    'IterationStats',
+    ['poll_timeout', 'poll_time', 'events', 'ran', 'ready', 'timers', 'fds'])
+
+
+# A callback that ran longer than the loop's slow callback duration:
+# - duration: seconds the callback took
+# - callback: repr() of the callback
+# - coroutine: name of the Task's coroutine, or None for plain callbacks
+# - frame: (filename, lineno, name) of the innermost frame the Task's
+#   coroutine is suspended in, or of the callback's code; None if unknown
+SlowCallback = collections.namedtuple(
+    'SlowCallback', ['duration', 'callback', 'coroutine', 'frame'])
+
+
+# How many iterations of the event loop stopped running ready callbacks
+# early because of the budget set with set_iteration_budget():
+# - callbacks: because max_callbacks callbacks had run
+# - time: because max_time seconds had passed
+BudgetHits = collections.namedtuple('BudgetHits', ['callbacks', 'time'])
+
+
+def _describe_slow_callback(handle, duration):
+    callback = handle._callback
+    coroutine = frame = None
+    task = getattr(callback, '__self__', None)
+    if isinstance(task, tasks.Task):
+        coro = task._coro
+        coroutine = getattr(coro, '__qualname__', coro.__name__)
+        # The innermost frame is usually Future.__iter__(); skip it.
+        frames = [f for f in tasks._coro_frames(coro)
+                  if f.f_code is not futures.Future.__iter__.__code__]
+        if frames:
+            f = frames[-1]
+            frame = (f.f_code.co_filename, f.f_lineno, f.f_code.co_name)
+        callback = task
+    else:
+        code = getattr(getattr(callback, '__func__', callback),
+                       '__code__', None)
+        if code is not None:
+            frame = (code.co_filename, code.co_firstlineno, code.co_name)
+    return SlowCallback(duration, repr(callback), coroutine, frame)
+
+
+def _process_pool_size():
+    """Default number of workers for the loop's process pool."""
+    try:
+        return multiprocessing.cpu_count()
+    except NotImplementedError:
+        return 1
+
+
+def _run_pickled(payload):
+    """Run a pickled (fn, args) pair in a worker process.
+
+    The result is pickled here as well, so that an unpicklable result
+    is reported as an exception instead of breaking the process pool.
+    """
+    fn, args = pickle.loads(payload)
+    result = fn(*args)
+    try:
+        return pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+    except Exception as exc:
+        raise pickle.PicklingError(
+            'cannot pickle result of {!r}: {}'.format(fn, exc)) from None
+
+
+def _interleave_addrinfos(infos):
+    """Reorder getaddrinfo() results to alternate address families.
+
+    The relative order within each family is kept, and the family of
+    the first entry goes first (RFC 8305, section 4).
+    """
+    by_family = collections.OrderedDict()
+    for info in infos:
+        by_family.setdefault(info[0], []).append(info)
+    groups = list(by_family.values())
+    return [info
+            for infos in itertools.zip_longest(*groups)
+            for info in infos if info is not None]
+
+
+def _map_chunk(fn, chunk):
+    """Run fn over a chunk of items, in an executor."""
+    return [fn(item) for item in chunk]
+
+
+class _ExecutorMap:
+    """Results of BaseEventLoop.map_in_executor().
+
+    Items are handed to the executor in chunks, and every chunk costs
+    one executor job and at most one wakeup of the event loop.  At
+    most max_pending chunks are submitted but not yet read; the next
+    chunk is only submitted when the consumer reads a batch, so a slow
+    consumer throttles the producer.
+    """
+
+    def __init__(self, loop, executor, fn, iterable, chunksize,
+                 ordered, max_pending):
+        self._loop = loop
+        self._executor = executor
+        self._fn = fn
+        self._items = iter(iterable)
+        self._chunksize = chunksize
+        self._ordered = ordered
+        self._max_pending = max_pending
+        self._pending = 0  # Chunks submitted and not read yet.
+        self._submitted = 0  # Index of the next chunk to submit.
+        self._delivered = 0  # Index of the next chunk to deliver in order.
+        self._finished = {}  # Finished chunks waiting for their turn.
+        self._ready = collections.deque()  # Chunks that can be read.
+        self._jobs = set()
+        self._exhausted = False
+        self._waiter = None
+        self._submit()
+
+    def _submit(self):
+        while not self._exhausted and self._pending < self._max_pending:
+            chunk = list(itertools.islice(self._items, self._chunksize))
+            if not chunk:
+                self._exhausted = True
+                break
+            index = self._submitted
+            self._submitted += 1
+            self._pending += 1
+            job = self._executor.submit(_map_chunk, self._fn, chunk)
+            self._jobs.add(job)
+            job.add_done_callback(
+                lambda job, index=index: self._loop.call_soon_threadsafe(
+                    self._job_done, index, job))
+
+    def _job_done(self, index, job):
+        self._jobs.discard(job)
+        if self._ordered:
+            self._finished[index] = job
+            while self._delivered in self._finished:
+                self._ready.append(self._finished.pop(self._delivered))
+                self._delivered += 1
+        else:
+            self._ready.append(job)
+
+        waiter = self._waiter
+        if waiter is not None and self._ready:
+            self._waiter = None
+            if not waiter.done():
+                waiter.set_result(None)
+
+    @tasks.coroutine
+    def read(self):
+        """Return the next batch of results as a list.
+
+        Return None when all results have been read.  If fn raised an
+        exception for an item of the batch, that exception is raised.
+        """
+        while not self._ready:
+            if not self._pending:
+                return None
+            assert self._waiter is None, 'read() is already waiting'
+            self._waiter = futures.Future(loop=self._loop)
+            yield from self._waiter
+
+        job = self._ready.popleft()
+        self._pending -= 1
+        self._submit()
+        if job.cancelled():
+            raise futures.CancelledError
+        return job.result()
+
+    def cancel(self):
+        """Stop submitting chunks and cancel those not started yet."""
+        self._exhausted = True
+        for job in list(self._jobs):
+            job.cancel()
+
 
 class _StopError(BaseException):
     """Raised to stop the event loop."""
@@ -48,9 +243,28 @@ class BaseEventLoop(events.AbstractEventLoop):
 
     def __init__(self):
         self._ready = collections.deque()
+        self._ready_io = collections.deque()  # I/O and signal callbacks.
+        self._idle = collections.deque()
         self._scheduled = []
+        self._timer_cancelled_count = 0
+        self._timer_wheel = None
+        self._iteration_hooks = []
+        self._slow_callback_duration = None
+        self._slow_callbacks = None
+        self._max_callbacks = None
+        self._max_time = None
+        self._callback_budget_hits = 0
+        self._time_budget_hits = 0
+        self._task_accounting = None
+        self._task_dump_signal = None
+        self._lag_monitor = None
         self._default_executor = None
+        self._process_pool = None
+        self._process_pool_size = None
+        self._resolver = None
         self._internal_fds = 0
+        self._fd_changes = {}  # fd -> (events, data) for the selector.
+        self._wakeup_pending = False  # A byte is on its way to the self-pipe.
         self._running = False
 
     def _make_socket_transport(self, sock, waiter=None, *,
@@ -78,6 +292,25 @@ class BaseEventLoop(events.AbstractEventLoop):
         """Create write pipe transport."""
         raise NotImplementedError
 
+    def _make_connection_limit(self, max_connections):
+        """Create the connection count for start_serving()."""
+        raise NotImplementedError
+
+    def close(self):
+        """Close the event loop.
+
+        This shuts down the process pool used by run_in_process() and
+        the resolver's executor, without waiting for jobs still running
+        in them.
+        """
+        pool = self._process_pool
+        if pool is not None:
+            self._process_pool = None
+            pool.shutdown(wait=False)
+        if self._resolver is not None:
+            self._resolver.close()
+            self._resolver = None
+
     def _read_from_self(self):
         """XXX"""
         raise NotImplementedError
@@ -90,6 +323,10 @@ class BaseEventLoop(events.AbstractEventLoop):
         """Process selector events."""
         raise NotImplementedError
 
+    def _apply_fd_changes(self):
+        """Pass the changes recorded in _fd_changes to the selector."""
+        raise NotImplementedError
+
     def run_forever(self):
         """Run until stop() is called."""
         if self._running:
@@ -175,15 +412,201 @@ class BaseEventLoop(events.AbstractEventLoop):
 
         Any positional arguments after the callback will be passed to
         the callback when it is called.
+
+        If a timer wheel is set (see set_timer_wheel()) and the delay
+        is at least the wheel's min_delay, the callback is put on the
+        wheel and may be called up to one wheel tick late.
         """
         return self.call_at(self.time() + delay, callback, *args)
 
     def call_at(self, when, callback, *args):
         """Like call_later(), but uses an absolute time."""
-        timer = events.TimerHandle(when, callback, args)
+        timer = events.TimerHandle(when, callback, args, self)
+        wheel = self._timer_wheel
+        if wheel is not None:
+            now = self.time()
+            if when - now >= wheel.min_delay:
+                wheel.insert(timer, now)
+                return timer
+        timer._scheduled = True
         heapq.heappush(self._scheduled, timer)
         return timer
 
+    def set_timer_wheel(self, wheel):
+        """Use a timers.TimerWheel for coarse timers, or None for none.
+
+        Timers still pending on a previously set wheel are moved to
+        the heap.
+        """
+        old_wheel = self._timer_wheel
+        self._timer_wheel = wheel
+        if old_wheel is not None:
+            for timer in old_wheel.clear():
+                timer._scheduled = True
+                heapq.heappush(self._scheduled, timer)
+
+    def timer_counts(self):
+        """Return a (scheduled, cancelled) tuple of timer counts.
+
+        scheduled is the number of pending timers that were not
+        cancelled; cancelled is the number of cancelled timers that
+        still take up room in the heap.  Timers on the timer wheel are
+        all counted as scheduled, because the wheel drops cancelled
+        timers lazily without telling the loop.
+        """
+        scheduled = len(self._scheduled) - self._timer_cancelled_count
+        if self._timer_wheel is not None:
+            scheduled += len(self._timer_wheel)
+        return scheduled, self._timer_cancelled_count
+
+    def _timer_handle_cancelled(self, handle):
+        """Notification that a TimerHandle in the heap was cancelled."""
+        self._timer_cancelled_count += 1
+
+    def add_iteration_hook(self, callback):
+        """Call callback with an IterationStats after every iteration.
+
+        The statistics are only collected while at least one hook is
+        registered, so the loop pays nothing for them otherwise.
+        Exceptions raised by hooks are logged and otherwise ignored.
+        """
+        self._iteration_hooks.append(callback)
+
+    def remove_iteration_hook(self, callback):
+        """Remove a callback registered with add_iteration_hook().
+
+        Return True if it was registered, False if not.
+        """
+        try:
+            self._iteration_hooks.remove(callback)
+        except ValueError:
+            return False
+        return True
+
+    def _call_iteration_hooks(self, stats):
+        for hook in list(self._iteration_hooks):
+            try:
+                hook(stats)
+            except Exception:
+                tulip_log.exception('Exception in iteration hook %r', hook)
+
+    def set_slow_callback_duration(self, duration, history=100):
+        """Time every callback and report those taking too long.
+
+        Each callback (including each step of a Task) that runs for at
+        least duration seconds is logged as a warning and recorded in
+        a ring buffer holding the last `history` such callbacks.  Pass
+        None to switch the detector off again.
+        """
+        self._slow_callback_duration = duration
+        if duration is None:
+            self._slow_callbacks = None
+        else:
+            self._slow_callbacks = collections.deque(maxlen=history)
+
+    def slow_callbacks(self):
+        """Return the recorded SlowCallbacks, slowest first."""
+        if not self._slow_callbacks:
+            return []
+        return sorted(self._slow_callbacks,
+                      key=lambda info: info.duration, reverse=True)
+
+    def _report_slow_callback(self, handle, duration):
+        info = _describe_slow_callback(handle, duration)
+        self._slow_callbacks.append(info)
+        if info.frame is not None:
+            tulip_log.warning('Executing %s took %.3f seconds (%s:%s in %s)',
+                              info.callback, duration, *info.frame)
+        else:
+            tulip_log.warning('Executing %s took %.3f seconds',
+                              info.callback, duration)
+
+    def set_iteration_budget(self, max_callbacks=None, max_time=None):
+        """Limit the callbacks run by one iteration of the loop.
+
+        An iteration stops running ready callbacks once max_callbacks
+        have run or max_time seconds have passed, whichever comes
+        first; the loop then polls for I/O without blocking, runs the
+        I/O callbacks, and goes on with the backlog.  None means no
+        limit, which is the default.
+        """
+        if max_callbacks is not None and max_callbacks < 1:
+            raise ValueError('max_callbacks must be at least 1')
+        if max_time is not None and max_time <= 0:
+            raise ValueError('max_time must be positive')
+        self._max_callbacks = max_callbacks
+        self._max_time = max_time
+
+    def budget_hits(self):
+        """Return BudgetHits: how often the iteration budget was hit."""
+        return BudgetHits(self._callback_budget_hits, self._time_budget_hits)
+
+    def set_task_accounting(self, enabled, *, dump_signal=None):
+        """Switch accounting of the time spent in Tasks on or off.
+
+        While it is on, every step of every Task of the loop is timed,
+        in wall time and in CPU time of the loop's thread, and added up
+        per coroutine function; see top_tasks().  Switching it on again
+        starts from scratch.  If dump_signal is given, a handler for it
+        is added with add_signal_handler() that logs the report; it is
+        removed when accounting is switched off.
+        """
+        if enabled:
+            self._task_accounting = tasks._TaskAccounting()
+            if dump_signal is not None:
+                self.add_signal_handler(dump_signal, self.log_task_report)
+                self._task_dump_signal = dump_signal
+        else:
+            self._task_accounting = None
+            if self._task_dump_signal is not None:
+                self.remove_signal_handler(self._task_dump_signal)
+                self._task_dump_signal = None
+
+    def top_tasks(self, n=10):
+        """Return TaskStats of the n coroutines using the most CPU.
+
+        Pass None for all of them.  The list is empty while accounting
+        is off.
+        """
+        if self._task_accounting is None:
+            return []
+        return self._task_accounting.top(n)
+
+    def log_task_report(self, n=10):
+        """Log the result of top_tasks(n) as a table."""
+        lines = ['{:>10} {:>10} {:>8}  {}'.format(
+            'cpu', 'wall', 'steps', 'coroutine')]
+        for stats in self.top_tasks(n):
+            lines.append('{:>10.6f} {:>10.6f} {:>8}  {}'.format(
+                stats.cpu_time, stats.wall_time, stats.steps, stats.name))
+        tulip_log.info('Top tasks by CPU time:\n%s', '\n'.join(lines))
+
+    def start_lag_monitor(self, interval=0.1, *, threshold=None,
+                          on_lag=None):
+        """Start measuring how late the loop runs its callbacks.
+
+        A probe timer is due every interval seconds; its lag goes into
+        a histogram read with lag_stats().  on_lag(lag) is called when
+        the lag is at least threshold seconds.  A monitor started
+        earlier is replaced.  Return the monitor.LagMonitor.
+        """
+        self.stop_lag_monitor()
+        self._lag_monitor = monitor.LagMonitor(
+            self, interval, threshold=threshold, on_lag=on_lag)
+        self._lag_monitor.start()
+        return self._lag_monitor
+
+    def stop_lag_monitor(self):
+        """Stop the lag monitor; lag_stats() keeps its results."""
+        if self._lag_monitor is not None:
+            self._lag_monitor.stop()
+
+    def lag_stats(self):
+        """Return the lag monitor's LagStats, or None if never started."""
+        if self._lag_monitor is None:
+            return None
+        return self._lag_monitor.stats()
+
     def call_soon(self, callback, *args):
         """Arrange for a callback to be called as soon as possible.
 
@@ -198,12 +621,54 @@ class BaseEventLoop(events.AbstractEventLoop):
         self._ready.append(handle)
         return handle
 
+    def call_idle(self, callback, *args):
+        """Arrange for a callback to be called when the loop is idle.
+
+        Idle callbacks are called in FIFO order, one per iteration of
+        the loop, and only in iterations with no other ready callbacks;
+        use them for background work that must not delay I/O.
+        """
+        handle = events.make_handle(callback, args)
+        self._idle.append(handle)
+        return handle
+
     def call_soon_threadsafe(self, callback, *args):
-        """XXX"""
+        """Like call_soon(), but safe to call from another thread.
+
+        Only the first call after the loop last drained its self-pipe
+        writes to it; later calls piggyback on the pending wakeup.
+        """
         handle = self.call_soon(callback, *args)
-        self._write_to_self()
+        self._wakeup()
         return handle
 
+    def call_soon_threadsafe_many(self, calls):
+        """Schedule many callbacks at once from another thread.
+
+        calls is an iterable of (callback, args) pairs.  The event
+        loop is woken up at most once for the whole batch.  Return a
+        list of Handles, one per callback.
+        """
+        handles = [events.make_handle(callback, args)
+                   for callback, args in calls]
+        if handles:
+            self._ready.extend(handles)
+            self._wakeup()
+        return handles
+
+    def _wakeup(self):
+        """Wake up the selector, unless a wakeup is already pending.
+
+        This is racy on purpose: _read_from_self() clears the flag
+        after draining the self-pipe, so at worst a thread writes an
+        extra byte.  A thread that finds the flag still set has already
+        queued its callback, which the loop runs before it blocks
+        again.
+        """
+        if not self._wakeup_pending:
+            self._wakeup_pending = True
+            self._write_to_self()
+
     def run_in_executor(self, executor, callback, *args):
         if isinstance(callback, events.Handle):
             assert not args
@@ -213,29 +678,161 @@ class BaseEventLoop(events.AbstractEventLoop):
                 f.set_result(None)
                 return f
             callback, args = callback._callback, callback._args
+        executor = self._get_executor(executor)
+        return futures.wrap_future(executor.submit(callback, *args), loop=self)
+
+    def map_in_executor(self, executor, fn, iterable, *, chunksize=64,
+                        ordered=True, max_pending=2*_MAX_WORKERS):
+        """Map fn over iterable in an executor, in batches.
+
+        Items are submitted to the executor chunksize at a time.  At
+        most max_pending chunks are in flight or waiting to be read.
+        Return an object whose read() coroutine returns the results of
+        one chunk at a time, and None when all results were read:
+
+            results = loop.map_in_executor(None, fn, items)
+            while True:
+                batch = yield from results.read()
+                if batch is None:
+                    break
+                ...
+
+        If ordered is false, batches are returned as soon as they are
+        done instead of in the order of the items.  When using a
+        ProcessPoolExecutor, fn must be picklable.
+        """
+        if chunksize < 1:
+            raise ValueError('chunksize must be at least 1')
+        if max_pending < 1:
+            raise ValueError('max_pending must be at least 1')
+        executor = self._get_executor(executor)
+        return _ExecutorMap(self, executor, fn, iterable, chunksize,
+                            ordered, max_pending)
+
+    def _get_executor(self, executor):
         if executor is None:
             executor = self._default_executor
             if executor is None:
                 executor = concurrent.futures.ThreadPoolExecutor(_MAX_WORKERS)
                 self._default_executor = executor
-        return futures.wrap_future(executor.submit(callback, *args), loop=self)
+        return executor
 
     def set_default_executor(self, executor):
         self._default_executor = executor
 
+    def _get_process_pool(self, max_workers=None):
+        pool = self._process_pool
+        if pool is None:
+            if max_workers is None:
+                max_workers = _process_pool_size()
+            pool = concurrent.futures.ProcessPoolExecutor(max_workers)
+            self._process_pool = pool
+            self._process_pool_size = max_workers
+        return pool
+
+    def run_in_process(self, fn, *args):
+        """Run fn(*args) in the loop's process pool.
+
+        The pool is created on first use, with one worker per CPU.
+        Return a Future for the result.  If fn, its arguments or its
+        result cannot be pickled, the Future fails with
+        pickle.PicklingError.  If the pool broke because a worker died,
+        a new pool is started for the next call.
+        """
+        fut = futures.Future(loop=self)
+        try:
+            payload = pickle.dumps((fn, args), pickle.HIGHEST_PROTOCOL)
+        except Exception as exc:
+            fut.set_exception(pickle.PicklingError(
+                'cannot pickle {!r} for a worker process: {}'.format(
+                    fn, exc)))
+            return fut
+
+        pool = self._get_process_pool()
+        try:
+            job = pool.submit(_run_pickled, payload)
+        except concurrent.futures.process.BrokenProcessPool:
+            self._process_pool = None
+            pool.shutdown(wait=False)
+            pool = self._get_process_pool(self._process_pool_size)
+            job = pool.submit(_run_pickled, payload)
+
+        def _job_done(job):
+            if fut.cancelled():
+                return
+            if job.cancelled():
+                fut.cancel()
+                return
+            exc = job.exception()
+            if exc is None:
+                try:
+                    result = pickle.loads(job.result())
+                except Exception as exc:
+                    fut.set_exception(exc)
+                else:
+                    fut.set_result(result)
+            else:
+                fut.set_exception(exc)
+
+        job.add_done_callback(
+            lambda job: self.call_soon_threadsafe(_job_done, job))
+        return fut
+
+    @tasks.coroutine
+    def start_process_pool(self, max_workers=None):
+        """Start the worker processes of the process pool now.
+
+        By default workers are started lazily by the first
+        run_in_process() calls, which then pay for the start-up.  This
+        coroutine starts the pool (with max_workers workers, or one per
+        CPU; ignored if the pool already exists) and waits until its
+        workers have run a job.  Return the
+        set of worker process ids that answered.
+        """
+        self._get_process_pool(max_workers)
+        jobs = [self.run_in_process(os.getpid)
+                for _ in range(self._process_pool_size)]
+        yield from tasks.wait(jobs, loop=self)
+        return {job.result() for job in jobs}
+
+    def _get_resolver(self):
+        if self._resolver is None:
+            self._resolver = resolver.Resolver(loop=self)
+        return self._resolver
+
+    def set_resolver(self, resolver):
+        """Set the Resolver used by getaddrinfo() and getnameinfo().
+
+        The resolver it replaces is closed.
+        """
+        old_resolver = self._resolver
+        self._resolver = resolver
+        if old_resolver is not None and old_resolver is not resolver:
+            old_resolver.close()
+
     def getaddrinfo(self, host, port, *,
                     family=0, type=0, proto=0, flags=0):
-        return self.run_in_executor(None, socket.getaddrinfo,
-                                    host, port, family, type, proto, flags)
+        return self._get_resolver().getaddrinfo(
+            host, port, family=family, type=type, proto=proto, flags=flags)
 
     def getnameinfo(self, sockaddr, flags=0):
-        return self.run_in_executor(None, socket.getnameinfo, sockaddr, flags)
+        return self._get_resolver().getnameinfo(sockaddr, flags)
 
     @tasks.coroutine
     def create_connection(self, host=None, port=None, *,
                           ssl=None, family=0, proto=0, flags=0, sock=None,
-                          local_addr=None):
-        """XXX"""
+                          local_addr=None, happy_eyeballs_delay=None,
+                          connect_timeout=None):
+        """Connect to host and port and return a transport.
+
+        The addresses returned by getaddrinfo() are tried one after the
+        other.  If happy_eyeballs_delay is given, the addresses are
+        ordered to alternate between address families and a new attempt
+        is started whenever the previous one fails or has not succeeded
+        within that many seconds (RFC 6555/8305); the first socket to
+        connect wins and the other attempts are cancelled.
+        connect_timeout limits the time of each connection attempt.
+        """
         if host is not None or port is not None:
             if sock is not None:
                 raise ValueError(
@@ -258,40 +855,24 @@ class BaseEventLoop(events.AbstractEventLoop):
             infos = f1.result()
             if not infos:
                 raise socket.error('getaddrinfo() returned empty list')
+            laddr_infos = None
             if f2 is not None:
                 laddr_infos = f2.result()
                 if not laddr_infos:
                     raise socket.error('getaddrinfo() returned empty list')
 
             exceptions = []
-            for family, type, proto, cname, address in infos:
-                try:
-                    sock = socket.socket(family=family, type=type, proto=proto)
-                    sock.setblocking(False)
-                    if f2 is not None:
-                        for _, _, _, _, laddr in laddr_infos:
-                            try:
-                                sock.bind(laddr)
-                                break
-                            except socket.error as exc:
-                                exc = socket.error(
-                                    exc.errno, 'error while '
-                                    'attempting to bind on address '
-                                    '{!r}: {}'.format(
-                                        laddr, exc.strerror.lower()))
-                                exceptions.append(exc)
-                        else:
-                            sock.close()
-                            sock = None
-                            continue
-                    yield from self.sock_connect(sock, address)
-                except socket.error as exc:
+            if happy_eyeballs_delay is None:
+                for info in infos:
+                    sock = yield from self._connect_sock(
+                        exceptions, info, laddr_infos, connect_timeout)
                     if sock is not None:
-                        sock.close()
-                    exceptions.append(exc)
-                else:
-                    break
+                        break
             else:
+                sock = yield from self._staggered_connect(
+                    exceptions, _interleave_addrinfos(infos), laddr_infos,
+                    happy_eyeballs_delay, connect_timeout)
+            if sock is None:
                 if len(exceptions) == 1:
                     raise exceptions[0]
                 else:
@@ -321,6 +902,88 @@ class BaseEventLoop(events.AbstractEventLoop):
         yield from waiter
         return transport
 
+    @tasks.coroutine
+    def _connect_sock(self, exceptions, addr_info, laddr_infos=None,
+                      timeout=None):
+        """Create, bind and connect a socket for one getaddrinfo() entry.
+
+        Return the socket, or None if it could not be bound or
+        connected; the errors are appended to exceptions.
+        """
+        family, type, proto, _, address = addr_info
+        sock = None
+        try:
+            sock = socket.socket(family=family, type=type, proto=proto)
+            sock.setblocking(False)
+            if laddr_infos is not None:
+                for _, _, _, _, laddr in laddr_infos:
+                    try:
+                        sock.bind(laddr)
+                        break
+                    except socket.error as exc:
+                        exc = socket.error(
+                            exc.errno, 'error while '
+                            'attempting to bind on address '
+                            '{!r}: {}'.format(
+                                laddr, exc.strerror.lower()))
+                        exceptions.append(exc)
+                else:
+                    sock.close()
+                    return None
+            fut = self.sock_connect(sock, address)
+            if timeout is None:
+                yield from fut
+            else:
+                yield from tasks.wait([fut], timeout=timeout)
+                if not fut.done():
+                    fut.cancel()
+                    raise socket.timeout(
+                        'timed out connecting to {!r}'.format(address))
+                fut.result()
+        except socket.error as exc:
+            if sock is not None:
+                sock.close()
+            exceptions.append(exc)
+            return None
+        except:
+            # Cancelled, most likely because another attempt won.
+            if sock is not None:
+                sock.close()
+            raise
+        return sock
+
+    @tasks.coroutine
+    def _staggered_connect(self, exceptions, infos, laddr_infos,
+                           delay, timeout):
+        """Race connection attempts, starting one every delay seconds.
+
+        The next attempt starts early if one fails.  Return the first
+        connected socket, or None if all attempts failed.
+        """
+        infos = collections.deque(infos)
+        pending = set()
+        sock = None
+        try:
+            while sock is None and (infos or pending):
+                if infos:
+                    pending.add(tasks.Task(self._connect_sock(
+                        exceptions, infos.popleft(), laddr_infos, timeout)))
+                done, pending = yield from tasks.wait(
+                    pending, timeout=delay if infos else None,
+                    return_when=tasks.FIRST_COMPLETED)
+                for attempt in done:
+                    result = attempt.result()
+                    if result is None:
+                        continue
+                    if sock is None:
+                        sock = result
+                    else:
+                        result.close()
+        finally:
+            for attempt in pending:
+                attempt.cancel()
+        return sock
+
     @tasks.coroutine
     def create_datagram_endpoint(self,
                                  local_addr=None, remote_addr=None, *,
@@ -394,8 +1057,11 @@ class BaseEventLoop(events.AbstractEventLoop):
     @tasks.task
     def start_serving(self, connection_handler, host=None, port=None, *,
                       family=socket.AF_UNSPEC, flags=socket.AI_PASSIVE,
-                      sock=None, backlog=100, ssl=None, reuse_address=None):
+                      sock=None, backlog=100, ssl=None, reuse_address=None,
+                      max_connections=None):
         """XXX"""
+        if max_connections is not None and max_connections < 1:
+            raise ValueError('max_connections must be at least 1')
         if host is not None or port is not None:
             if sock is not None:
                 raise ValueError(
@@ -447,10 +1113,13 @@ class BaseEventLoop(events.AbstractEventLoop):
                     'host and port was not specified and no sock specified')
             sockets = [sock]
 
+        limit = None
+        if max_connections is not None:
+            limit = self._make_connection_limit(max_connections)
         for sock in sockets:
             sock.listen(backlog)
             sock.setblocking(False)
-            self._start_serving(connection_handler, sock, ssl)
+            self._start_serving(connection_handler, sock, ssl, backlog, limit)
         return sockets
 
     @tasks.coroutine
@@ -470,14 +1139,17 @@ class BaseEventLoop(events.AbstractEventLoop):
         return transport
 
     def _add_callback(self, handle):
-        """Add a Handle to ready or scheduled."""
+        """Add a Handle to the I/O lane of ready, or to scheduled."""
         assert isinstance(handle, events.Handle), 'A Handle is required here'
         if handle._cancelled:
             return
         if isinstance(handle, events.TimerHandle):
+            # cancel() reports back to the loop that holds the handle.
+            handle._loop = self
+            handle._scheduled = True
             heapq.heappush(self._scheduled, handle)
         else:
-            self._ready.append(handle)
+            self._ready_io.append(handle)
 
     def _add_callback_signalsafe(self, handle):
         """Like _add_callback() but called from a signal handler."""
@@ -491,31 +1163,53 @@ class BaseEventLoop(events.AbstractEventLoop):
         schedules the resulting callbacks, and finally schedules
         'call_later' callbacks.
         """
-        # Remove delayed calls that were cancelled from head of queue.
-        while self._scheduled and self._scheduled[0]._cancelled:
-            heapq.heappop(self._scheduled)
-
-        if self._ready:
+        sched_count = len(self._scheduled)
+        if (sched_count > _MIN_SCHEDULED_TIMER_HANDLES and
+            self._timer_cancelled_count >
+                sched_count * _MIN_CANCELLED_TIMER_HANDLES_FRACTION):
+            # Too many cancelled timers make every heappush() slower;
+            # drop them all and rebuild the heap.
+            new_scheduled = []
+            for handle in self._scheduled:
+                if handle._cancelled:
+                    handle._scheduled = False
+                else:
+                    new_scheduled.append(handle)
+            heapq.heapify(new_scheduled)
+            self._scheduled = new_scheduled
+            self._timer_cancelled_count = 0
+        else:
+            # Remove delayed calls that were cancelled from head of queue.
+            while self._scheduled and self._scheduled[0]._cancelled:
+                self._timer_cancelled_count -= 1
+                handle = heapq.heappop(self._scheduled)
+                handle._scheduled = False
+
+        wheel = self._timer_wheel
+        if self._ready or self._ready_io or self._idle:
             timeout = 0
-        elif self._scheduled:
+        elif self._scheduled or wheel:
             # Compute the desired timeout.
-            when = self._scheduled[0]._when
+            when = self._scheduled[0]._when if self._scheduled else None
+            if wheel:
+                wheel_when = wheel.next_expiry()
+                if when is None or wheel_when < when:
+                    when = wheel_when
             deadline = max(0, when - self.time())
             if timeout is None:
                 timeout = deadline
             else:
                 timeout = min(timeout, deadline)
 
-        # TODO: Instrumentation only in debug mode?
-        t0 = self.time()
+        if self._fd_changes:
+            self._apply_fd_changes()
+        # Decide once: a callback may add the first hook meanwhile.
+        collect = bool(self._iteration_hooks)
+        if collect:
+            t0 = self.time()
         event_list = self._selector.select(timeout)
-        t1 = self.time()
-        argstr = '' if timeout is None else '{:.3f}'.format(timeout)
-        if t1-t0 >= 1:
-            level = logging.INFO
-        else:
-            level = logging.DEBUG
-        tulip_log.log(level, 'poll%s took %.3f seconds', argstr, t1-t0)
+        if collect:
+            poll_time = self.time() - t0
         self._process_events(event_list)
 
         # Handle 'later' callbacks that are ready.
@@ -525,7 +1219,13 @@ class BaseEventLoop(events.AbstractEventLoop):
             if handle._when > now:
                 break
             handle = heapq.heappop(self._scheduled)
-            self._ready.append(handle)
+            handle._scheduled = False
+            if handle._cancelled:
+                self._timer_cancelled_count -= 1
+            else:
+                self._ready.append(handle)
+        if wheel:
+            self._ready.extend(wheel.advance(now))
 
         # This is the only place where callbacks are actually *called*.
         # All other places just add them to ready.
@@ -533,9 +1233,56 @@ class BaseEventLoop(events.AbstractEventLoop):
         # callbacks scheduled by callbacks run this time around --
         # they will be run the next time (after another I/O poll).
         # Use an idiom that is threadsafe without using locks.
-        ntodo = len(self._ready)
-        for i in range(ntodo):
-            handle = self._ready.popleft()
-            if not handle._cancelled:
-                handle._run()
+        # I/O callbacks go first; a single idle callback runs only if
+        # there is nothing else to do.
+        if self._ready_io or self._ready:
+            lanes = ((self._ready_io, len(self._ready_io)),
+                     (self._ready, len(self._ready)))
+        else:
+            idle = self._idle
+            while idle and idle[0]._cancelled:
+                idle.popleft()
+            lanes = ((idle, min(1, len(idle))),)
+        # Callbacks left over by the budget stay at the head of their
+        # lane, so the next iteration polls with a timeout of 0 first.
+        ntodo = 0
+        max_callbacks = self._max_callbacks
+        deadline = None
+        if self._max_time is not None:
+            deadline = time.monotonic() + self._max_time
+        out_of_callbacks = out_of_time = False
+        slow = self._slow_callback_duration
+        for lane, count in lanes:
+            if max_callbacks is not None and ntodo + count > max_callbacks:
+                count = max_callbacks - ntodo
+                out_of_callbacks = True
+            for i in range(count):
+                if (deadline is not None and ntodo and
+                        time.monotonic() >= deadline):
+                    out_of_time = True
+                    break
+                handle = lane.popleft()
+                ntodo += 1
+                if not handle._cancelled:
+                    if slow is None:
+                        handle._run()
+                    else:
+                        t0 = time.monotonic()
+                        handle._run()
+                        dt = time.monotonic() - t0
+                        if dt >= slow:
+                            self._report_slow_callback(handle, dt)
+            if out_of_time:
+                break
         handle = None  # Needed to break cycles when an exception occurs.
+        if out_of_time:
+            self._time_budget_hits += 1
+        elif out_of_callbacks:
+            self._callback_budget_hits += 1
+
+        if collect:
+            timers, _ = self.timer_counts()
+            self._call_iteration_hooks(IterationStats(
+                timeout, poll_time, len(event_list), ntodo,
+                len(self._ready) + len(self._ready_io) + len(self._idle),
+                timers, self._selector.registered_count()))
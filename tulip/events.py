@@ -52,11 +52,13 @@ def make_handle(callback, args):
 class TimerHandle(Handle):
     """Object returned by timed callback registration methods."""
 
-    def __init__(self, when, callback, args):
+    def __init__(self, when, callback, args, loop=None):
         assert when is not None
         super().__init__(callback, args)
 
         self._when = when
+        self._loop = loop
+        self._scheduled = False  # Set while it sits in the loop's heap.
 
     def __repr__(self):
         res = 'TimerHandle({}, {}, {})'.format(self._when,
@@ -67,6 +69,11 @@ class TimerHandle(Handle):
 
         return res
 
+    def cancel(self):
+        if not self._cancelled and self._scheduled:
+            self._loop._timer_handle_cancelled(self)
+        super().cancel()
+
     def __hash__(self):
         return hash(self._when)
 
@@ -142,6 +149,9 @@ class AbstractEventLoop:
     def call_at(self, when, callback, *args):
         raise NotImplementedError
 
+    def call_idle(self, callback, *args):
+        raise NotImplementedError
+
     def time(self):
         raise NotImplementedError
 
@@ -166,12 +176,14 @@ class AbstractEventLoop:
 
     def create_connection(self, host=None, port=None, *,
                           ssl=None, family=0, proto=0, flags=0, sock=None,
-                          local_addr=None):
+                          local_addr=None, happy_eyeballs_delay=None,
+                          connect_timeout=None):
         raise NotImplementedError
 
     def start_serving(self, connection_handler, host=None, port=None, *,
                       family=socket.AF_UNSPEC, flags=socket.AI_PASSIVE,
-                      sock=None, backlog=100, ssl=None, reuse_address=None):
+                      sock=None, backlog=100, ssl=None, reuse_address=None,
+                      max_connections=None):
         """Creates a TCP server bound to host and port and return
         a list of socket objects which will later be handled by
         connection_handler.
@@ -190,7 +202,8 @@ class AbstractEventLoop:
         socket object.
 
         backlog is the maximum number of queued connections passed to
-        listen() (defaults to 100).
+        listen() (defaults to 100).  It also bounds the number of
+        connections accepted per iteration of the event loop.
 
         ssl can be set to an SSLContext to enable SSL over the
         accepted connections.
@@ -199,6 +212,10 @@ class AbstractEventLoop:
         TIME_WAIT state, without waiting for its natural timeout to
         expire. If not specified will automatically be set to True on
         UNIX.
+
+        max_connections limits the number of open connections: while
+        the server has that many, no new connections are accepted and
+        they wait in the listen queue instead.
         """
         raise NotImplementedError
 
@@ -615,6 +615,15 @@ class HttpMessage:
         except StopIteration:
             pass
 
+    def drain(self):
+        """Wait until the transport is ready for more data.
+
+        A producer writing a large body should do
+        'yield from message.drain()' after each write(); see
+        transport.drain().
+        """
+        return self.transport.drain()
+
     def _write_chunked_payload(self):
         """Write data in chunked transfer encoding."""
         while True:
@@ -24,7 +24,7 @@ DEFAULT_ERROR_MESSAGE = """
 </html>"""
 
 
-class ServerHttpProtocol(tulip.Protocol):
+class ServerHttpProtocol(tulip.Protocol, tulip.BufferedProtocol):
     """Simple http protocol implementation.
 
     ServerHttpProtocol handles incoming http request. It reads request line,
@@ -59,11 +59,18 @@ class ServerHttpProtocol(tulip.Protocol):
         self.transport = transport
         self.transport.register_protocol(self)
         self.stream = tulip.StreamBuffer()
+        self.stream.set_transport(transport)
         self._request_handler = self.start()
 
     def data_received(self, data):
         self.stream.feed_data(data)
 
+    def get_buffer(self, sizehint):
+        return self.stream.get_buffer(sizehint)
+
+    def buffer_updated(self, nbytes):
+        self.stream.buffer_updated(nbytes)
+
     def eof_received(self):
         self.stream.feed_eof()
 
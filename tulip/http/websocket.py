@@ -175,6 +175,13 @@ class WebSocketWriter:
         else:
             self._send_frame(message, OPCODE_TEXT)
 
+    def drain(self):
+        """Wait until the transport is ready for more frames.
+
+        Use it as 'yield from writer.drain()'; see transport.drain().
+        """
+        return self.transport.drain()
+
     def close(self, code=1000, message=b''):
         """Close the websocket, sending the specified code and message."""
         if isinstance(message, str):
@@ -0,0 +1,319 @@
+"""Groups of event loops, one per thread.
+
+A LoopGroup runs several selector event loops, each in a thread of
+its own, and serves connections on all of them.  Connections are
+either accepted by the first loop and handed off to the others
+(round-robin or to the loop with the fewest open connections), or
+accepted by every loop from a listening socket of its own using
+SO_REUSEPORT, which lets the kernel do the balancing.
+
+Each connection lives in one loop for its whole life, so protocols
+need no locking.  To talk to another loop, use submit(), or the
+loop's own call_soon_threadsafe().
+"""
+
+__all__ = ['LoopGroup', 'ROUND_ROBIN', 'LEAST_LOADED', 'REUSE_PORT',
+           'default_size', 'bind_sockets']
+
+import concurrent.futures
+import functools
+import itertools
+import multiprocessing
+import socket
+import threading
+
+from . import events
+from . import futures
+from . import tasks
+from .log import tulip_log
+
+
+# Ways of distributing connections among the loops of a group.
+ROUND_ROBIN = 'round_robin'
+LEAST_LOADED = 'least_loaded'
+REUSE_PORT = 'reuse_port'
+
+
+def default_size():
+    """Return the default number of loops or workers: one per CPU."""
+    try:
+        return multiprocessing.cpu_count()
+    except NotImplementedError:
+        return 1
+
+
+def bind_sockets(host, port, family=socket.AF_UNSPEC, reuse_port=False):
+    """Create and bind listening sockets for all addresses of host.
+
+    This blocks to resolve host.  With port 0 or None, the first
+    socket gets an ephemeral port and the others are bound to the
+    same port.
+    """
+    if host == '':
+        host = None
+    infos = socket.getaddrinfo(host, port, family, socket.SOCK_STREAM, 0,
+                               socket.AI_PASSIVE)
+    if not infos:
+        raise socket.error('getaddrinfo() returned empty list')
+    AF_INET6 = getattr(socket, 'AF_INET6', 0)
+    sockets = []
+    completed = False
+    try:
+        for af, socktype, proto, canonname, sa in infos:
+            sock = socket.socket(af, socktype, proto)
+            sockets.append(sock)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, True)
+            if reuse_port:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, True)
+            if af == AF_INET6 and hasattr(socket, 'IPPROTO_IPV6'):
+                sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, True)
+            if not port and len(sockets) > 1:
+                # Use the ephemeral port picked for the first address.
+                sa = (sa[0], sockets[0].getsockname()[1]) + sa[2:]
+            sock.bind(sa)
+        completed = True
+    finally:
+        if not completed:
+            for sock in sockets:
+                sock.close()
+    return sockets
+
+
+class _LoopLoad:
+    """Number of open connections handed to one loop of a group.
+
+    accepted is only written by the accepting loop and closed only by
+    the loop owning the connections, so no lock is needed.  detach()
+    is called by the transport when its connection is lost.
+    """
+
+    def __init__(self):
+        self.accepted = 0
+        self.closed = 0
+
+    def __int__(self):
+        return self.accepted - self.closed
+
+    def detach(self):
+        self.closed += 1
+
+
+class LoopGroup:
+    """A group of event loops running in threads.
+
+    Use start() and stop(), or the group as a context manager:
+
+        with LoopGroup(4) as group:
+            group.start_serving(handler, '0.0.0.0', 8080)
+            ...
+
+    The methods of the group are meant to be called from outside its
+    loops (e.g. from the main thread); they block until the loops
+    have done their part.
+    """
+
+    def __init__(self, size=None, *, loop_factory=None):
+        if size is None:
+            size = default_size()
+        if size < 1:
+            raise ValueError('size must be at least 1')
+        self._size = size
+        self._loop_factory = loop_factory or events.new_event_loop
+        self._loops = []
+        self._threads = []
+        self._loads = []
+        self._listeners = []  # (loop, sock)
+        self._round_robin = itertools.cycle(range(size))
+
+    def __repr__(self):
+        return '{}<size={}, running={}>'.format(
+            self.__class__.__name__, self._size, bool(self._loops))
+
+    def __len__(self):
+        return self._size
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def loops(self):
+        """The list of event loops of the group."""
+        return list(self._loops)
+
+    def loads(self):
+        """Return the number of open handed-off connections per loop."""
+        return [int(load) for load in self._loads]
+
+    def start(self):
+        """Create the loops and start their threads."""
+        if self._loops:
+            raise RuntimeError('LoopGroup is already running')
+        for i in range(self._size):
+            loop = self._loop_factory()
+            started = threading.Event()
+            thread = threading.Thread(
+                target=self._run, args=(loop, started),
+                name='LoopGroup-{}'.format(i), daemon=True)
+            self._loops.append(loop)
+            self._loads.append(_LoopLoad())
+            self._threads.append(thread)
+            thread.start()
+            started.wait()
+
+    def _run(self, loop, started):
+        events.set_event_loop(loop)
+        loop.call_soon(started.set)
+        try:
+            loop.run_forever()
+        finally:
+            events.set_event_loop(None)
+
+    def stop(self):
+        """Stop serving, stop the loops, wait for them and close them."""
+        for loop, sock in self._listeners:
+            loop.call_soon_threadsafe(loop.stop_serving, sock)
+        for loop in self._loops:
+            loop.call_soon_threadsafe(loop.stop)
+        for thread in self._threads:
+            thread.join()
+        for loop in self._loops:
+            loop.close()
+        self._listeners = []
+        self._loops = []
+        self._threads = []
+        self._loads = []
+
+    def submit(self, loop, fn, *args):
+        """Call fn(*args) in the given loop of the group.
+
+        loop may also be the index of the loop in the group.  Return a
+        concurrent.futures.Future for the result; if fn returns a
+        coroutine or a Future, it is waited for in that loop.  Code
+        running in another loop can wait for the result with
+        futures.wrap_future().
+        """
+        if isinstance(loop, int):
+            loop = self._loops[loop]
+        future = concurrent.futures.Future()
+
+        def done(fut):
+            if fut.cancelled():
+                # A running concurrent Future can't be cancelled anymore.
+                future.set_exception(futures.CancelledError())
+            elif fut.exception() is not None:
+                future.set_exception(fut.exception())
+            else:
+                future.set_result(fut.result())
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                result = fn(*args)
+                if (tasks.iscoroutine(result) or
+                        isinstance(result, futures.Future)):
+                    result = tasks.async(result, loop=loop)
+                    result.add_done_callback(done)
+                    return
+            except Exception as exc:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+
+        loop.call_soon_threadsafe(run)
+        return future
+
+    def start_serving(self, connection_handler, host=None, port=None, *,
+                      family=socket.AF_UNSPEC, backlog=100, ssl=None,
+                      distribute=ROUND_ROBIN):
+        """Serve connections on all loops of the group.
+
+        connection_handler is called with the transport in the loop
+        that owns the connection.  distribute is ROUND_ROBIN or
+        LEAST_LOADED to accept in the first loop and hand connections
+        off to all loops, or REUSE_PORT to give every loop a listening
+        socket of its own.  Return the list of listening sockets.
+        """
+        if not self._loops:
+            raise RuntimeError('LoopGroup is not running')
+        if distribute == REUSE_PORT:
+            if not hasattr(socket, 'SO_REUSEPORT'):
+                raise ValueError('SO_REUSEPORT is not supported')
+            return self._serve_reuse_port(
+                connection_handler, host, port, family, backlog, ssl)
+        if distribute not in (ROUND_ROBIN, LEAST_LOADED):
+            raise ValueError(
+                'Invalid distribute value: {!r}'.format(distribute))
+
+        acceptor = self._loops[0]
+        sockets = bind_sockets(host, port, family)
+        for sock in sockets:
+            sock.listen(backlog)
+            sock.setblocking(False)
+            self._listeners.append((acceptor, sock))
+            self.submit(acceptor, acceptor.add_reader, sock.fileno(),
+                        self._accept_connection, acceptor, connection_handler,
+                        sock, ssl, backlog, distribute).result()
+        return sockets
+
+    def _serve_reuse_port(self, connection_handler, host, port, family,
+                          backlog, ssl):
+        sockets = []
+        for loop in self._loops:
+            socks = bind_sockets(host, port, family, reuse_port=True)
+            if not port:
+                # Let the other loops listen on the port picked here.
+                port = socks[0].getsockname()[1]
+            for sock in socks:
+                self._listeners.append((loop, sock))
+                serve = functools.partial(
+                    loop.start_serving, connection_handler,
+                    sock=sock, backlog=backlog, ssl=ssl)
+                self.submit(loop, serve).result()
+            sockets.extend(socks)
+        return sockets
+
+    def _pick(self, distribute):
+        if distribute == LEAST_LOADED:
+            return min(range(self._size), key=lambda i: int(self._loads[i]))
+        return next(self._round_robin)
+
+    def _accept_connection(self, acceptor, connection_handler, sock, ssl,
+                           backlog, distribute):
+        for _ in range(backlog):
+            try:
+                conn, addr = sock.accept()
+                conn.setblocking(False)
+            except (BlockingIOError, InterruptedError):
+                break
+            except Exception:
+                acceptor.remove_reader(sock.fileno())
+                sock.close()
+                tulip_log.exception('Accept failed')
+                break
+            index = self._pick(distribute)
+            load = self._loads[index]
+            load.accepted += 1
+            loop = self._loops[index]
+            loop.call_soon_threadsafe(
+                self._attach, loop, load, connection_handler, conn, addr, ssl)
+
+    def _attach(self, loop, load, connection_handler, conn, addr, ssl):
+        try:
+            if ssl:
+                transport = loop._make_ssl_transport(
+                    conn, ssl, None, server_side=True, extra={'addr': addr})
+            else:
+                transport = loop._make_socket_transport(
+                    conn, extra={'addr': addr})
+        except Exception:
+            conn.close()
+            load.detach()
+            tulip_log.exception('Failed to attach connection from %r', addr)
+            return
+        transport.add_close_callback(load.detach)
+        connection_handler(transport)
@@ -0,0 +1,124 @@
+"""Monitoring of how late an event loop runs its callbacks.
+
+A LagMonitor schedules a probe timer at a fixed interval and records
+how long after its due time each probe actually ran.  That covers both
+the time spent in other callbacks and any time spent blocked, which is
+what every other callback of the loop sees too.
+"""
+
+__all__ = ['Histogram', 'LagMonitor', 'LagStats']
+
+import bisect
+import collections
+
+from . import events
+from .log import tulip_log
+
+
+# Summary of a LagMonitor's histogram, in seconds:
+# - count: number of probes recorded
+# - p50, p99: upper bound of the bucket holding that percentile
+# - max: largest lag seen
+LagStats = collections.namedtuple('LagStats', ['count', 'p50', 'p99', 'max'])
+
+
+# Upper bounds of the default buckets: 100 microseconds to ~13 seconds,
+# doubling each time.
+_DEFAULT_BOUNDS = tuple(0.0001 * 2 ** i for i in range(18))
+
+
+class Histogram:
+    """Counts of values in fixed buckets.
+
+    bounds are the sorted upper bounds of the buckets; values above the
+    last bound go to an overflow bucket.  Percentiles are reported as
+    the upper bound of the bucket they fall in, capped by the largest
+    value recorded.
+    """
+
+    def __init__(self, bounds=_DEFAULT_BOUNDS):
+        self._bounds = list(bounds)
+        if self._bounds != sorted(self._bounds):
+            raise ValueError('bounds must be sorted')
+        self.reset()
+
+    def reset(self):
+        self._counts = [0] * (len(self._bounds) + 1)
+        self.count = 0
+        self.max = 0.0
+
+    def add(self, value):
+        self._counts[bisect.bisect_left(self._bounds, value)] += 1
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q):
+        """Return the q-th percentile (0 < q <= 100), or 0.0 if empty."""
+        if not self.count:
+            return 0.0
+        rank = self.count * q / 100
+        seen = 0
+        for i, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank and count:
+                if i < len(self._bounds):
+                    return min(self._bounds[i], self.max)
+                break
+        return self.max
+
+
+class LagMonitor:
+    """Measure the lag of an event loop with a periodic probe.
+
+    Every interval seconds a probe timer is due; the delay between
+    that due time and the moment the probe runs is added to the
+    histogram.  If threshold is set, on_lag(lag) is called from the
+    probe whenever the lag is at least threshold seconds, e.g. to
+    start shedding load.
+    """
+
+    def __init__(self, loop, interval=0.1, *, threshold=None, on_lag=None,
+                 histogram=None):
+        if interval <= 0:
+            raise ValueError('interval must be positive')
+        if threshold is not None and on_lag is None:
+            raise ValueError('threshold requires on_lag')
+        self._loop = loop
+        self._interval = interval
+        self._threshold = threshold
+        self._on_lag = on_lag
+        self.histogram = histogram if histogram is not None else Histogram()
+        self._handle = None
+
+    def start(self):
+        if self._handle is None:
+            self._schedule()
+
+    def stop(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _schedule(self):
+        # Bypass the loop's timer wheel (if any): its coarse ticks would
+        # show up as lag.
+        self._handle = events.TimerHandle(
+            self._loop.time() + self._interval, self._probe, (), self._loop)
+        self._loop._add_callback(self._handle)
+
+    def _probe(self):
+        lag = max(0.0, self._loop.time() - self._handle._when)
+        self._schedule()
+        self.histogram.add(lag)
+        if self._threshold is not None and lag >= self._threshold:
+            try:
+                self._on_lag(lag)
+            except Exception:
+                tulip_log.exception('Exception in lag callback %r',
+                                    self._on_lag)
+
+    def stats(self):
+        """Return LagStats for the probes recorded so far."""
+        h = self.histogram
+        return LagStats(h.count, h.percentile(50), h.percentile(99), h.max)
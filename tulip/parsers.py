@@ -52,6 +52,23 @@ There are three stages:
     2. StreamBuffer throws EofStream exception into parser.
     3. Then it unsets parser.
 
+ * Buffered data:
+
+    StreamBuffer also implements get_buffer() and buffer_updated() of
+    BufferedProtocol.  The transport then reads into a receive buffer
+    shared by all StreamBuffers of the thread, and the data is copied
+    from there into ParserBuffer.  The parser is sent an empty bytes
+    object to tell it that ParserBuffer has more data; parsers that
+    only read with ParserBuffer methods handle this already.
+
+ * Flow control:
+
+    StreamBuffer pauses its transport (see set_transport()) when more
+    than twice the limit is buffered and not consumed yet, and resumes
+    it once no more than the limit is left.  Buffered data is the data
+    in ParserBuffer while there is no parser, plus the bytes fed into
+    the current parser's DataBuffer and not read yet.
+
 _SocketSocketTransport ->
    -> "protocol" -> StreamBuffer -> "parser" -> DataBuffer <- "application"
 
@@ -60,6 +77,7 @@ __all__ = ['EofStream', 'StreamBuffer', 'StreamProtocol',
            'ParserBuffer', 'DataBuffer', 'lines_parser', 'chunks_parser']
 
 import collections
+import threading
 
 from . import tasks
 from . import futures
@@ -70,6 +88,28 @@ class EofStream(Exception):
     """eof stream indication."""
 
 
+class _SlabPool(threading.local):
+    """Receive buffers for StreamBuffer.get_buffer(), one per thread.
+
+    A buffer is only in use from get_buffer() until buffer_updated()
+    copies the data out, and those calls don't interleave in a thread.
+    """
+
+    slab = None
+
+    def get(self, size):
+        if self.slab is None or len(self.slab) < size:
+            self.slab = bytearray(size)  # Lent-out views keep the old.
+        return self.slab
+
+
+_slabs = _SlabPool()
+
+# Bigger reads only make ParserBuffer, and the chunks parsers slice
+# out of it, bigger; 64 KiB reads measured fastest.
+_MAX_BUFFER_SIZE = 64 * 1024
+
+
 class StreamBuffer:
     """StreamBuffer manages incoming bytes stream and protocol parsers.
 
@@ -81,18 +121,51 @@ class StreamBuffer:
     unset_parser() sends EofStream into parser and then removes it.
     """
 
-    def __init__(self):
+    def __init__(self, limit=2**16):
         self._buffer = ParserBuffer()
         self._eof = False
         self._parser = None
         self._parser_buffer = None
         self._exception = None
+        self._limit = limit
+        self._transport = None
+        self._paused = False
+
+    def set_transport(self, transport):
+        """set transport to pause while too much data is buffered."""
+        assert self._transport is None, 'Transport already set'
+        self._transport = transport
+
+    def _buffered(self):
+        # Data left in ParserBuffer while a parser is set is waiting
+        # for more data, so it isn't counted.
+        size = 0 if self._parser else self._buffer.size
+        if self._parser_buffer is not None:
+            size += self._parser_buffer._size
+        return size
+
+    def _maybe_pause_transport(self):
+        if (self._transport is not None and not self._paused and
+                self._buffered() > 2*self._limit):
+            try:
+                self._transport.pause()
+            except NotImplementedError:
+                self._transport = None
+            else:
+                self._paused = True
+
+    def _maybe_resume_transport(self):
+        if self._paused and self._buffered() <= self._limit:
+            self._paused = False
+            self._transport.resume()
 
     def exception(self):
         return self._exception
 
     def set_exception(self, exc):
         self._exception = exc
+        self._transport = None
+        self._paused = False
 
         if self._parser_buffer is not None:
             self._parser_buffer.set_exception(exc)
@@ -105,20 +178,42 @@ class StreamBuffer:
             return
 
         if self._parser:
-            try:
-                self._parser.send(data)
-            except StopIteration:
-                self._parser = None
-                self._parser_buffer = None
-            except Exception as exc:
-                self._parser_buffer.set_exception(exc)
-                self._parser = None
-                self._parser_buffer = None
+            self._feed_parser(data)
         else:
             self._buffer.feed_data(data)
 
+        self._maybe_pause_transport()
+
+    def _feed_parser(self, data):
+        try:
+            self._parser.send(data)
+        except StopIteration:
+            self._parser = None
+            self._parser_buffer = None
+        except Exception as exc:
+            self._parser_buffer.set_exception(exc)
+            self._parser = None
+            self._parser_buffer = None
+
+    def get_buffer(self, sizehint):
+        """return shared receive buffer of sizehint bytes, at most."""
+        size = min(sizehint, _MAX_BUFFER_SIZE)
+        return memoryview(_slabs.get(size))[:size]
+
+    def buffer_updated(self, nbytes):
+        """copy data from receive buffer into parser buffer."""
+        self._buffer.feed_data(memoryview(_slabs.slab)[:nbytes])
+        if self._parser:
+            # The parser finds the data in its buffer already.
+            self._feed_parser(b'')
+
+        self._maybe_pause_transport()
+
     def feed_eof(self):
         """send eof to all parsers, recursively."""
+        self._transport = None
+        self._paused = False
+
         if self._parser:
             try:
                 self._parser.throw(EofStream())
@@ -139,7 +234,7 @@ class StreamBuffer:
         if self._parser:
             self.unset_parser()
 
-        out = DataBuffer()
+        out = DataBuffer(self)
         if self._exception:
             out.set_exception(self._exception)
             return out
@@ -161,6 +256,7 @@ class StreamBuffer:
             if self._eof:
                 self.unset_parser()
 
+        self._maybe_resume_transport()
         return out
 
     def unset_parser(self):
@@ -181,7 +277,8 @@ class StreamBuffer:
             self._parser_buffer = None
 
 
-class StreamProtocol(StreamBuffer, protocols.Protocol):
+class StreamProtocol(StreamBuffer, protocols.Protocol,
+                     protocols.BufferedProtocol):
     """Tulip's stream protocol based on StreamBuffer"""
 
     transport = None
@@ -190,10 +287,11 @@ class StreamProtocol(StreamBuffer, protocols.Protocol):
 
     eof_received = StreamBuffer.feed_eof
 
-    def __init__(self, transport):
-        super().__init__()
+    def __init__(self, transport, limit=2**16):
+        super().__init__(limit)
         self.transport = transport
         self.transport.register_protocol(self)
+        self.set_transport(transport)
 
     def connection_lost(self, exc):
         self.transport = None
@@ -205,13 +303,19 @@ class StreamProtocol(StreamBuffer, protocols.Protocol):
 
 
 class DataBuffer:
-    """DataBuffer is a destination for parsed data."""
+    """DataBuffer is a destination for parsed data.
+
+    Bytes fed into it are counted for the flow control of the
+    StreamBuffer passed in, if any.
+    """
 
-    def __init__(self):
+    def __init__(self, stream=None):
         self._buffer = collections.deque()
         self._eof = False
         self._waiter = None
         self._exception = None
+        self._stream = stream
+        self._size = 0  # Bytes in buffer.
 
     def exception(self):
         return self._exception
@@ -227,6 +331,8 @@ class DataBuffer:
 
     def feed_data(self, data):
         self._buffer.append(data)
+        if isinstance(data, (bytes, bytearray)):
+            self._size += len(data)
 
         waiter = self._waiter
         if waiter is not None:
@@ -252,7 +358,12 @@ class DataBuffer:
             yield from self._waiter
 
         if self._buffer:
-            return self._buffer.popleft()
+            data = self._buffer.popleft()
+            if isinstance(data, (bytes, bytearray)):
+                self._size -= len(data)
+                if self._stream is not None:
+                    self._stream._maybe_resume_transport()
+            return data
         else:
             return None
 
@@ -282,13 +393,14 @@ class ParserBuffer(bytearray):
             chunk = yield
             if chunk:
                 chunk_len = len(chunk)
-                self.size += chunk_len
-                self.extend(chunk)
 
                 # shrink buffer
-                if (self.offset and len(self) > 5120):
+                if (self.offset and len(self) + chunk_len > 5120):
                     self._shrink()
 
+                self.size += chunk_len
+                self.extend(chunk)
+
     def feed_data(self, data):
         self._writer.send(data)
 
@@ -211,6 +211,7 @@ class BaseProactorEventLoop(base_events.BaseEventLoop):
         return _ProactorWritePipeTransport(self, sock, waiter, extra)
 
     def close(self):
+        super().close()
         if self._proactor is not None:
             self._close_self_pipe()
             self._proactor.close()
@@ -250,6 +251,7 @@ class BaseProactorEventLoop(base_events.BaseEventLoop):
     def _loop_self_reading(self, f=None):
         try:
             if f is not None:
+                self._wakeup_pending = False
                 f.result()  # may raise
             f = self._proactor.recv(self._ssock, 4096)
         except:
@@ -261,8 +263,10 @@ class BaseProactorEventLoop(base_events.BaseEventLoop):
     def _write_to_self(self):
         self._csock.send(b'x')
 
-    def _start_serving(self, connection_handler, sock, ssl=None):
+    def _start_serving(self, connection_handler, sock, ssl=None,
+                       backlog=100, limit=None):
         assert not ssl, 'IocpEventLoop imcompatible with SSL.'
+        assert limit is None, 'IocpEventLoop does not support max_connections.'
 
         def loop(f=None):
             try:
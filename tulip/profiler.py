@@ -0,0 +1,187 @@
+"""Sampling profiler for the Tasks and callbacks of an event loop.
+
+At a fixed interval the profiler looks at the stack of the loop's
+thread.  While a Task runs, the frames of its coroutine and of every
+coroutine it is waiting for with 'yield from' are on that stack, so
+the samples show the coroutine chain itself rather than Task._step.
+The samples are counted per stack and can be written in the collapsed
+format used by flame graph tools (one "frame;frame;frame count" line
+per stack).
+
+In the main thread, samples are taken by a SIGPROF handler driven by
+setitimer(ITIMER_PROF), i.e. per interval of CPU time used by the
+process.  Elsewhere a background thread takes them; it can only do so
+when the loop's thread lets go of the GIL, which biases the samples
+towards blocking calls and long-running code.
+
+Taking a sample costs a few microseconds; at the default interval of
+10 milliseconds the profiler can be left on in production.
+"""
+
+__all__ = ['Profiler']
+
+import collections
+import os
+import signal
+import sys
+import threading
+
+from . import base_events
+from . import events
+from . import tasks
+
+
+# Frames below these belong to the event loop, not to the code it runs.
+_TASK_CODE = tasks.Task._step.__code__
+_CALLBACK_CODE = events.Handle._run.__code__
+_LOOP_CODE = base_events.BaseEventLoop._run_once.__code__
+
+# Roots of the collapsed stacks.
+TASK = '[task]'
+CALLBACK = '[callback]'
+LOOP = '[loop]'
+
+
+def _describe(code):
+    return '{} ({}:{})'.format(code.co_name,
+                               os.path.basename(code.co_filename),
+                               code.co_firstlineno)
+
+
+class Profiler:
+    """Sample the stack of an event loop's thread.
+
+    start() must be called in the thread running the loop; it may be
+    called before the loop runs.  use_signal picks SIGPROF (True) or a
+    background thread (False); the default is SIGPROF if start() is
+    called in the main thread.  Samples taken while the loop runs a
+    Task step start with TASK, those taken in other callbacks with
+    CALLBACK, and those taken in the loop itself (mostly waiting for
+    I/O) with LOOP.  Samples taken while the thread is not running the
+    loop at all are dropped.
+    """
+
+    def __init__(self, *, interval=0.01, use_signal=None):
+        if interval <= 0:
+            raise ValueError('interval must be positive')
+        self._interval = interval
+        self._use_signal = use_signal
+        self._running = False
+        self._thread_id = None
+        self._thread = None
+        self._old_handler = None
+        self._stopping = threading.Event()
+        # Tuple of codes -> count.  Updating and copying it is atomic
+        # enough under the GIL, and a lock could deadlock with the
+        # signal handler.
+        self._samples = collections.Counter()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        """Start sampling the calling thread."""
+        if self._running:
+            raise RuntimeError('Profiler is already running')
+        use_signal = self._use_signal
+        is_main = isinstance(threading.current_thread(), threading._MainThread)
+        if use_signal is None:
+            use_signal = is_main and hasattr(signal, 'setitimer')
+        elif use_signal and not is_main:
+            raise RuntimeError('SIGPROF can only be used in the main thread')
+        if use_signal:
+            self._old_handler = signal.signal(signal.SIGPROF,
+                                              self._handle_signal)
+            signal.setitimer(signal.ITIMER_PROF,
+                             self._interval, self._interval)
+        else:
+            self._thread_id = threading.get_ident()
+            self._stopping.clear()
+            self._thread = threading.Thread(
+                target=self._run, name='tulip-profiler', daemon=True)
+            self._thread.start()
+        self._running = True
+
+    def stop(self):
+        """Stop sampling; the samples taken so far are kept."""
+        if not self._running:
+            return
+        if self._thread is None:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            signal.signal(signal.SIGPROF, self._old_handler)
+            self._old_handler = None
+        else:
+            self._stopping.set()
+            self._thread.join()
+            self._thread = None
+        self._running = False
+
+    def clear(self):
+        """Forget all samples."""
+        self._samples.clear()
+
+    def _handle_signal(self, signum, frame):
+        stack = self._stack(frame)
+        if stack is not None:
+            self._samples[stack] += 1
+
+    def _run(self):
+        while not self._stopping.wait(self._interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                break  # The thread is gone.
+            stack = self._stack(frame)
+            frame = None
+            if stack is not None:
+                self._samples[stack] += 1
+
+    def _stack(self, frame):
+        codes = []
+        while frame is not None:
+            code = frame.f_code
+            if code is _TASK_CODE:
+                root = TASK
+                break
+            if code is _CALLBACK_CODE:
+                root = CALLBACK
+                break
+            if code is _LOOP_CODE:
+                root = LOOP
+                break
+            codes.append(code)
+            frame = frame.f_back
+        else:
+            return None
+        codes.append(root)
+        codes.reverse()
+        return tuple(codes)
+
+    def samples(self):
+        """Return a dict mapping stacks to sample counts.
+
+        A stack is a tuple of strings, its root (TASK, CALLBACK or LOOP)
+        first and the innermost frame last.
+        """
+        items = list(self._samples.items())
+        result = collections.Counter()
+        for codes, count in items:
+            stack = (codes[0],) + tuple(_describe(code) for code in codes[1:])
+            result[stack] += count
+        return dict(result)
+
+    def collapsed(self):
+        """Return the samples in collapsed-stack format, one per line."""
+        return ''.join('{} {}\n'.format(';'.join(stack), count)
+                       for stack, count in sorted(self.samples().items()))
+
+    def write_collapsed(self, file):
+        """Write collapsed() to a file object or to the named file."""
+        if isinstance(file, str):
+            with open(file, 'w') as f:
+                f.write(self.collapsed())
+        else:
+            file.write(self.collapsed())
@@ -1,6 +1,6 @@
 """Abstract Protocol class."""
 
-__all__ = ['Protocol', 'DatagramProtocol']
+__all__ = ['Protocol', 'BufferedProtocol', 'DatagramProtocol']
 
 
 class BaseProtocol:
@@ -21,6 +21,19 @@ class BaseProtocol:
         aborted or closed).
         """
 
+    def pause_writing(self):
+        """Called when the transport's write buffer goes over the high
+        water mark.
+
+        The protocol should stop writing until resume_writing() is
+        called; see transport.set_write_buffer_limits().
+        """
+
+    def resume_writing(self):
+        """Called when the transport's write buffer drains to the low
+        water mark, after pause_writing().
+        """
+
 
 class Protocol(BaseProtocol):
     """ABC representing a protocol.
@@ -60,6 +73,39 @@ class Protocol(BaseProtocol):
         """
 
 
+class BufferedProtocol(BaseProtocol):
+    """ABC for a stream protocol that receives data in its own buffer.
+
+    Instead of calling data_received() with a new bytes object, the
+    transport asks for a buffer with get_buffer() and reads into it;
+    buffer_updated() then tells how many bytes were written to the
+    start of the buffer.  Transports that can't do this call
+    data_received(), so a protocol may implement both interfaces.
+
+    State machine of calls:
+
+      start -> registered [-> GB [-> BU?]]* [-> ER?] -> CL -> end
+    """
+
+    def get_buffer(self, sizehint):
+        """Called to get a buffer to read data into.
+
+        sizehint is how many bytes the transport would like to read;
+        the buffer may be smaller or larger, but not empty.  It must
+        support the writable buffer protocol (a bytearray, or a
+        memoryview of one).  The transport drops the buffer before it
+        calls buffer_updated(), or before the next get_buffer() call
+        if nothing was read.
+        """
+        raise NotImplementedError
+
+    def buffer_updated(self, nbytes):
+        """Called when nbytes were written to the buffer."""
+
+    def eof_received(self):
+        """Called when the other end calls write_eof() or equivalent."""
+
+
 class DatagramProtocol(BaseProtocol):
     """ABC representing a datagram protocol."""
 
@@ -0,0 +1,165 @@
+"""Caching, deduplicating resolver for getaddrinfo().
+
+socket.getaddrinfo() blocks, so the event loop runs it in a thread.
+A client that opens many connections to the same host would do the
+same lookup over and over, and could tie up all the threads of the
+default executor doing so.  The Resolver keeps successful results for
+`ttl` seconds and failed lookups (socket.gaierror) for `negative_ttl`
+seconds, lets concurrent lookups for the same arguments share a
+single call, and runs lookups in an executor of its own so that they
+never starve other run_in_executor() work.
+
+getaddrinfo() does not report the TTL of the DNS records, so a fixed
+TTL is used for all entries.
+"""
+
+__all__ = ['Resolver']
+
+import collections
+import concurrent.futures
+import socket
+
+from . import events
+from . import futures
+
+
+# Default number of threads doing lookups.
+_MAX_WORKERS = 4
+
+
+def _copy_error(exc):
+    """Return a new exception like exc.
+
+    Raising the same exception object in every caller would make them
+    share, and keep growing, a single traceback.
+    """
+    try:
+        return type(exc)(*exc.args)
+    except Exception:
+        return exc
+
+
+class Resolver:
+    """Resolver with a TTL cache and in-flight deduplication.
+
+    The counters `hits` and `misses` count the lookups answered from
+    the cache (or by joining a lookup already in flight) and the ones
+    that called socket.getaddrinfo(), respectively.
+    """
+
+    def __init__(self, *, loop=None, ttl=60.0, negative_ttl=5.0,
+                 max_size=1024, max_workers=_MAX_WORKERS):
+        if loop is None:
+            self._loop = events.get_event_loop()
+        else:
+            self._loop = loop
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._max_size = max_size
+        self._max_workers = max_workers
+        self._executor = None
+        # Maps lookup arguments to (expiry time, result, exception).
+        self._cache = collections.OrderedDict()
+        # Maps lookup arguments to the Future of the lookup in flight.
+        self._pending = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return '{}<cached={}, hits={}, misses={}>'.format(
+            self.__class__.__name__, len(self._cache), self.hits, self.misses)
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                self._max_workers)
+        return self._executor
+
+    def getaddrinfo(self, host, port, *,
+                    family=0, type=0, proto=0, flags=0):
+        """Look up an address like socket.getaddrinfo().
+
+        Return a Future for the list of address tuples.  Every call
+        gets a Future of its own, so cancelling one does not affect
+        other callers waiting for the same lookup.
+        """
+        key = (host, port, family, type, proto, flags)
+        fut = futures.Future(loop=self._loop)
+
+        entry = self._cache.get(key)
+        if entry is not None:
+            expiry, result, exc = entry
+            if expiry > self._loop.time():
+                self.hits += 1
+                self._cache.move_to_end(key)
+                if exc is None:
+                    fut.set_result(list(result))
+                else:
+                    fut.set_exception(_copy_error(exc))
+                return fut
+            del self._cache[key]
+
+        lookup = self._pending.get(key)
+        if lookup is None:
+            self.misses += 1
+            lookup = futures.wrap_future(
+                self._get_executor().submit(socket.getaddrinfo, *key),
+                loop=self._loop)
+            self._pending[key] = lookup
+            lookup.add_done_callback(
+                lambda lookup: self._lookup_done(key, lookup))
+        else:
+            self.hits += 1
+        lookup.add_done_callback(
+            lambda lookup: self._copy_result(lookup, fut))
+        return fut
+
+    def _lookup_done(self, key, lookup):
+        if self._pending.get(key) is lookup:
+            del self._pending[key]
+        if lookup.cancelled():
+            return
+        exc = lookup.exception()
+        if exc is None:
+            ttl, result = self.ttl, lookup.result()
+        elif isinstance(exc, socket.gaierror):
+            ttl, result = self.negative_ttl, None
+        else:
+            return
+        if ttl > 0:
+            self._cache[key] = (self._loop.time() + ttl, result, exc)
+            while len(self._cache) > self._max_size:
+                self._cache.popitem(last=False)
+
+    def _copy_result(self, lookup, fut):
+        if fut.cancelled():
+            return
+        if lookup.cancelled():
+            fut.cancel()
+            return
+        exc = lookup.exception()
+        if exc is None:
+            fut.set_result(list(lookup.result()))
+        else:
+            fut.set_exception(_copy_error(exc))
+
+    def getnameinfo(self, sockaddr, flags=0):
+        """Like socket.getnameinfo(), in the resolver's executor.
+
+        Results are not cached.
+        """
+        return futures.wrap_future(
+            self._get_executor().submit(socket.getnameinfo, sockaddr, flags),
+            loop=self._loop)
+
+    def clear(self):
+        """Drop all cached results."""
+        self._cache.clear()
+
+    def close(self):
+        """Drop the cache and shut down the executor."""
+        self._cache.clear()
+        executor = self._executor
+        if executor is not None:
+            self._executor = None
+            executor.shutdown(wait=False)
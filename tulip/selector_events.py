@@ -5,6 +5,9 @@ also includes support for signal handling, see the unix_events sub-module.
 """
 
 import collections
+import functools
+import itertools
+import os
 import socket
 try:
     import ssl
@@ -15,10 +18,17 @@ from . import base_events
 from . import constants
 from . import events
 from . import futures
+from . import protocols
 from . import selectors
 from . import transports
 from .log import tulip_log
 
+# Most buffers a single sendmsg() call takes.
+try:
+    _IOV_MAX = os.sysconf('SC_IOV_MAX')
+except (AttributeError, ValueError, OSError):  # pragma: no cover
+    _IOV_MAX = 16
+
 # Errno values indicating the connection was disconnected.
 # Comment out _DISCONNECTED as never used
 # TODO: make sure that errors has processed properly
@@ -36,19 +46,32 @@ class BaseSelectorEventLoop(base_events.BaseEventLoop):
     """Selector event loop.
 
     See events.EventLoop for API specification.
+
+    With edge_triggered=True, socket transports register their socket
+    with EVENT_EDGE (see selectors.EpollSelector) for their whole life,
+    instead of adding and removing a writer whenever their buffer fills
+    up or drains.  Other users of add_reader() and add_writer() are not
+    affected.
     """
 
-    def __init__(self, selector=None):
+    def __init__(self, selector=None, *, edge_triggered=False):
         super().__init__()
 
         if selector is None:
             selector = selectors.DefaultSelector()
+        if edge_triggered and not (selector.supported_flags &
+                                   selectors.EVENT_EDGE):
+            raise ValueError('{} is not edge-triggered'.format(
+                selector.__class__.__name__))
         tulip_log.debug('Using selector: %s', selector.__class__.__name__)
         self._selector = selector
+        self._edge_triggered = edge_triggered
         self._make_self_pipe()
 
     def _make_socket_transport(self, sock, waiter=None, *,
                                extra=None):
+        if self._edge_triggered:
+            return _SelectorEdgeSocketTransport(self, sock, waiter, extra)
         return _SelectorSocketTransport(self, sock, waiter, extra)
 
     def _make_ssl_transport(self, rawsock, sslcontext, waiter, *,
@@ -61,8 +84,10 @@ class BaseSelectorEventLoop(base_events.BaseEventLoop):
         return _SelectorDatagramTransport(self, sock, address, extra)
 
     def close(self):
+        super().close()
         if self._selector is not None:
             self._close_self_pipe()
+            self._fd_changes.clear()
             self._selector.close()
             self._selector = None
 
@@ -86,10 +111,17 @@ class BaseSelectorEventLoop(base_events.BaseEventLoop):
         self.add_reader(self._ssock.fileno(), self._read_from_self)
 
     def _read_from_self(self):
-        try:
-            self._ssock.recv(1)
-        except (BlockingIOError, InterruptedError):
-            pass
+        while True:
+            try:
+                data = self._ssock.recv(4096)
+                if not data:
+                    break
+            except InterruptedError:
+                continue
+            except BlockingIOError:
+                break
+        # Only now: a byte written before this point has been drained.
+        self._wakeup_pending = False
 
     def _write_to_self(self):
         try:
@@ -97,59 +129,123 @@ class BaseSelectorEventLoop(base_events.BaseEventLoop):
         except (BlockingIOError, InterruptedError):
             pass
 
-    def _start_serving(self, connection_handler, sock, ssl=None):
-        self.add_reader(sock.fileno(), self._accept_connection,
-                        connection_handler, sock, ssl)
+    def _make_connection_limit(self, max_connections):
+        return _ConnectionLimit(self, max_connections)
 
-    def _accept_connection(self, connection_handler, sock, ssl=None):
-        try:
-            conn, addr = sock.accept()
-            conn.setblocking(False)
-        except (BlockingIOError, InterruptedError):
-            pass  # False alarm.
-        except Exception:
-            # Bad error. Stop serving.
-            self.remove_reader(sock.fileno())
-            sock.close()
-            # There's nowhere to send the error, so just log it.
-            # TODO: Someone will want an error handler for this.
-            tulip_log.exception('Accept failed')
-        else:
-            if ssl:
-                transport = self._make_ssl_transport(
-                    conn, ssl, None,
-                    server_side=True, extra={'addr': addr})
+    def _start_serving(self, connection_handler, sock, ssl=None,
+                       backlog=100, limit=None):
+        args = (connection_handler, sock, ssl, backlog, limit)
+        if limit is not None:
+            limit.add_listener(sock, args)
+            if limit.paused:
+                return
+        self.add_reader(sock.fileno(), self._accept_connection, *args)
+
+    def _accept_connection(self, connection_handler, sock, ssl=None,
+                           backlog=100, limit=None):
+        # Accept up to backlog connections per readiness event, so that
+        # a burst of connections doesn't cost one loop iteration each.
+        for _ in range(backlog):
+            if limit is not None and limit.paused:
+                break
+            try:
+                conn, addr = sock.accept()
+                conn.setblocking(False)
+            except (BlockingIOError, InterruptedError):
+                break  # No more pending connections (or a false alarm).
+            except Exception:
+                # Bad error. Stop serving.
+                self.remove_reader(sock.fileno())
+                sock.close()
+                # There's nowhere to send the error, so just log it.
+                # TODO: Someone will want an error handler for this.
+                tulip_log.exception('Accept failed')
+                break
             else:
-                transport = self._make_socket_transport(
-                    conn, extra={'addr': addr})
-            connection_handler(transport)
+                if ssl:
+                    transport = self._make_ssl_transport(
+                        conn, ssl, None,
+                        server_side=True, extra={'addr': addr})
+                else:
+                    transport = self._make_socket_transport(
+                        conn, extra={'addr': addr})
+                if limit is not None:
+                    limit.attach(transport)
+                connection_handler(transport)
+
+    def _get_fd_info(self, fd):
+        """Like selector.get_info(), including changes not applied yet."""
+        try:
+            return self._fd_changes[fd]
+        except KeyError:
+            return self._selector.get_info(fd)
+
+    def _modify_fd(self, fd, mask, data):
+        """Change the events or callbacks of a registered fd.
+
+        The change is only recorded here; _apply_fd_changes() passes
+        the net change of the iteration to the selector right before
+        it polls, so that e.g. an add_writer() soon followed by a
+        remove_writer() costs no system call at all.
+        """
+        self._fd_changes[fd] = (mask, data)
+
+    def _unregister_fd(self, fd):
+        # Done at once: the fd may be closed and reused right after.
+        self._fd_changes.pop(fd, None)
+        self._selector.unregister(fd)
+
+    def _apply_fd_changes(self):
+        changes = self._fd_changes
+        self._fd_changes = {}
+        for fd, (mask, data) in changes.items():
+            try:
+                self._selector.modify(fd, mask, data)
+            except (OSError, ValueError):
+                # The fd was closed without being unregistered first.
+                tulip_log.exception('Cannot modify fd %r', fd)
+
+    def _add_edge_triggered(self, fd, reader, writer):
+        """Register fd with EVENT_EDGE and callbacks for both directions.
+
+        One of the callbacks may be None.  They stay registered until
+        removed with remove_reader() and remove_writer().
+        """
+        mask = selectors.EVENT_EDGE
+        if reader is not None:
+            mask |= selectors.EVENT_READ
+            reader = events.make_handle(reader, ())
+        if writer is not None:
+            mask |= selectors.EVENT_WRITE
+            writer = events.make_handle(writer, ())
+        self._selector.register(fd, mask, (reader, writer))
 
     def add_reader(self, fd, callback, *args):
         """Add a reader callback."""
         handle = events.make_handle(callback, args)
         try:
-            mask, (reader, writer) = self._selector.get_info(fd)
+            mask, (reader, writer) = self._get_fd_info(fd)
         except KeyError:
             self._selector.register(fd, selectors.EVENT_READ,
                                     (handle, None))
         else:
-            self._selector.modify(fd, mask | selectors.EVENT_READ,
-                                  (handle, writer))
+            self._modify_fd(fd, mask | selectors.EVENT_READ,
+                            (handle, writer))
             if reader is not None:
                 reader.cancel()
 
     def remove_reader(self, fd):
         """Remove a reader callback."""
         try:
-            mask, (reader, writer) = self._selector.get_info(fd)
+            mask, (reader, writer) = self._get_fd_info(fd)
         except KeyError:
             return False
         else:
             mask &= ~selectors.EVENT_READ
-            if not mask:
-                self._selector.unregister(fd)
+            if not mask & selectors.EVENT_WRITE:
+                self._unregister_fd(fd)
             else:
-                self._selector.modify(fd, mask, (None, writer))
+                self._modify_fd(fd, mask, (None, writer))
 
             if reader is not None:
                 reader.cancel()
@@ -161,29 +257,29 @@ class BaseSelectorEventLoop(base_events.BaseEventLoop):
         """Add a writer callback.."""
         handle = events.make_handle(callback, args)
         try:
-            mask, (reader, writer) = self._selector.get_info(fd)
+            mask, (reader, writer) = self._get_fd_info(fd)
         except KeyError:
             self._selector.register(fd, selectors.EVENT_WRITE,
                                     (None, handle))
         else:
-            self._selector.modify(fd, mask | selectors.EVENT_WRITE,
-                                  (reader, handle))
+            self._modify_fd(fd, mask | selectors.EVENT_WRITE,
+                            (reader, handle))
             if writer is not None:
                 writer.cancel()
 
     def remove_writer(self, fd):
         """Remove a writer callback."""
         try:
-            mask, (reader, writer) = self._selector.get_info(fd)
+            mask, (reader, writer) = self._get_fd_info(fd)
         except KeyError:
             return False
         else:
             # Remove both writer and connector.
             mask &= ~selectors.EVENT_WRITE
-            if not mask:
-                self._selector.unregister(fd)
+            if not mask & selectors.EVENT_READ:
+                self._unregister_fd(fd)
             else:
-                self._selector.modify(fd, mask, (reader, None))
+                self._modify_fd(fd, mask, (reader, None))
 
             if writer is not None:
                 writer.cancel()
@@ -282,9 +378,17 @@ class BaseSelectorEventLoop(base_events.BaseEventLoop):
             fut.set_result(None)
         except (BlockingIOError, InterruptedError):
             self.add_writer(fd, self._sock_connect, fut, True, sock, address)
+            if not registered:
+                # Don't leave the writer behind if the caller gives up.
+                fut.add_done_callback(
+                    functools.partial(self._sock_connect_done, fd))
         except Exception as exc:
             fut.set_exception(exc)
 
+    def _sock_connect_done(self, fd, fut):
+        if fut.cancelled():
+            self.remove_writer(fd)
+
     def sock_accept(self, sock):
         """XXX"""
         fut = futures.Future()
@@ -324,7 +428,53 @@ class BaseSelectorEventLoop(base_events.BaseEventLoop):
         sock.close()
 
 
-class _SelectorTransport(transports.Transport):
+class _ConnectionLimit:
+    """Connection count of a server started with max_connections.
+
+    When the server has max_connections open connections, its
+    listening sockets are removed from the selector, so that further
+    connections wait in the kernel's accept queue.  They are added
+    back when a connection is closed.
+    """
+
+    def __init__(self, loop, max_connections):
+        self._loop = loop
+        self.max_connections = max_connections
+        self.connections = 0
+        self.paused = False
+        self._listeners = []  # (sock, args for _accept_connection())
+
+    def add_listener(self, sock, args):
+        self._listeners.append((sock, args))
+
+    def attach(self, transport):
+        transport.add_close_callback(self.detach)
+        self.connections += 1
+        if not self.paused and self.connections >= self.max_connections:
+            self.paused = True
+            for sock, _ in self._listeners:
+                if sock.fileno() != -1:
+                    self._loop.remove_reader(sock.fileno())
+
+    def detach(self):
+        self.connections -= 1
+        if self.paused and self.connections < self.max_connections:
+            self.paused = False
+            for sock, args in self._listeners:
+                # Skip sockets closed by stop_serving() in the meantime.
+                if sock.fileno() != -1:
+                    self._loop.add_reader(
+                        sock.fileno(), self._loop._accept_connection, *args)
+
+
+class _SelectorTransport(transports._FlowControlMixin, transports.Transport):
+
+    # The read size adapts to the traffic between these bounds: it
+    # doubles when a read fills it, and halves when a read doesn't
+    # fill half of it.
+    min_read_size = 16 * 1024
+    max_read_size = 256 * 1024
+    max_reads = 4  # Reads per readiness event.
 
     def __init__(self, loop, sock, extra):
         super().__init__(extra)
@@ -333,13 +483,54 @@ class _SelectorTransport(transports.Transport):
         self._sock = sock
         self._sock_fd = sock.fileno()
         self._protocol = None
+        self._buffered = False  # Set for a BufferedProtocol.
+        self._read_size = self.min_read_size
         self._buffer = []
+        self._buffer_size = 0  # Bytes in the buffer.
         self._conn_lost = 0
         self._writing = True
         self._closing = False  # Set when close() called.
+        self._paused = False  # Set when pause() called.
+        self._close_callbacks = []  # None once they were called.
 
     def register_protocol(self, protocol):
         self._protocol = protocol
+        self._buffered = isinstance(protocol, protocols.BufferedProtocol)
+
+    def add_close_callback(self, callback):
+        if self._close_callbacks is None:
+            self._loop.call_soon(callback)
+        else:
+            self._close_callbacks.append(callback)
+
+    def _recv(self):
+        # Reads once and adjusts the read size.  Returns the data, or
+        # for a buffered protocol the number of bytes read into its
+        # buffer, and whether the read filled the buffer.
+        size = limit = self._read_size
+        if self._buffered:
+            buf = self._protocol.get_buffer(size)
+            try:
+                limit = len(buf)
+                data = n = self._sock.recv_into(buf)
+            finally:
+                del buf  # The protocol may resize it now.
+        else:
+            data = self._sock.recv(size)
+            n = len(data)
+
+        if n >= limit:
+            self._read_size = min(2 * size, self.max_read_size)
+            return data, True
+        if n < size // 2:
+            self._read_size = max(size // 2, self.min_read_size)
+        return data, False
+
+    def _data_received(self, data):
+        if self._buffered:
+            self._protocol.buffer_updated(data)
+        else:
+            self._protocol.data_received(data)
 
     def abort(self):
         self._force_close(None)
@@ -366,20 +557,42 @@ class _SelectorTransport(transports.Transport):
         self._loop.remove_writer(self._sock_fd)
         self._loop.remove_reader(self._sock_fd)
         self._buffer.clear()
+        self._buffer_size = 0
         self._loop.call_soon(self._call_connection_lost, exc)
 
+    def get_write_buffer_size(self):
+        return self._buffer_size
+
     def _call_connection_lost(self, exc):
+        self._flow_control_lost()
         try:
             self._protocol.connection_lost(exc)
         finally:
             self._sock.close()
             self._sock = None
+            self._call_close_callbacks()
+
+    def _call_close_callbacks(self):
+        callbacks = self._close_callbacks
+        if callbacks is None:
+            return
+        self._close_callbacks = None
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                tulip_log.exception('Close callback %r failed', callback)
 
 
 class _SelectorSocketTransport(_SelectorTransport):
 
     def __init__(self, loop, sock, waiter=None, extra=None):
         super().__init__(loop, sock, extra)
+        # Memoryviews of the data not sent yet.  The socket is handed
+        # several of them at once with sendmsg(), so that a partial
+        # send doesn't copy the whole backlog.
+        self._buffer = collections.deque()
+        self._sendmsg = getattr(sock, 'sendmsg', None)
 
         if waiter is not None:
             self._loop.call_soon(waiter.set_result, None)
@@ -389,22 +602,38 @@ class _SelectorSocketTransport(_SelectorTransport):
         self._loop.add_reader(self._sock_fd, self._read_ready)
 
     def _read_ready(self):
-        try:
-            data = self._sock.recv(16*1024)
-        except (BlockingIOError, InterruptedError):
-            pass
-        except ConnectionResetError as exc:
-            self._force_close(exc)
-        except Exception as exc:
-            self._fatal_error(exc)
-        else:
-            if data:
-                self._protocol.data_received(data)
+        for _ in range(self.max_reads):
+            try:
+                data, full = self._recv()
+            except (BlockingIOError, InterruptedError):
+                pass
+            except ConnectionResetError as exc:
+                self._force_close(exc)
+            except Exception as exc:
+                self._fatal_error(exc)
             else:
-                try:
-                    self._protocol.eof_received()
-                finally:
-                    self.close()
+                if data:
+                    self._data_received(data)
+                    # A full read means there is likely more to read.
+                    if full and not (self._paused or self._closing):
+                        continue
+                else:
+                    try:
+                        self._protocol.eof_received()
+                    finally:
+                        self.close()
+            break
+
+    def pause(self):
+        if not (self._paused or self._closing):
+            self._paused = True
+            self._loop.remove_reader(self._sock_fd)
+
+    def resume(self):
+        if self._paused:
+            self._paused = False
+            if not self._closing:
+                self._loop.add_reader(self._sock_fd, self._read_ready)
 
     def write(self, data):
         assert isinstance(data, bytes), repr(data)
@@ -430,35 +659,77 @@ class _SelectorSocketTransport(_SelectorTransport):
             if n == len(data):
                 return
             elif n:
-                data = data[n:]
+                data = memoryview(data)[n:]
             self._loop.add_writer(self._sock_fd, self._write_ready)
 
-        self._buffer.append(data)
+        self._buffer_data(data)
+        self._maybe_pause_protocol()
+
+    def writelines(self, list_of_data):
+        if self._buffer or not self._writing or self._conn_lost:
+            for data in list_of_data:
+                self.write(data)
+            return
+
+        for data in list_of_data:
+            assert isinstance(data, bytes), repr(data)
+            if data:
+                self._buffer_data(data)
+        if not self._buffer:
+            return
+        # Send it all with one system call.
+        try:
+            self._send_buffer()
+        except (BlockingIOError, InterruptedError):
+            pass
+        except socket.error as exc:
+            self._fatal_error(exc)
+            return
+        if self._buffer:
+            self._loop.add_writer(self._sock_fd, self._write_ready)
+            self._maybe_pause_protocol()
+
+    def _buffer_data(self, data):
+        self._buffer.append(memoryview(data))
+        self._buffer_size += len(data)
+
+    def _send_buffer(self):
+        """Send the start of the buffer with one system call.
+
+        Errors of send() are propagated, BlockingIOError included.
+        """
+        buffer = self._buffer
+        if len(buffer) == 1 or self._sendmsg is None:
+            n = self._sock.send(buffer[0])
+        else:
+            n = self._sendmsg(itertools.islice(buffer, _IOV_MAX))
+        self._buffer_size -= n
+        while n:
+            data = buffer[0]
+            if n < len(data):
+                buffer[0] = data[n:]
+                break
+            buffer.popleft()
+            n -= len(data)
 
     def _write_ready(self):
         if not self._writing:
             return  # transmission off
 
-        data = b''.join(self._buffer)
-        assert data, 'Data should not be empty'
+        assert self._buffer, 'Data should not be empty'
 
-        self._buffer.clear()
         try:
-            n = self._sock.send(data)
+            self._send_buffer()
         except (BlockingIOError, InterruptedError):
-            self._buffer.append(data)
+            pass
         except Exception as exc:
             self._fatal_error(exc)
         else:
-            if n == len(data):
+            self._maybe_resume_protocol()
+            if not self._buffer:
                 self._loop.remove_writer(self._sock_fd)
                 if self._closing:
                     self._call_connection_lost(None)
-                return
-            elif n:
-                data = data[n:]
-
-            self._buffer.append(data)  # Try again later.
 
     def pause_writing(self):
         if self._writing:
@@ -476,10 +747,130 @@ class _SelectorSocketTransport(_SelectorTransport):
         if self._buffer:
             self._loop.remove_writer(self._sock_fd)
             self._buffer.clear()
+            self._buffer_size = 0
+            self._maybe_resume_protocol()
+
+
+class _SelectorEdgeSocketTransport(_SelectorSocketTransport):
+    """Socket transport for an edge-triggered event loop.
+
+    The socket is registered for reading and writing once.  Since the
+    selector only reports changes of readiness, every read and write
+    goes on until EAGAIN; an edge seen while there is nothing to write
+    or while writing is paused is just ignored, and writing is retried
+    when there is again something to do.
+    """
+
+    def register_protocol(self, protocol):
+        _SelectorTransport.register_protocol(self, protocol)
+        self._loop._add_edge_triggered(
+            self._sock_fd, self._read_ready, self._write_ready)
+
+    def _read_ready(self):
+        reads = 0
+        while not (self._paused or self._closing):
+            if reads == self.max_reads:
+                # Let others run.  No edge is coming for what's left.
+                self._loop.call_soon(self._read_ready)
+                break
+            try:
+                data, _ = self._recv()
+            except InterruptedError:
+                continue
+            except BlockingIOError:
+                break
+            except ConnectionResetError as exc:
+                self._force_close(exc)
+            except Exception as exc:
+                self._fatal_error(exc)
+            else:
+                if data:
+                    reads += 1
+                    self._data_received(data)
+                    continue
+                try:
+                    self._protocol.eof_received()
+                finally:
+                    self.close()
+            break
+
+    def pause(self):
+        # The socket stays registered; the read loop just stops.
+        self._paused = True
+
+    def resume(self):
+        if self._paused:
+            self._paused = False
+            if not self._closing:
+                self._loop.call_soon(self._read_ready)
+
+    def write(self, data):
+        if self._buffer or not self._writing or self._conn_lost or not data:
+            super().write(data)  # Checks and buffers, sends nothing.
+        else:
+            assert isinstance(data, bytes), repr(data)
+            self._buffer_data(data)
+            self._write_ready()
+            self._maybe_pause_protocol()
+
+    def writelines(self, list_of_data):
+        if self._buffer or not self._writing or self._conn_lost:
+            super().writelines(list_of_data)
+        else:
+            for data in list_of_data:
+                assert isinstance(data, bytes), repr(data)
+                if data:
+                    self._buffer_data(data)
+            self._write_ready()
+            self._maybe_pause_protocol()
+
+    def _write_ready(self):
+        if not self._buffer or not self._writing:
+            return
+
+        while self._buffer:
+            try:
+                self._send_buffer()
+            except InterruptedError:
+                continue
+            except BlockingIOError:
+                break  # Wait for the next edge.
+            except Exception as exc:
+                self._fatal_error(exc)
+                return
+
+        self._maybe_resume_protocol()
+        if not self._buffer and self._closing:
+            self._loop.remove_writer(self._sock_fd)
+            self._call_connection_lost(None)
+
+    def pause_writing(self):
+        self._writing = False
+
+    def resume_writing(self):
+        if not self._writing:
+            self._writing = True
+            # Edges may have been missed meanwhile.
+            if self._buffer:
+                self._loop.call_soon(self._write_ready)
+
+    def discard_output(self):
+        self._buffer.clear()
+        self._buffer_size = 0
+        self._maybe_resume_protocol()
+
+    def close(self):
+        if not self._closing and not self._buffer:
+            self._loop.remove_writer(self._sock_fd)
+        super().close()
 
 
 class _SelectorSslTransport(_SelectorTransport):
 
+    # A read returns at most one TLS record, so bigger reads don't help.
+    min_read_size = 8 * 1024
+    max_read_size = 16 * 1024
+
     def __init__(self, loop, rawsock, sslcontext, waiter=None,
                  server_side=False, extra=None):
         if server_side:
@@ -502,7 +893,7 @@ class _SelectorSslTransport(_SelectorTransport):
 
     def register_protocol(self, protocol):
         super().register_protocol(protocol)
-        if self._handshake_done:
+        if self._handshake_done and not self._paused:
             self._loop.add_reader(self._sock_fd, self._on_ready)
 
     def _on_handshake(self):
@@ -516,11 +907,13 @@ class _SelectorSslTransport(_SelectorTransport):
             return
         except Exception as exc:
             self._sock.close()
+            self._call_close_callbacks()
             if self._waiter is not None:
                 self._waiter.set_exception(exc)
             return
         except BaseException as exc:
             self._sock.close()
+            self._call_close_callbacks()
             if self._waiter is not None:
                 self._waiter.set_exception(exc)
             raise
@@ -529,7 +922,7 @@ class _SelectorSslTransport(_SelectorTransport):
         self._loop.add_writer(self._sock_fd, self._on_ready)
         self._handshake_done = True
 
-        if self._protocol:
+        if self._protocol and not self._paused:
             self._loop.add_reader(self._sock_fd, self._on_ready)
         if self._waiter is not None:
             self._loop.call_soon(self._waiter.set_result, None)
@@ -541,9 +934,11 @@ class _SelectorSslTransport(_SelectorTransport):
         # should do next.
 
         # First try reading.
-        if self._protocol and not self._closing:
+        for _ in range(self.max_reads):
+            if not self._protocol or self._paused or self._closing:
+                break
             try:
-                data = self._sock.recv(8192)
+                data, full = self._recv()
             except (BlockingIOError, InterruptedError,
                     ssl.SSLWantReadError, ssl.SSLWantWriteError):
                 pass
@@ -553,12 +948,15 @@ class _SelectorSslTransport(_SelectorTransport):
                 self._fatal_error(exc)
             else:
                 if data:
-                    self._protocol.data_received(data)
+                    self._data_received(data)
+                    if full:
+                        continue
                 else:
                     try:
                         self._protocol.eof_received()
                     finally:
                         self.close()
+            break
 
         # Now try writing, if there's anything to write.
         if self._buffer:
@@ -575,6 +973,8 @@ class _SelectorSslTransport(_SelectorTransport):
 
             if n < len(data):
                 self._buffer.append(data[n:])
+            self._buffer_size = len(data) - n
+            self._maybe_resume_protocol()
 
         if self._closing and not self._buffer:
             self._loop.remove_writer(self._sock_fd)
@@ -592,8 +992,23 @@ class _SelectorSslTransport(_SelectorTransport):
             return
 
         self._buffer.append(data)
+        self._buffer_size += len(data)
+        self._maybe_pause_protocol()
         # We could optimize, but the callback can do this for now.
 
+    def pause(self):
+        if not (self._paused or self._closing):
+            self._paused = True
+            if self._handshake_done:
+                self._loop.remove_reader(self._sock_fd)
+
+    def resume(self):
+        if self._paused:
+            self._paused = False
+            if (self._handshake_done and self._protocol and
+                    not self._closing):
+                self._loop.add_reader(self._sock_fd, self._on_ready)
+
     def close(self):
         if self._closing:
             return
@@ -658,10 +1073,13 @@ class _SelectorDatagramTransport(_SelectorTransport):
                 return
 
         self._buffer.append((data, addr))
+        self._buffer_size += len(data)
+        self._maybe_pause_protocol()
 
     def _sendto_ready(self):
         while self._buffer:
             data, addr = self._buffer.popleft()
+            self._buffer_size -= len(data)
             try:
                 if self._address:
                     self._sock.send(data)
@@ -673,11 +1091,13 @@ class _SelectorDatagramTransport(_SelectorTransport):
                 return
             except (BlockingIOError, InterruptedError):
                 self._buffer.appendleft((data, addr))  # Try again later.
+                self._buffer_size += len(data)
                 break
             except Exception as exc:
                 self._fatal_error(exc)
                 return
 
+        self._maybe_resume_protocol()
         if not self._buffer:
             self._loop.remove_writer(self._sock_fd)
             if self._closing:
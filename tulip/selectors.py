@@ -14,6 +14,8 @@ from .log import tulip_log
 EVENT_READ = (1 << 0)
 # write event
 EVENT_WRITE = (1 << 1)
+# flag: only report changes of readiness (see EpollSelector)
+EVENT_EDGE = (1 << 2)
 
 
 def _fileobj_to_fd(fileobj):
@@ -35,6 +37,12 @@ def _fileobj_to_fd(fileobj):
     return fd
 
 
+def _check_events(events, flags=0):
+    if (not events & (EVENT_READ|EVENT_WRITE) or
+            events & ~(EVENT_READ|EVENT_WRITE|flags)):
+        raise ValueError("Invalid events: {}".format(events))
+
+
 class SelectorKey:
     """Object used internally to associate a file object to its backing file
     descriptor, selected event mask and attached data."""
@@ -66,6 +74,9 @@ class _BaseSelector:
     performant implementation on the current platform.
     """
 
+    # Flags besides EVENT_READ and EVENT_WRITE that register() accepts.
+    supported_flags = 0
+
     def __init__(self):
         # this maps file descriptors to keys
         self._fd_to_key = {}
@@ -83,8 +94,7 @@ class _BaseSelector:
         Returns:
         SelectorKey instance
         """
-        if (not events) or (events & ~(EVENT_READ|EVENT_WRITE)):
-            raise ValueError("Invalid events: {}".format(events))
+        _check_events(events, self.supported_flags)
 
         if fileobj in self._fileobj_to_key:
             raise ValueError("{!r} is already registered".format(fileobj))
@@ -119,18 +129,20 @@ class _BaseSelector:
         events  -- events to monitor (bitwise mask of EVENT_READ|EVENT_WRITE)
         data    -- attached data
         """
-        # TODO: Subclasses can probably optimize this even further.
+        key = self._get_key(fileobj)
+        if events != key.events:
+            # Subclasses change the events without unregistering.
+            self.unregister(fileobj)
+            return self.register(fileobj, events, data)
+        # Only the data changed, if anything: the OS needn't know.
+        key.data = data
+        return key
+
+    def _get_key(self, fileobj):
         try:
-            key = self._fileobj_to_key[fileobj]
+            return self._fileobj_to_key[fileobj]
         except KeyError:
             raise ValueError("{!r} is not registered".format(fileobj))
-        if events != key.events or data != key.data:
-            # TODO: If only the data changed, use a shortcut that only
-            # updates the data.
-            self.unregister(fileobj)
-            return self.register(fileobj, events, data)
-        else:
-            return key
 
     def select(self, timeout=None):
         """Perform the actual selection, until some monitored file objects are
@@ -224,6 +236,22 @@ class SelectSelector(_BaseSelector):
         self._writers.discard(key.fd)
         return key
 
+    def modify(self, fileobj, events, data=None):
+        key = self._get_key(fileobj)
+        if events != key.events:
+            _check_events(events)
+            if events & EVENT_READ:
+                self._readers.add(key.fd)
+            else:
+                self._readers.discard(key.fd)
+            if events & EVENT_WRITE:
+                self._writers.add(key.fd)
+            else:
+                self._writers.discard(key.fd)
+            key.events = events
+        key.data = data
+        return key
+
     def select(self, timeout=None):
         try:
             r, w, _ = self._select(self._readers, self._writers, [], timeout)
@@ -266,14 +294,17 @@ if 'poll' in globals():
             super().__init__()
             self._poll = poll()
 
-        def register(self, fileobj, events, data=None):
-            key = super().register(fileobj, events, data)
+        def _poll_events(self, events):
             poll_events = 0
             if events & EVENT_READ:
                 poll_events |= POLLIN
             if events & EVENT_WRITE:
                 poll_events |= POLLOUT
-            self._poll.register(key.fd, poll_events)
+            return poll_events
+
+        def register(self, fileobj, events, data=None):
+            key = super().register(fileobj, events, data)
+            self._poll.register(key.fd, self._poll_events(events))
             return key
 
         def unregister(self, fileobj):
@@ -281,6 +312,15 @@ if 'poll' in globals():
             self._poll.unregister(key.fd)
             return key
 
+        def modify(self, fileobj, events, data=None):
+            key = self._get_key(fileobj)
+            if events != key.events:
+                _check_events(events)
+                self._poll.modify(key.fd, self._poll_events(events))
+                key.events = events
+            key.data = data
+            return key
+
         def select(self, timeout=None):
             timeout = None if timeout is None else int(1000 * timeout)
             ready = []
@@ -305,7 +345,17 @@ if 'poll' in globals():
 if 'epoll' in globals():
 
     class EpollSelector(_BaseSelector):
-        """Epoll-based selector."""
+        """Epoll-based selector.
+
+        A file object registered with EVENT_EDGE in its events is
+        watched edge-triggered, for reading and writing alike whatever
+        the events; select() reports the edges the events ask for.
+        Changing the events of such a file object is free, but readiness
+        is only reported when it changes: the user must read and write
+        until EAGAIN.
+        """
+
+        supported_flags = EVENT_EDGE
 
         def __init__(self):
             super().__init__()
@@ -314,14 +364,19 @@ if 'epoll' in globals():
         def fileno(self):
             return self._epoll.fileno()
 
-        def register(self, fileobj, events, data=None):
-            key = super().register(fileobj, events, data)
+        def _epoll_events(self, events):
+            if events & EVENT_EDGE:
+                return EPOLLIN | EPOLLOUT | EPOLLET
             epoll_events = 0
             if events & EVENT_READ:
                 epoll_events |= EPOLLIN
             if events & EVENT_WRITE:
                 epoll_events |= EPOLLOUT
-            self._epoll.register(key.fd, epoll_events)
+            return epoll_events
+
+        def register(self, fileobj, events, data=None):
+            key = super().register(fileobj, events, data)
+            self._epoll.register(key.fd, self._epoll_events(events))
             return key
 
         def unregister(self, fileobj):
@@ -329,6 +384,18 @@ if 'epoll' in globals():
             self._epoll.unregister(key.fd)
             return key
 
+        def modify(self, fileobj, events, data=None):
+            key = self._get_key(fileobj)
+            if events != key.events:
+                _check_events(events, EVENT_EDGE)
+                epoll_events = self._epoll_events(events)
+                if epoll_events != self._epoll_events(key.events):
+                    # One EPOLL_CTL_MOD instead of a DEL and an ADD.
+                    self._epoll.modify(key.fd, epoll_events)
+                key.events = events
+            key.data = data
+            return key
+
         def select(self, timeout=None):
             timeout = -1 if timeout is None else timeout
             max_ev = self.registered_count()
@@ -346,7 +413,7 @@ if 'epoll' in globals():
                     events |= EVENT_READ
 
                 key = self._key_from_fd(fd)
-                if key:
+                if key and events & key.events:
                     ready.append((key.fileobj, events & key.events, key.data))
             return ready
 
@@ -387,6 +454,23 @@ if 'kqueue' in globals():
                 self._kqueue.control([kev], 0, 0)
             return key
 
+        def modify(self, fileobj, events, data=None):
+            key = self._get_key(fileobj)
+            if events != key.events:
+                _check_events(events)
+                # Only add or delete the filters that change.
+                kevs = []
+                for event, kq_filter in ((EVENT_READ, KQ_FILTER_READ),
+                                         (EVENT_WRITE, KQ_FILTER_WRITE)):
+                    if events & event and not key.events & event:
+                        kevs.append(kevent(key.fd, kq_filter, KQ_EV_ADD))
+                    elif key.events & event and not events & event:
+                        kevs.append(kevent(key.fd, kq_filter, KQ_EV_DELETE))
+                self._kqueue.control(kevs, 0, 0)
+                key.events = events
+            key.data = data
+            return key
+
         def select(self, timeout=None):
             max_ev = self.registered_count()
             ready = []
@@ -0,0 +1,493 @@
+"""Prefork server supervisor.  UNIX only.
+
+A Supervisor forks worker processes that each run an event loop and
+serve connections from a listening socket shared by all of them, or,
+with reuse_port, from sockets of their own bound with SO_REUSEPORT.
+The supervisor respawns workers that exit unexpectedly, kills and
+respawns workers that stop answering its heartbeats, and restarts all
+workers one by one (a graceful rolling reload) on SIGHUP.  SIGINT and
+SIGTERM stop the workers gracefully and then the supervisor.
+
+The supervisor and each worker are connected by a pair of pipes
+carrying WebSocket frames: pings and pongs for the heartbeat, and JSON
+text messages for control.  Applications can use the same channel
+with Supervisor.send() and Worker.send().
+"""
+
+__all__ = ['Supervisor', 'Worker']
+
+import json
+import os
+import signal
+import socket
+
+from . import events
+from . import futures
+from . import loopgroup
+from . import parsers
+from . import tasks
+from .http import websocket
+from .log import tulip_log
+
+
+# A worker that exits within this many seconds of being started is
+# respawned after respawn_delay seconds instead of at once.
+_MIN_WORKER_LIFETIME = 1.0
+
+# Extra time given to a worker to exit after its graceful timeout.
+_STOP_MARGIN = 5.0
+
+
+def _close_fds(*fds):
+    for fd in fds:
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+
+
+class _Channel:
+    """Both ends of the pipes between the supervisor and a worker."""
+
+    def __init__(self, loop, read_fd, write_fd):
+        self._loop = loop
+        self._read_fd = read_fd
+        self._write_fd = write_fd
+        self._transports = ()
+        self.reader = None
+        self.writer = None
+
+    @tasks.coroutine
+    def connect(self):
+        read_transport = yield from self._loop.connect_read_pipe(
+            os.fdopen(self._read_fd, 'rb'))
+        proto = parsers.StreamProtocol(read_transport)
+        write_transport = yield from self._loop.connect_write_pipe(
+            os.fdopen(self._write_fd, 'wb'))
+        parsers.StreamProtocol(write_transport)
+        self._transports = (read_transport, write_transport)
+        self.reader = proto.set_parser(websocket.WebSocketParser())
+        self.writer = websocket.WebSocketWriter(write_transport)
+
+    def send(self, message):
+        self.writer.send(json.dumps(message))
+
+    def close(self):
+        for transport in self._transports:
+            transport.close()
+        self._transports = ()
+
+    def close_fds(self):
+        """Close the raw fds; used in forked children."""
+        _close_fds(self._read_fd, self._write_fd)
+
+
+class Worker:
+    """A worker process, as seen from inside it.
+
+    The supervisor's on_start callback is called with the Worker once
+    it serves connections.  Set on_message to a callable to receive the
+    messages sent with Supervisor.send().
+    """
+
+    def __init__(self, supervisor, read_fd, write_fd):
+        self.pid = os.getpid()
+        self.loop = None
+        self.sockets = []
+        self.on_message = None
+        self._supervisor = supervisor
+        self._read_fd = read_fd
+        self._write_fd = write_fd
+        self._channel = None
+        self._connections = 0
+        self._stopping = False
+        self._deadline = None
+
+    def __repr__(self):
+        return '{}<pid={}, connections={}>'.format(
+            self.__class__.__name__, self.pid, self.connections)
+
+    @property
+    def connections(self):
+        """Number of open connections."""
+        return self._connections
+
+    def run(self):
+        """Run the worker; never returns."""
+        status = 0
+        try:
+            self._run()
+        except BaseException:
+            tulip_log.exception('Worker %s failed', self.pid)
+            status = 1
+        finally:
+            os._exit(status)
+
+    def _run(self):
+        # The supervisor's loop was inherited; leave it alone.
+        signal.set_wakeup_fd(-1)
+        for sig in (signal.SIGHUP, signal.SIGTERM):
+            signal.signal(sig, signal.SIG_DFL)
+        # ^C goes to the whole process group; the supervisor handles it.
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+        supervisor = self._supervisor
+        self.loop = loop = events.new_event_loop()
+        events.set_event_loop(loop)
+        loop.add_signal_handler(signal.SIGTERM, self.stop)
+
+        if supervisor.reuse_port:
+            self.sockets = loopgroup.bind_sockets(
+                supervisor.host, supervisor.port, supervisor.family,
+                reuse_port=True)
+        else:
+            self.sockets = list(supervisor.sockets)
+
+        self._channel = _Channel(loop, self._read_fd, self._write_fd)
+        loop.run_until_complete(self._channel.connect())
+        tasks.Task(self._read_messages())
+        for sock in self.sockets:
+            loop.run_until_complete(loop.start_serving(
+                self._handle_connection, sock=sock,
+                backlog=supervisor.backlog))
+        if supervisor.on_start is not None:
+            supervisor.on_start(self)
+        self._channel.send({'type': 'ready'})
+        loop.run_forever()
+
+    def _handle_connection(self, transport):
+        self._connections += 1
+        transport.add_close_callback(self._connection_closed)
+        self._supervisor.connection_handler(transport)
+
+    def _connection_closed(self):
+        self._connections -= 1
+
+    @tasks.coroutine
+    def _read_messages(self):
+        while True:
+            msg = yield from self._channel.reader.read()
+            if msg is None:
+                tulip_log.warning(
+                    'Supervisor is gone, worker %s exiting', self.pid)
+                self.loop.stop()
+                return
+            if msg.tp == websocket.MSG_PING:
+                self._channel.writer.pong()
+            elif msg.tp == websocket.MSG_TEXT:
+                message = json.loads(msg.data)
+                if message['type'] == 'stop':
+                    self.stop()
+                elif (message['type'] == 'message' and
+                        self.on_message is not None):
+                    self.on_message(message['data'])
+
+    def send(self, data):
+        """Send a JSON-serializable message to the supervisor."""
+        self._channel.send({'type': 'message', 'data': data})
+
+    def stop(self):
+        """Stop accepting and exit when all connections are closed.
+
+        The worker exits after the supervisor's graceful_timeout even
+        if connections are still open.
+        """
+        if self._stopping:
+            return
+        self._stopping = True
+        for sock in self.sockets:
+            self.loop.stop_serving(sock)
+        self._deadline = self.loop.time() + self._supervisor.graceful_timeout
+        self._check_stopped()
+
+    def _check_stopped(self):
+        if self.connections <= 0 or self.loop.time() >= self._deadline:
+            self.loop.stop()
+        else:
+            self.loop.call_later(0.1, self._check_stopped)
+
+
+class _WorkerProcess:
+    """A worker process, as seen from the supervisor."""
+
+    def __init__(self, supervisor, pid, channel):
+        self._supervisor = supervisor
+        self._loop = supervisor.loop
+        self.pid = pid
+        self.channel = channel
+        self.started = self.last_pong = self._loop.time()
+        self.stopping = False
+        self.ready = futures.Future(loop=self._loop)
+        self.exited = futures.Future(loop=self._loop)
+        self._chat_task = tasks.Task(self._chat(), loop=self._loop)
+        self._heartbeat_task = tasks.Task(self._heartbeat(), loop=self._loop)
+
+    def __repr__(self):
+        return '<worker pid={}>'.format(self.pid)
+
+    @tasks.coroutine
+    def _chat(self):
+        reader = self.channel.reader
+        while True:
+            try:
+                msg = yield from reader.read()
+            except websocket.WebSocketError:
+                tulip_log.exception('Bad message from worker %s', self.pid)
+                msg = None
+            if msg is None:
+                break
+            if msg.tp == websocket.MSG_PONG:
+                self.last_pong = self._loop.time()
+            elif msg.tp == websocket.MSG_TEXT:
+                self.last_pong = self._loop.time()
+                message = json.loads(msg.data)
+                if message['type'] == 'ready':
+                    if not self.ready.done():
+                        self.ready.set_result(None)
+                elif message['type'] == 'message':
+                    self._supervisor._worker_message(self, message['data'])
+
+        # The worker closed its end of the pipe: it exited (or is
+        # about to).  Collect it.
+        self._heartbeat_task.cancel()
+        self.channel.close()
+        _, status = yield from self._loop.run_in_executor(
+            None, os.waitpid, self.pid, 0)
+        if not self.ready.done():
+            self.ready.set_exception(
+                RuntimeError('worker {} exited before it was ready'.format(
+                    self.pid)))
+        self.exited.set_result(status)
+        self._supervisor._worker_exited(self, status)
+
+    @tasks.coroutine
+    def _heartbeat(self):
+        supervisor = self._supervisor
+        while True:
+            yield from tasks.sleep(supervisor.heartbeat_interval,
+                                   loop=self._loop)
+            silence = self._loop.time() - self.last_pong
+            if silence > supervisor.heartbeat_timeout:
+                tulip_log.warning(
+                    'Worker %s is not responding, killing it', self.pid)
+                self.kill()
+                return
+            self.channel.writer.ping()
+
+    def send(self, data):
+        self.channel.send({'type': 'message', 'data': data})
+
+    def kill(self, sig=signal.SIGKILL):
+        try:
+            os.kill(self.pid, sig)
+        except ProcessLookupError:
+            pass
+
+    @tasks.coroutine
+    def stop(self):
+        """Ask the worker to stop gracefully and wait until it exited."""
+        self.stopping = True
+        if not self.exited.done():
+            self.channel.send({'type': 'stop'})
+            timeout = self._supervisor.graceful_timeout + _STOP_MARGIN
+            yield from tasks.wait([self.exited], timeout=timeout,
+                                  loop=self._loop)
+            if not self.exited.done():
+                tulip_log.warning(
+                    'Worker %s did not stop in time, killing it', self.pid)
+                self.kill()
+                yield from self.exited
+
+
+class Supervisor:
+    """Prefork server supervisor.
+
+    connection_handler is called with each accepted transport, in the
+    worker process that accepted it, like for start_serving().
+    on_start(worker) is called in each worker once it serves
+    connections, and on_message(pid, data) in the supervisor for
+    messages sent with Worker.send().
+
+    Call run() to serve until SIGINT or SIGTERM, or drive the start(),
+    reload() and stop() coroutines from a running loop.
+    """
+
+    def __init__(self, connection_handler, host=None, port=None, *,
+                 workers=None, family=socket.AF_UNSPEC, backlog=1024,
+                 reuse_port=False, heartbeat_interval=5.0,
+                 heartbeat_timeout=15.0, graceful_timeout=30.0,
+                 respawn_delay=1.0, on_start=None, on_message=None,
+                 loop=None):
+        if workers is None:
+            workers = loopgroup.default_size()
+        if workers < 1:
+            raise ValueError('workers must be at least 1')
+        if reuse_port and not hasattr(socket, 'SO_REUSEPORT'):
+            raise ValueError('SO_REUSEPORT is not supported')
+        self.connection_handler = connection_handler
+        self.host = host
+        self.port = port
+        self.family = family
+        self.backlog = backlog
+        self.reuse_port = reuse_port
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.graceful_timeout = graceful_timeout
+        self.respawn_delay = respawn_delay
+        self.on_start = on_start
+        self.on_message = on_message
+        self.loop = loop if loop is not None else events.get_event_loop()
+        self.sockets = []
+        self._size = workers
+        self._workers = {}  # pid -> _WorkerProcess
+        self._stopping = False
+        self._reloading = False
+
+    def __repr__(self):
+        return '{}<workers={}>'.format(
+            self.__class__.__name__, sorted(self._workers))
+
+    @property
+    def workers(self):
+        """The list of pids of the running workers."""
+        return sorted(pid for pid, worker in self._workers.items()
+                      if not worker.stopping)
+
+    @tasks.coroutine
+    def start(self):
+        """Bind the sockets and start the workers.
+
+        Wait until all workers serve connections.  With reuse_port,
+        the supervisor's sockets are bound but not listening; they
+        only reserve the port.
+        """
+        self.sockets = loopgroup.bind_sockets(
+            self.host, self.port, self.family, reuse_port=self.reuse_port)
+        if self.reuse_port:
+            self.port = self.sockets[0].getsockname()[1]
+        else:
+            for sock in self.sockets:
+                sock.listen(self.backlog)
+                sock.setblocking(False)
+        workers = []
+        for _ in range(self._size):
+            worker = yield from self._spawn()
+            workers.append(worker)
+        yield from tasks.wait([worker.ready for worker in workers],
+                              loop=self.loop)
+
+    @tasks.coroutine
+    def _spawn(self):
+        down_read, down_write = os.pipe()  # supervisor -> worker
+        up_read, up_write = os.pipe()  # worker -> supervisor
+        pid = os.fork()
+        if not pid:
+            try:
+                _close_fds(down_write, up_read)
+                for worker in self._workers.values():
+                    worker.channel.close_fds()
+                if self.reuse_port:
+                    for sock in self.sockets:
+                        sock.close()
+                Worker(self, down_read, up_write).run()
+            finally:
+                os._exit(1)
+
+        _close_fds(down_read, up_write)
+        channel = _Channel(self.loop, up_read, down_write)
+        yield from channel.connect()
+        worker = _WorkerProcess(self, pid, channel)
+        self._workers[pid] = worker
+        tulip_log.info('Started worker %s', pid)
+        return worker
+
+    def _worker_exited(self, worker, status):
+        if self._workers.get(worker.pid) is worker:
+            del self._workers[worker.pid]
+        if worker.stopping or self._stopping:
+            tulip_log.info('Worker %s stopped', worker.pid)
+            return
+        tulip_log.warning('Worker %s exited unexpectedly (status %s)',
+                          worker.pid, status)
+        delay = 0
+        if self.loop.time() - worker.started < _MIN_WORKER_LIFETIME:
+            delay = self.respawn_delay
+        tasks.Task(self._respawn(delay), loop=self.loop)
+
+    @tasks.coroutine
+    def _respawn(self, delay):
+        if delay:
+            yield from tasks.sleep(delay, loop=self.loop)
+        if not self._stopping:
+            yield from self._spawn()
+
+    def _worker_message(self, worker, data):
+        if self.on_message is not None:
+            self.on_message(worker.pid, data)
+
+    def send(self, data, pid=None):
+        """Send a JSON-serializable message to one or all workers."""
+        if pid is not None:
+            self._workers[pid].send(data)
+        else:
+            for worker in self._workers.values():
+                if not worker.stopping:
+                    worker.send(data)
+
+    @tasks.coroutine
+    def reload(self):
+        """Replace the workers one by one.
+
+        Each new worker must be ready before the worker it replaces is
+        stopped gracefully, so the service never goes down.  The
+        reload is abandoned if a new worker fails to start.
+        """
+        if self._reloading or self._stopping:
+            return
+        self._reloading = True
+        try:
+            for old in list(self._workers.values()):
+                if old.stopping or old.exited.done():
+                    continue
+                new = yield from self._spawn()
+                yield from tasks.wait([new.ready],
+                                      timeout=self.graceful_timeout,
+                                      loop=self.loop)
+                if not new.ready.done() or new.ready.exception():
+                    tulip_log.error('Worker %s failed to start, '
+                                    'reload abandoned', new.pid)
+                    return
+                yield from old.stop()
+        finally:
+            self._reloading = False
+
+    @tasks.coroutine
+    def stop(self):
+        """Stop all workers gracefully and close the sockets."""
+        self._stopping = True
+        workers = list(self._workers.values())
+        if workers:
+            yield from tasks.wait([worker.stop() for worker in workers],
+                                  loop=self.loop)
+        for sock in self.sockets:
+            sock.close()
+        self.sockets = []
+
+    def run(self):
+        """Start the workers and serve until SIGINT or SIGTERM."""
+        loop = self.loop
+        loop.run_until_complete(self.start())
+
+        def stop():
+            task = tasks.Task(self.stop(), loop=loop)
+            task.add_done_callback(lambda task: loop.stop())
+
+        loop.add_signal_handler(
+            signal.SIGHUP, lambda: tasks.Task(self.reload(), loop=loop))
+        loop.add_signal_handler(signal.SIGINT, stop)
+        loop.add_signal_handler(signal.SIGTERM, stop)
+        try:
+            loop.run_forever()
+        finally:
+            for sig in (signal.SIGHUP, signal.SIGINT, signal.SIGTERM):
+                loop.remove_signal_handler(sig)
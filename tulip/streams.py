@@ -17,12 +17,42 @@ class StreamReader:
         self.eof = False  # Whether we're done.
         self.waiter = None  # A future.
         self._exception = None
+        self._transport = None
+        self._paused = False
+
+    def set_transport(self, transport):
+        """Pause reading from the transport while too much is buffered.
+
+        Reading is paused once more than twice the limit is buffered,
+        and resumed once no more than the limit is left.
+        """
+        assert self._transport is None, 'Transport already set'
+        self._transport = transport
+
+    def _maybe_resume_transport(self):
+        if self._paused and self.byte_count <= self.limit:
+            self._paused = False
+            self._transport.resume()
+
+    @tasks.coroutine
+    def _wait_for_data(self):
+        # Whatever is buffered isn't enough for the reader, so more
+        # has to be read even if that goes over the limit.
+        if self._paused:
+            self._paused = False
+            self._transport.resume()
+
+        assert self.waiter is None
+        self.waiter = futures.Future()
+        yield from self.waiter
 
     def exception(self):
         return self._exception
 
     def set_exception(self, exc):
         self._exception = exc
+        self._transport = None
+        self._paused = False
 
         waiter = self.waiter
         if waiter is not None:
@@ -31,6 +61,8 @@ class StreamReader:
 
     def feed_eof(self):
         self.eof = True
+        self._transport = None
+        self._paused = False
         waiter = self.waiter
         if waiter is not None:
             self.waiter = None
@@ -48,6 +80,16 @@ class StreamReader:
             self.waiter = None
             waiter.set_result(False)
 
+        if (self._transport is not None and not self._paused and
+                self.byte_count > 2*self.limit):
+            try:
+                self._transport.pause()
+            except NotImplementedError:
+                # The transport can't be paused; just buffer everything.
+                self._transport = None
+            else:
+                self._paused = True
+
     @tasks.coroutine
     def readline(self):
         if self._exception is not None:
@@ -75,18 +117,18 @@ class StreamReader:
 
                 if parts_size > self.limit:
                     self.byte_count -= parts_size
+                    self._maybe_resume_transport()
                     raise ValueError('Line is too long')
 
             if self.eof:
                 break
 
             if not_enough:
-                assert self.waiter is None
-                self.waiter = futures.Future()
-                yield from self.waiter
+                yield from self._wait_for_data()
 
         line = b''.join(parts)
         self.byte_count -= parts_size
+        self._maybe_resume_transport()
 
         return line
 
@@ -100,19 +142,16 @@ class StreamReader:
 
         if n < 0:
             while not self.eof:
-                assert not self.waiter
-                self.waiter = futures.Future()
-                yield from self.waiter
+                yield from self._wait_for_data()
         else:
             if not self.byte_count and not self.eof:
-                assert not self.waiter
-                self.waiter = futures.Future()
-                yield from self.waiter
+                yield from self._wait_for_data()
 
         if n < 0 or self.byte_count <= n:
             data = b''.join(self.buffer)
             self.buffer.clear()
             self.byte_count = 0
+            self._maybe_resume_transport()
             return data
 
         parts = []
@@ -129,6 +168,7 @@ class StreamReader:
             parts_bytes += data_bytes
             self.byte_count -= data_bytes
 
+        self._maybe_resume_transport()
         return b''.join(parts)
 
     @tasks.coroutine
@@ -140,8 +180,6 @@ class StreamReader:
             return b''
 
         while self.byte_count < n and not self.eof:
-            assert not self.waiter
-            self.waiter = futures.Future()
-            yield from self.waiter
+            yield from self._wait_for_data()
 
         return (yield from self.read(n))
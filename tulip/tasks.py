@@ -9,6 +9,7 @@ import collections
 import concurrent.futures
 import functools
 import inspect
+import time
 
 from . import events
 from . import futures
@@ -49,6 +50,22 @@ def iscoroutine(obj):
     return inspect.isgenerator(obj)  # TODO: And what?
 
 
+def _coro_frames(coro):
+    """Return the frames of a coroutine's 'yield from' chain.
+
+    The outermost frame comes first.  Generators that don't expose
+    gi_yieldfrom (Python < 3.5) only report their own frame.
+    """
+    frames = []
+    while coro is not None and inspect.isgenerator(coro):
+        frame = coro.gi_frame
+        if frame is None:
+            break
+        frames.append(frame)
+        coro = getattr(coro, 'gi_yieldfrom', None)
+    return frames
+
+
 def task(func):
     """Decorator for a coroutine to be wrapped in a Task."""
     if inspect.isgeneratorfunction(func):
@@ -69,16 +86,68 @@ def task(func):
 _marker = object()
 
 
+if hasattr(time, 'CLOCK_THREAD_CPUTIME_ID'):
+    _thread_time = functools.partial(time.clock_gettime,
+                                     time.CLOCK_THREAD_CPUTIME_ID)
+else:  # pragma: no cover
+    _thread_time = time.process_time
+
+
+# Accounting of the steps run by Tasks of one coroutine function:
+# - name: qualified name of the coroutine function
+# - steps: number of steps run
+# - wall_time: seconds spent in those steps
+# - cpu_time: CPU seconds used by the loop's thread in those steps
+TaskStats = collections.namedtuple(
+    'TaskStats', ['name', 'steps', 'wall_time', 'cpu_time'])
+
+
+class _TaskAccounting:
+    """Steps, wall time and CPU time of Tasks, per coroutine function.
+
+    An event loop with accounting enabled has one of these; Task._step()
+    records every step in it.
+    """
+
+    def __init__(self):
+        self._stats = {}  # name -> [steps, wall_time, cpu_time]
+
+    def record(self, coro, wall_time, cpu_time):
+        name = getattr(coro, '__qualname__', coro.__name__)
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = [0, 0.0, 0.0]
+        stats[0] += 1
+        stats[1] += wall_time
+        stats[2] += cpu_time
+
+    def top(self, n=None):
+        """Return TaskStats sorted by CPU time, largest first."""
+        result = sorted((TaskStats(name, *stats)
+                         for name, stats in self._stats.items()),
+                        key=lambda stats: stats.cpu_time, reverse=True)
+        return result if n is None else result[:n]
+
+
 class Task(futures.Future):
-    """A coroutine wrapped in a Future."""
+    """A coroutine wrapped in a Future.
+
+    An idle Task runs at low priority: every step of its coroutine is
+    scheduled with the loop's call_idle() instead of call_soon().
+    """
 
-    def __init__(self, coro, *, loop=None, timeout=None):
+    def __init__(self, coro, *, loop=None, timeout=None, idle=False):
         assert inspect.isgenerator(coro)  # Must be a coroutine *object*.
         super().__init__(loop=loop, timeout=timeout)
         self._coro = coro
         self._fut_waiter = None
         self._must_cancel = False
-        self._loop.call_soon(self._step)
+        self._idle = idle
+        if idle:
+            self._call_soon = self._loop.call_idle
+        else:
+            self._call_soon = self._loop.call_soon
+        self._call_soon(self._step)
 
     def __repr__(self):
         res = super().__repr__()
@@ -100,7 +169,7 @@ class Task(futures.Future):
         if self._fut_waiter is not None:
             return self._fut_waiter.cancel()
         else:
-            self._loop.call_soon(self._step_maybe)
+            self._call_soon(self._step_maybe)
             return True
 
     def cancelled(self):
@@ -112,73 +181,88 @@ class Task(futures.Future):
             return self._step()
 
     def _step(self, value=_marker, exc=None):
-        assert not self.done(), \
-            '_step(): already done: {!r}, {!r}, {!r}'.format(self, value, exc)
-
-        # We'll call either coro.throw(exc) or coro.send(value).
-        # Task cancel has to be delayed if current waiter future is done.
-        if self._must_cancel and exc is None and value is _marker:
-            exc = futures.CancelledError
-
-        coro = self._coro
-        value = None if value is _marker else value
-        self._fut_waiter = None
+        # Every step of every Task comes through here: while accounting
+        # is off, it must cost no more than this attribute check.
+        accounting = self._loop._task_accounting
+        if accounting is not None:
+            t0 = time.monotonic()
+            c0 = _thread_time()
         try:
-            if exc is not None:
-                result = coro.throw(exc)
-            elif value is not None:
-                result = coro.send(value)
-            else:
-                result = next(coro)
-        except StopIteration as exc:
-            if self._must_cancel:
-                super().cancel()
-            else:
-                self.set_result(exc.value)
-        except Exception as exc:
-            if self._must_cancel:
-                super().cancel()
-            else:
-                self.set_exception(exc)
-        except BaseException as exc:
-            if self._must_cancel:
-                super().cancel()
-            else:
-                self.set_exception(exc)
-            raise
-        else:
-            if isinstance(result, futures.Future):
-                if not result._blocking:
-                    result.set_exception(
-                        RuntimeError(
-                            'yield was used instead of yield from '
-                            'in task {!r} with {!r}'.format(self, result)))
-
-                result._blocking = False
-                result.add_done_callback(self._wakeup)
-                self._fut_waiter = result
-
-                # task cancellation has been delayed.
+            assert not self.done(), \
+                '_step(): already done: {!r}, {!r}, {!r}'.format(
+                    self, value, exc)
+
+            # We'll call either coro.throw(exc) or coro.send(value).
+            # Task cancel has to be delayed if current waiter future is done.
+            if self._must_cancel and exc is None and value is _marker:
+                exc = futures.CancelledError
+
+            coro = self._coro
+            value = None if value is _marker else value
+            self._fut_waiter = None
+            try:
+                if exc is not None:
+                    result = coro.throw(exc)
+                elif value is not None:
+                    result = coro.send(value)
+                else:
+                    result = next(coro)
+            except StopIteration as exc:
                 if self._must_cancel:
-                    self._fut_waiter.cancel()
-
+                    super().cancel()
+                else:
+                    self.set_result(exc.value)
+            except Exception as exc:
+                if self._must_cancel:
+                    super().cancel()
+                else:
+                    self.set_exception(exc)
+            except BaseException as exc:
+                if self._must_cancel:
+                    super().cancel()
+                else:
+                    self.set_exception(exc)
+                raise
             else:
-                if inspect.isgenerator(result):
-                    self._loop.call_soon(
-                        self._step, None,
-                        RuntimeError(
-                            'yield was used instead of yield from for '
-                            'generator in task {!r} with {}'.format(
-                                self, result)))
+                if isinstance(result, futures.Future):
+                    if not result._blocking:
+                        result.set_exception(
+                            RuntimeError(
+                                'yield was used instead of yield from '
+                                'in task {!r} with {!r}'.format(self, result)))
+
+                    result._blocking = False
+                    if self._idle:
+                        result.add_done_callback(self._wakeup_idle)
+                    else:
+                        result.add_done_callback(self._wakeup)
+                    self._fut_waiter = result
+
+                    # task cancellation has been delayed.
+                    if self._must_cancel:
+                        self._fut_waiter.cancel()
+
                 else:
-                    if result is not None:
-                        self._loop.call_soon(
+                    if inspect.isgenerator(result):
+                        self._call_soon(
                             self._step, None,
                             RuntimeError(
-                                'Task got bad yield: {!r}'.format(result)))
+                                'yield was used instead of yield from for '
+                                'generator in task {!r} with {}'.format(
+                                    self, result)))
                     else:
-                        self._loop.call_soon(self._step_maybe)
-        self = None
+                        if result is not None:
+                            self._call_soon(
+                                self._step, None,
+                                RuntimeError(
+                                    'Task got bad yield: {!r}'.format(result)))
+                        else:
+                            self._call_soon(self._step_maybe)
+        finally:
+            if accounting is not None:
+                accounting.record(self._coro, time.monotonic() - t0,
+                                  _thread_time() - c0)
+        self = None  # Needed to break cycles when an exception occurs.
 
     def _wakeup(self, future):
         try:
@@ -189,6 +273,9 @@ class Task(futures.Future):
             self._step(value, None)
         self = None  # Needed to break cycles when an exception occurs.
 
+    def _wakeup_idle(self, future):
+        self._loop.call_idle(self._wakeup, future)
+
 
 # wait() and as_completed() similar to those in PEP 3148.
 
@@ -302,11 +389,18 @@ def as_completed(fs, *, loop=None, timeout=None):
         yield _wait_for_one()
 
 
+def _set_result_unless_cancelled(future, result):
+    # The sleep may be cancelled after its timer became ready.
+    if not future.cancelled():
+        future.set_result(result)
+
+
 @coroutine
 def sleep(delay, result=None, *, loop=None):
     """Coroutine that completes after a given time (in seconds)."""
     future = futures.Future(loop=loop)
-    h = future._loop.call_later(delay, future.set_result, result)
+    h = future._loop.call_later(
+        delay, _set_result_unless_cancelled, future, result)
     try:
         return (yield from future)
     finally:
@@ -22,6 +22,8 @@ except ImportError:  # pragma: no cover
 
 import tulip
 import tulip.http
+from tulip import base_events
+from tulip import selectors
 from tulip.http import client
 
 
@@ -48,6 +50,81 @@ def run_once(loop):
     loop.run_forever()
 
 
+class VirtualClock:
+    """A clock that only moves when it is advanced.
+
+    Several TestLoops may share one clock.
+    """
+
+    def __init__(self, start=0.0):
+        self._now = start
+
+    def time(self):
+        return self._now
+
+    def advance(self, delay):
+        if delay < 0:
+            raise ValueError('cannot move a clock backwards')
+        self._now += delay
+
+
+class _VirtualSelector(selectors._BaseSelector):
+    """Selector of TestLoop: no I/O, a wait just advances the clock.
+
+    Only a wait for ever blocks for real, until a thread wakes the
+    loop up with call_soon_threadsafe().
+    """
+
+    def __init__(self, clock):
+        super().__init__()
+        self._clock = clock
+        self._wakeup = threading.Event()
+
+    def select(self, timeout=None):
+        if timeout is None:
+            self._wakeup.wait()
+        elif timeout > 0 and not self._wakeup.is_set():
+            self._clock.advance(timeout)
+        self._wakeup.clear()
+        return []
+
+
+class TestLoop(base_events.BaseEventLoop):
+    """An event loop running in virtual time, for tests and simulations.
+
+    Whenever no callback is ready, time() jumps to the next timer
+    instead of sleeping, so sleep(3600) returns at once.  The loop
+    does no I/O: add_reader() and friends are not supported.
+    clock defaults to a new VirtualClock starting at 0.
+    """
+
+    def __init__(self, clock=None):
+        super().__init__()
+        if clock is None:
+            clock = VirtualClock()
+        self.clock = clock
+        self._selector = _VirtualSelector(clock)
+
+    def time(self):
+        return self.clock.time()
+
+    def advance_time(self, delay):
+        """Move the clock forward; due timers run on the next iteration."""
+        self.clock.advance(delay)
+
+    def _write_to_self(self):
+        self._selector._wakeup.set()
+
+    def _process_events(self, event_list):
+        self._wakeup_pending = False
+
+    def close(self):
+        super().close()
+        if self._selector is not None:
+            self._selector.close()
+            self._selector = None
+
+
 @contextlib.contextmanager
 def run_test_server(loop, *, host='127.0.0.1', port=0,
                     use_ssl=False, router=None):
@@ -0,0 +1,205 @@
+"""Hierarchical timer wheel for coarse timeouts.
+
+The event loop keeps its timers in a binary heap, which costs
+O(log n) for every push and pop.  That adds up for servers that arm
+one keep-alive or request timeout per connection and cancel nearly
+all of them before they fire.  A timer wheel instead hashes each
+timer into a slot by its expiry tick, so arming a timer is O(1).
+Cancelling is O(1) as well: cancelled handles are simply dropped when
+their slot comes due or is cascaded.
+
+The price is precision: a timer on the wheel may fire up to one tick
+(the wheel's resolution) late, but never early.  That is fine for
+timeouts measured in seconds, which is why the event loop only puts
+timers with a delay of at least `min_delay` on the wheel and keeps
+the heap for everything else.  See BaseEventLoop.set_timer_wheel().
+"""
+
+import math
+
+__all__ = ['TimerWheel']
+
+
+# Slack for float rounding when converting times to ticks, so that
+# advance(next_expiry()) always reaches the tick it was computed from.
+_EPSILON = 1e-9
+
+
+class TimerWheel:
+    """Hierarchical hashed timer wheel.
+
+    Level 0 has 2**bits slots of `resolution` seconds each.  Every
+    further level has 2**bits slots, each spanning one full turn of
+    the level below it.  When the lower level wraps around, the next
+    slot of the level above is cascaded: its timers are re-hashed into
+    the lower levels.  Timers further away than the outermost level
+    can cover are parked in its farthest slot and re-hashed when it
+    cascades.
+
+    Ticks are absolute: tick n covers the time interval
+    ((n-1) * resolution, n * resolution], and a timer is due when the
+    loop's clock reaches the end of its tick.
+    """
+
+    def __init__(self, resolution=0.1, *, levels=4, bits=8, min_delay=1.0):
+        if resolution <= 0:
+            raise ValueError('resolution must be positive')
+        if levels < 2:
+            # Level 0 fires its slots as they come due; only the outer
+            # levels can hold timers further away than one turn.
+            raise ValueError('levels must be at least 2')
+        if bits < 1:
+            raise ValueError('bits must be positive')
+        self.resolution = resolution
+        self.min_delay = min_delay
+        self._bits = bits
+        self._mask = (1 << bits) - 1
+        self._spans = [1 << (bits * (level + 1)) for level in range(levels)]
+        self._wheels = [[[] for _ in range(1 << bits)]
+                        for _ in range(levels)]
+        self._counts = [0] * levels
+        self._tick = None  # Last tick processed.
+        self._next_tick = None  # Cached result of _find_next_tick().
+
+    def __repr__(self):
+        return '{}<resolution={}, timers={}>'.format(
+            self.__class__.__name__, self.resolution, len(self))
+
+    def __len__(self):
+        """Return the number of timers on the wheel.
+
+        This includes cancelled timers that were not dropped yet.
+        """
+        return sum(self._counts)
+
+    def _sync(self, now):
+        """Internal: re-anchor an empty wheel at the current time."""
+        if self._tick is None or not any(self._counts):
+            tick = int(now / self.resolution)
+            if self._tick is None or tick > self._tick:
+                self._tick = tick
+            self._next_tick = None
+
+    def insert(self, handle, now):
+        """Put a TimerHandle on the wheel.
+
+        `now` is the current time according to the event loop's clock.
+        """
+        self._sync(now)
+        tick = math.ceil(handle._when / self.resolution)
+        self._insert(handle, max(tick, self._tick + 1))
+
+    def _insert(self, handle, tick):
+        delta = tick - self._tick
+        if delta < self._spans[0]:
+            # Fast path: the timer is due within one turn of level 0.
+            self._wheels[0][tick & self._mask].append(handle)
+            self._counts[0] += 1
+            # No cached tick means it is unknown, not that there are
+            # no earlier timers: next_expiry() will look it up.
+            if self._next_tick is not None and tick < self._next_tick:
+                self._next_tick = tick
+            return
+        last = len(self._spans) - 1
+        for level in range(1, last + 1):
+            span = self._spans[level]
+            if delta < span or level == last:
+                if delta >= span:
+                    # Too far away: park in the farthest slot.
+                    tick = self._tick + span - 1
+                index = (tick >> (self._bits * level)) & self._mask
+                self._wheels[level][index].append(handle)
+                self._counts[level] += 1
+                return
+
+    def _cascade(self, level):
+        """Internal: re-hash the current slot of the given level."""
+        index = (self._tick >> (self._bits * level)) & self._mask
+        if index == 0 and level + 1 < len(self._wheels):
+            self._cascade(level + 1)
+        bucket = self._wheels[level][index]
+        if not bucket:
+            return
+        self._wheels[level][index] = []
+        self._counts[level] -= len(bucket)
+        resolution = self.resolution
+        for handle in bucket:
+            if not handle._cancelled:
+                tick = math.ceil(handle._when / resolution)
+                self._insert(handle, max(tick, self._tick))
+
+    def advance(self, now):
+        """Advance the wheel to the given time.
+
+        Return a list of the due timers that were not cancelled.
+        """
+        self._sync(now)
+        target = int(now / self.resolution + _EPSILON)
+        if target <= self._tick:
+            return []
+
+        mask = self._mask
+        wheel = self._wheels[0]
+        counts = self._counts
+        expired = []
+        while self._tick < target:
+            if not counts[0]:
+                if not any(counts):
+                    self._tick = target
+                    break
+                # Nothing on level 0: skip straight to the next turn.
+                boundary = (self._tick | mask) + 1
+                if boundary > target:
+                    self._tick = target
+                    break
+                self._tick = boundary - 1
+            self._tick += 1
+            index = self._tick & mask
+            if not index and len(self._wheels) > 1:
+                self._cascade(1)
+            bucket = wheel[index]
+            if bucket:
+                wheel[index] = []
+                counts[0] -= len(bucket)
+                expired.extend(h for h in bucket if not h._cancelled)
+        self._next_tick = None
+        return expired
+
+    def _find_next_tick(self):
+        tick = self._tick
+        mask = self._mask
+        wheel = self._wheels[0]
+        if self._counts[0]:
+            for offset in range(1, mask + 2):
+                if wheel[(tick + offset) & mask]:
+                    return tick + offset
+        # Only the outer levels hold timers; wake up for the cascade.
+        return (tick | mask) + 1
+
+    def next_expiry(self):
+        """Return the earliest time at which advance() may have work.
+
+        Return None if the wheel is empty.  The result is a lower
+        bound: the slot due at that time may only hold cancelled
+        timers, or it may be a cascade of one of the outer levels.
+        """
+        if not any(self._counts):
+            return None
+        if self._next_tick is None:
+            self._next_tick = self._find_next_tick()
+        return self._next_tick * self.resolution
+
+    def clear(self):
+        """Remove all timers from the wheel.
+
+        Return a list of the timers that were not cancelled.
+        """
+        handles = []
+        for level, wheel in enumerate(self._wheels):
+            for index, bucket in enumerate(wheel):
+                if bucket:
+                    handles.extend(h for h in bucket if not h._cancelled)
+                    wheel[index] = []
+            self._counts[level] = 0
+        self._next_tick = None
+        return handles
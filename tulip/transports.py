@@ -2,6 +2,9 @@
 
 __all__ = ['ReadTransport', 'WriteTransport', 'Transport']
 
+from . import futures
+from .log import tulip_log
+
 
 class BaseTransport:
     """Base ABC for transports."""
@@ -29,6 +32,15 @@ class BaseTransport:
         """
         raise NotImplementedError
 
+    def add_close_callback(self, callback):
+        """Arrange for callback() to be called when the transport is gone.
+
+        It is called once, after connection_lost() (or after a failed
+        SSL handshake) when the socket has been closed.  Use it to keep
+        count of open connections.
+        """
+        raise NotImplementedError
+
 
 class ReadTransport(BaseTransport):
     """ABC for read-only transports."""
@@ -98,6 +110,31 @@ class WriteTransport(BaseTransport):
         """Discard any buffered data awaiting transmission on the transport."""
         raise NotImplementedError
 
+    def set_write_buffer_limits(self, high=None, low=None):
+        """Set the high and low water marks of the write buffer.
+
+        When more than high bytes are buffered, the protocol's
+        pause_writing() is called; once the buffer is down to low bytes
+        or less, its resume_writing() is.  high defaults to 64 KiB, or
+        to 4 * low if low is given; low defaults to high // 4.
+        """
+        raise NotImplementedError
+
+    def get_write_buffer_size(self):
+        """Return the number of bytes buffered awaiting transmission."""
+        raise NotImplementedError
+
+    def drain(self):
+        """Wait until the protocol may write again.
+
+        Returns a Future, for 'yield from transport.drain()', that is
+        done at once unless the write buffer went over the high water
+        mark and hasn't gone down to the low water mark since.  If the
+        connection is lost meanwhile, the Future raises
+        ConnectionResetError.
+        """
+        raise NotImplementedError
+
     def abort(self):
         """Closes the transport immediately.
 
@@ -129,6 +166,86 @@ class Transport(ReadTransport, WriteTransport):
     """
 
 
+class _FlowControlMixin:
+    """Write flow control, for write transports.
+
+    The transport calls _maybe_pause_protocol() after buffering data,
+    _maybe_resume_protocol() after sending or discarding some, and
+    _flow_control_lost() when the connection is lost.  It needs
+    _protocol and _conn_lost attributes, and get_write_buffer_size().
+    """
+
+    _high_water = 64 * 1024
+    _low_water = 16 * 1024
+    _protocol_paused = False
+    _drain_waiters = None
+
+    def set_write_buffer_limits(self, high=None, low=None):
+        if high is None:
+            high = 64 * 1024 if low is None else 4 * low
+        if low is None:
+            low = high // 4
+        if not high >= low >= 0:
+            raise ValueError('high ({!r}) must be >= low ({!r}) '
+                             'must be >= 0'.format(high, low))
+        self._high_water = high
+        self._low_water = low
+        self._maybe_pause_protocol()
+        self._maybe_resume_protocol()
+
+    def drain(self):
+        waiter = futures.Future()
+        if self._conn_lost:
+            waiter.set_exception(ConnectionResetError('Connection lost'))
+        elif not self._protocol_paused:
+            waiter.set_result(None)
+        else:
+            # One Future per producer, so that cancelling one producer
+            # doesn't cancel the others.
+            if self._drain_waiters is None:
+                self._drain_waiters = []
+            self._drain_waiters.append(waiter)
+        return waiter
+
+    def _maybe_pause_protocol(self):
+        if (not self._protocol_paused and
+                self.get_write_buffer_size() > self._high_water):
+            self._protocol_paused = True
+            # Protocols need not derive from BaseProtocol.
+            pause_writing = getattr(self._protocol, 'pause_writing', None)
+            if pause_writing is not None:
+                try:
+                    pause_writing()
+                except Exception:
+                    tulip_log.exception('pause_writing() failed')
+
+    def _maybe_resume_protocol(self):
+        if (self._protocol_paused and
+                self.get_write_buffer_size() <= self._low_water):
+            self._protocol_paused = False
+            self._wake_drain_waiters(None)
+            resume_writing = getattr(self._protocol, 'resume_writing', None)
+            if resume_writing is not None:
+                try:
+                    resume_writing()
+                except Exception:
+                    tulip_log.exception('resume_writing() failed')
+
+    def _flow_control_lost(self):
+        self._wake_drain_waiters(ConnectionResetError('Connection lost'))
+
+    def _wake_drain_waiters(self, exc):
+        waiters = self._drain_waiters
+        if waiters:
+            self._drain_waiters = None
+            for waiter in waiters:
+                if not waiter.cancelled():
+                    if exc is None:
+                        waiter.set_result(None)
+                    else:
+                        waiter.set_exception(exc)
+
+
 class DatagramTransport(BaseTransport):
     """ABC for datagram (UDP) transports."""
 
@@ -13,6 +13,7 @@ except ImportError:  # pragma: no cover
 
 from . import constants
 from . import events
+from . import protocols
 from . import selector_events
 from . import transports
 from .log import tulip_log
@@ -31,8 +32,8 @@ class SelectorEventLoop(selector_events.BaseSelectorEventLoop):
     Adds signal handling to SelectorEventLoop
     """
 
-    def __init__(self, selector=None):
-        super().__init__(selector)
+    def __init__(self, selector=None, *, edge_triggered=False):
+        super().__init__(selector, edge_triggered=edge_triggered)
         self._signal_handlers = {}
 
     def _socketpair(self):
@@ -132,10 +133,14 @@ class SelectorEventLoop(selector_events.BaseSelectorEventLoop):
 
     def _make_read_pipe_transport(self, pipe, waiter=None,
                                   extra=None):
+        if self._edge_triggered:
+            return _UnixEdgeReadPipeTransport(self, pipe, waiter, extra)
         return _UnixReadPipeTransport(self, pipe, waiter, extra)
 
     def _make_write_pipe_transport(self, pipe, waiter=None,
                                    extra=None):
+        if self._edge_triggered:
+            return _UnixEdgeWritePipeTransport(self, pipe, waiter, extra)
         return _UnixWritePipeTransport(self, pipe, waiter, extra)
 
 
@@ -157,24 +162,42 @@ class _UnixReadPipeTransport(transports.ReadTransport):
         self._fileno = pipe.fileno()
         _set_nonblocking(self._fileno)
         self._protocol = None
+        self._buffered = False  # Set for a BufferedProtocol.
         self._closing = False
         if waiter is not None:
             self._event_loop.call_soon(waiter.set_result, None)
 
     def register_protocol(self, protocol):
         self._protocol = protocol
+        self._buffered = isinstance(protocol, protocols.BufferedProtocol)
         self._event_loop.add_reader(self._fileno, self._read_ready)
 
+    def _read(self):
+        # See _SelectorTransport._recv().
+        if not self._buffered:
+            return os.read(self._fileno, self.max_size)
+        buf = self._protocol.get_buffer(self.max_size)
+        try:
+            return os.readv(self._fileno, [buf])
+        finally:
+            del buf
+
+    def _data_received(self, data):
+        if self._buffered:
+            self._protocol.buffer_updated(data)
+        else:
+            self._protocol.data_received(data)
+
     def _read_ready(self):
         try:
-            data = os.read(self._fileno, self.max_size)
+            data = self._read()
         except (BlockingIOError, InterruptedError):
             pass
         except OSError as exc:
             self._fatal_error(exc)
         else:
             if data:
-                self._protocol.data_received(data)
+                self._data_received(data)
             else:
                 self._event_loop.remove_reader(self._fileno)
                 self._protocol.eof_received()
@@ -206,7 +229,8 @@ class _UnixReadPipeTransport(transports.ReadTransport):
             self._pipe.close()
 
 
-class _UnixWritePipeTransport(transports.WriteTransport):
+class _UnixWritePipeTransport(transports._FlowControlMixin,
+                              transports.WriteTransport):
 
     def __init__(self, event_loop, pipe, waiter=None, extra=None):
         super().__init__(extra)
@@ -217,6 +241,7 @@ class _UnixWritePipeTransport(transports.WriteTransport):
         _set_nonblocking(self._fileno)
         self._protocol = None
         self._buffer = []
+        self._buffer_size = 0  # Bytes in the buffer.
         self._conn_lost = 0
         self._closing = False  # Set when close() or write_eof() called.
         if waiter is not None:
@@ -254,6 +279,11 @@ class _UnixWritePipeTransport(transports.WriteTransport):
             self._event_loop.add_writer(self._fileno, self._write_ready)
 
         self._buffer.append(data)
+        self._buffer_size += len(data)
+        self._maybe_pause_protocol()
+
+    def get_write_buffer_size(self):
+        return self._buffer_size
 
     def _write_ready(self):
         data = b''.join(self._buffer)
@@ -268,6 +298,8 @@ class _UnixWritePipeTransport(transports.WriteTransport):
             self._conn_lost += 1
             self._fatal_error(exc)
         else:
+            self._buffer_size = len(data) - n
+            self._maybe_resume_protocol()
             if n == len(data):
                 self._event_loop.remove_writer(self._fileno)
                 if self._closing:
@@ -304,11 +336,111 @@ class _UnixWritePipeTransport(transports.WriteTransport):
     def _close(self, exc=None):
         self._closing = True
         self._buffer.clear()
+        self._buffer_size = 0
         self._event_loop.remove_writer(self._fileno)
         self._event_loop.call_soon(self._call_connection_lost, exc)
 
     def _call_connection_lost(self, exc):
+        self._flow_control_lost()
         try:
             self._protocol.connection_lost(exc)
         finally:
             self._pipe.close()
+
+
+class _UnixEdgeReadPipeTransport(_UnixReadPipeTransport):
+    """Read pipe transport for an edge-triggered event loop.
+
+    The pipe stays registered while paused; reading goes on until
+    EAGAIN, and is retried on resume().
+    """
+
+    def __init__(self, event_loop, pipe, waiter=None, extra=None):
+        super().__init__(event_loop, pipe, waiter, extra)
+        self._paused = False
+
+    def register_protocol(self, protocol):
+        self._protocol = protocol
+        self._buffered = isinstance(protocol, protocols.BufferedProtocol)
+        self._event_loop._add_edge_triggered(
+            self._fileno, self._read_ready, None)
+
+    def _read_ready(self):
+        while not (self._paused or self._closing):
+            try:
+                data = self._read()
+            except InterruptedError:
+                continue
+            except BlockingIOError:
+                break
+            except OSError as exc:
+                self._fatal_error(exc)
+                break
+            if not data:
+                self._event_loop.remove_reader(self._fileno)
+                self._protocol.eof_received()
+                break
+            self._data_received(data)
+
+    def pause(self):
+        self._paused = True
+
+    def resume(self):
+        if self._paused:
+            self._paused = False
+            self._event_loop.call_soon(self._read_ready)
+
+
+class _UnixEdgeWritePipeTransport(_UnixWritePipeTransport):
+    """Write pipe transport for an edge-triggered event loop.
+
+    The pipe is registered once; writing goes on until EAGAIN.
+    """
+
+    def register_protocol(self, protocol):
+        self._protocol = protocol
+        self._event_loop._add_edge_triggered(
+            self._fileno, None, self._write_ready)
+
+    def write(self, data):
+        if self._buffer or self._conn_lost or not data:
+            super().write(data)  # Checks and buffers, writes nothing.
+        else:
+            assert isinstance(data, bytes), repr(data)
+            assert not self._closing
+            self._buffer.append(data)
+            self._buffer_size += len(data)
+            self._write_ready()
+            self._maybe_pause_protocol()
+
+    def _write_ready(self):
+        if not self._buffer:
+            return
+
+        data = b''.join(self._buffer)
+        self._buffer.clear()
+        while data:
+            try:
+                n = os.write(self._fileno, data)
+            except InterruptedError:
+                continue
+            except BlockingIOError:
+                break
+            except Exception as exc:
+                self._conn_lost += 1
+                self._fatal_error(exc)
+                return
+            data = data[n:]
+
+        self._buffer_size = len(data)
+        self._maybe_resume_protocol()
+        if data:
+            self._buffer.append(data)  # Wait for the next edge.
+        elif self._closing:
+            self._event_loop.remove_writer(self._fileno)
+            self._call_connection_lost(None)
+
+    def write_eof(self):
+        super().write_eof()
+        if not self._buffer:
+            self._event_loop.remove_writer(self._fileno)